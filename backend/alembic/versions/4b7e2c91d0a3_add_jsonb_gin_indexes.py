@@ -0,0 +1,35 @@
+"""add jsonb gin indexes
+
+Revision ID: 4b7e2c91d0a3
+Revises: 1664ca3ca762
+Create Date: 2026-10-19 09:12:41.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d0a3'
+down_revision: Union[str, Sequence[str], None] = '1664ca3ca762'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_event_procedure_data_gin', 'event', ['procedure_data'], unique=False, postgresql_using='gin', postgresql_ops={'procedure_data': 'jsonb_path_ops'})
+    op.create_index('ix_event_metadata_blob_gin', 'event', ['metadata_blob'], unique=False, postgresql_using='gin', postgresql_ops={'metadata_blob': 'jsonb_path_ops'})
+    op.create_index('ix_study_metadata_blob_gin', 'study', ['metadata_blob'], unique=False, postgresql_using='gin', postgresql_ops={'metadata_blob': 'jsonb_path_ops'})
+    op.create_index('ix_procedure_metadata_blob_gin', 'procedure', ['metadata_blob'], unique=False, postgresql_using='gin', postgresql_ops={'metadata_blob': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_procedure_metadata_blob_gin', table_name='procedure')
+    op.drop_index('ix_study_metadata_blob_gin', table_name='study')
+    op.drop_index('ix_event_metadata_blob_gin', table_name='event')
+    op.drop_index('ix_event_procedure_data_gin', table_name='event')
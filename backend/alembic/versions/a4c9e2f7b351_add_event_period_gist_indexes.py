@@ -0,0 +1,47 @@
+"""add event period gist indexes
+
+Revision ID: a4c9e2f7b351
+Revises: f1b8d4e62a07
+Create Date: 2026-10-19 15:34:18.502716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7b351'
+down_revision: Union[str, Sequence[str], None] = 'f1b8d4e62a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.event_period()
+EVENT_PERIOD = (
+    "tsrange(start_datetime, greatest(start_datetime, "
+    "coalesce(end_datetime, start_datetime + interval '1 hour')))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist provides GiST operator classes for the uuid/text columns
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_subject_period "
+            f"ON event USING gist (subject_id, {EVENT_PERIOD})"
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_resource_period "
+            f"ON event USING gist ((metadata_blob ->> 'resource'), {EVENT_PERIOD}) "
+            f"WHERE metadata_blob ? 'resource'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_event_resource_period', table_name='event')
+    op.drop_index('ix_event_subject_period', table_name='event')
@@ -0,0 +1,36 @@
+"""add subject trigram search index
+
+Revision ID: a93f5d2e7c18
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-19 11:40:05.532917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93f5d2e7c18'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must match app.models.subject_search_document()
+    op.execute(
+        "CREATE INDEX ix_subject_search_trgm ON subject USING gin ("
+        "lower(lastname || ' ' || firstname || ' ' || coalesce(middlename, '') || ' ' || "
+        "coalesce(email, '') || ' ' || coalesce(phone, '') || ' ' || coalesce(ref_code, '')) "
+        "gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_subject_search_trgm', table_name='subject')
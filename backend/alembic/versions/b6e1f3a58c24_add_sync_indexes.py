@@ -0,0 +1,37 @@
+"""add updated_at and audit deletion indexes for sync
+
+Revision ID: b6e1f3a58c24
+Revises: a4c9e2f7b351
+Create Date: 2026-10-19 16:21:47.913580
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1f3a58c24'
+down_revision: Union[str, Sequence[str], None] = 'a4c9e2f7b351'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('study', 'subject', 'procedure', 'event', 'user', 'systemsetting')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY avoids blocking writes while large tables are indexed
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_auditlog_deletes', 'auditlog', ['table_name', 'changed_at'], unique=False, postgresql_where=sa.text("action = 'DELETE'"), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_auditlog_deletes', table_name='auditlog')
+    for table in reversed(TABLES):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
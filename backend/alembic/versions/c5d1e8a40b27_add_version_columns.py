@@ -0,0 +1,34 @@
+"""add version columns for optimistic locking
+
+Revision ID: c5d1e8a40b27
+Revises: a93f5d2e7c18
+Create Date: 2026-10-19 12:15:42.108344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d1e8a40b27'
+down_revision: Union[str, Sequence[str], None] = 'a93f5d2e7c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose models inherit app.models.BaseModel
+VERSIONED_TABLES = ('user', 'study', 'subject', 'procedure', 'event', 'systemsetting')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
@@ -0,0 +1,73 @@
+"""add soft delete column and partial indexes on active rows
+
+Revision ID: c8d2a7f41e93
+Revises: b6e1f3a58c24
+Create Date: 2026-10-19 18:05:12.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2a7f41e93'
+down_revision: Union[str, Sequence[str], None] = 'b6e1f3a58c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('study', 'subject', 'procedure', 'event', 'user', 'systemsetting')
+
+# Must match app.models.event_period() and subject_search_document()
+EVENT_PERIOD = (
+    "tsrange(start_datetime, greatest(start_datetime, "
+    "coalesce(end_datetime, start_datetime + interval '1 hour')))"
+)
+SUBJECT_SEARCH = (
+    "lower(lastname || ' ' || firstname || ' ' || coalesce(middlename, '') || ' ' || "
+    "coalesce(email, '') || ' ' || coalesce(phone, '') || ' ' || coalesce(ref_code, ''))"
+)
+
+# Index -> (table, definition, previous WHERE); rebuilt to cover active rows only
+PARTIAL_INDEXES = {
+    'ix_event_subject_id_start_datetime': ('event', '(subject_id, start_datetime, id)', None),
+    'ix_event_study_id_start_datetime': ('event', '(study_id, start_datetime, id)', None),
+    'ix_event_start_datetime': ('event', '(start_datetime)', None),
+    'ix_event_subject_period': ('event', f'USING gist (subject_id, {EVENT_PERIOD})', None),
+    'ix_event_resource_period': ('event', f"USING gist ((metadata_blob ->> 'resource'), {EVENT_PERIOD})", "metadata_blob ? 'resource'"),
+    'ix_procedure_study_id': ('procedure', '(study_id)', None),
+    'ix_subject_search_trgm': ('subject', f'USING gin ({SUBJECT_SEARCH} gin_trgm_ops)', None),
+}
+
+
+def _rebuild(name: str, table: str, definition: str, where) -> None:
+    """Builds the new index next to the old one, then swaps them."""
+    op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}_new')
+    op.execute(f'CREATE INDEX CONCURRENTLY {name}_new ON "{table}" {definition}' + (f' WHERE {where}' if where else ''))
+    op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Sync now reads soft deletions from updated_at
+    op.drop_index('ix_auditlog_deletes', table_name='auditlog')
+    # CONCURRENTLY avoids blocking writes while large tables are re-indexed
+    with op.get_context().autocommit_block():
+        for name, (table, definition, where) in PARTIAL_INDEXES.items():
+            active = f'({where}) AND deleted_at IS NULL' if where else 'deleted_at IS NULL'
+            _rebuild(name, table, definition, active)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, definition, where) in PARTIAL_INDEXES.items():
+            _rebuild(name, table, definition, where)
+    op.create_index('ix_auditlog_deletes', 'auditlog', ['table_name', 'changed_at'], unique=False, postgresql_where=sa.text("action = 'DELETE'"))
+    for table in reversed(TABLES):
+        op.drop_column(table, 'deleted_at')
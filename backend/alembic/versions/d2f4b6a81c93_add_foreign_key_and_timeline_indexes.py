@@ -0,0 +1,41 @@
+"""add foreign key and event timeline indexes
+
+Revision ID: d2f4b6a81c93
+Revises: c5d1e8a40b27
+Create Date: 2026-10-19 13:02:17.640512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4b6a81c93'
+down_revision: Union[str, Sequence[str], None] = 'c5d1e8a40b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY avoids blocking event writes while large tables are indexed
+    with op.get_context().autocommit_block():
+        op.create_index('ix_event_subject_id_start_datetime', 'event', ['subject_id', 'start_datetime', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_event_study_id_start_datetime', 'event', ['study_id', 'start_datetime', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_event_procedure_id'), 'event', ['procedure_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_procedure_study_id'), 'procedure', ['study_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_studysubjectlink_subject_id'), 'studysubjectlink', ['subject_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_studyuseraccess_user_id'), 'studyuseraccess', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_studyuseraccess_user_id'), table_name='studyuseraccess')
+    op.drop_index(op.f('ix_studysubjectlink_subject_id'), table_name='studysubjectlink')
+    op.drop_index(op.f('ix_procedure_study_id'), table_name='procedure')
+    op.drop_index(op.f('ix_event_procedure_id'), table_name='event')
+    op.drop_index('ix_event_study_id_start_datetime', table_name='event')
+    op.drop_index('ix_event_subject_id_start_datetime', table_name='event')
@@ -0,0 +1,37 @@
+"""add job queue columns and pending index
+
+Revision ID: e2a6c9d14b58
+Revises: d5f9b2c63a17
+Create Date: 2026-10-19 20:37:12.604918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6c9d14b58'
+down_revision: Union[str, Sequence[str], None] = 'd5f9b2c63a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job', sa.Column('result_location', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('job', sa.Column('cancel_requested', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('job', sa.Column('claimed_by', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('job', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_job_pending', 'job', ['created_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_pending', table_name='job')
+    op.drop_column('job', 'heartbeat_at')
+    op.drop_column('job', 'claimed_by')
+    op.drop_column('job', 'cancel_requested')
+    op.drop_column('job', 'result_location')
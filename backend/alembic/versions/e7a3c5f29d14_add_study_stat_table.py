@@ -0,0 +1,55 @@
+"""add study stat table
+
+Revision ID: e7a3c5f29d14
+Revises: d2f4b6a81c93
+Create Date: 2026-10-19 14:11:05.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c5f29d14'
+down_revision: Union[str, Sequence[str], None] = 'd2f4b6a81c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENTS = "event"
+ENROLLMENTS = "studysubjectlink JOIN subject ON subject.id = studysubjectlink.subject_id"
+
+# (dimension, key expression, source) used to backfill the counters; see app/stats.py
+BACKFILL = (
+    ("status", "status", EVENTS),
+    ("procedure", "procedure_id::text", EVENTS),
+    ("week", "to_char(date_trunc('week', start_datetime), 'YYYY-MM-DD')", EVENTS),
+    ("enrolled", "''", ENROLLMENTS),
+    ("sex", "coalesce(sex, 'unknown')", ENROLLMENTS),
+    ("birth_year", "extract(year FROM birthdate)::int::text", ENROLLMENTS),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('studystat',
+    sa.Column('study_id', sa.Uuid(), nullable=False),
+    sa.Column('dimension', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['study_id'], ['study.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('study_id', 'dimension', 'key')
+    )
+    for dimension, key, source in BACKFILL:
+        study_id = "event.study_id" if source == EVENTS else "studysubjectlink.study_id"
+        op.execute(
+            f"INSERT INTO studystat (study_id, dimension, key, count) "
+            f"SELECT {study_id}, '{dimension}', {key}, count(*) FROM {source} GROUP BY 1, 3"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('studystat')
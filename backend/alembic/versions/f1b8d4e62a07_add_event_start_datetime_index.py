@@ -0,0 +1,31 @@
+"""add event start_datetime index
+
+Revision ID: f1b8d4e62a07
+Revises: e7a3c5f29d14
+Create Date: 2026-10-19 14:52:40.127093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b8d4e62a07'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c5f29d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY avoids blocking event writes while the table is indexed
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_event_start_datetime'), 'event', ['start_datetime'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_event_start_datetime'), table_name='event')
@@ -3,9 +3,22 @@ from datetime import datetime
 from typing import Any, Dict, Optional, Type, TypeVar
 from sqlmodel import Session, select, SQLModel
 from app.models import AuditLog
+from app.jsonpatch import apply_delta
 
 T = TypeVar("T", bound=SQLModel)
 
+def snapshot(record: SQLModel) -> Dict[str, Any]:
+    """
+    Returns a JSON-compatible copy of a record for audit `prev_state`/`new_state`.
+    
+    Uses a single `model_dump` pass instead of serializing to a JSON string
+    and parsing it back.
+    
+    :param record: The model instance to capture.
+    :return: Dictionary of column values with UUIDs and datetimes as strings.
+    """
+    return record.model_dump(mode="json")
+
 def log_change(
     session: Session,
     table_name: str,
@@ -55,7 +68,8 @@ def reconstruct_state(
     :param at_datetime: The target point in time for reconstruction.
     :return: A dictionary representing the record state at that time, or None.
     """
-    # Find the most recent audit log entry before or at the specified datetime
+    # Walk back from the most recent entry to the last full snapshot,
+    # collecting the PATCH deltas recorded after it.
     statement = (
         select(AuditLog)
         .where(
@@ -65,15 +79,21 @@ def reconstruct_state(
         )
         .order_by(AuditLog.changed_at.desc())
     )
-    latest_log = session.exec(statement).first()
-    
-    if not latest_log:
+    patches = []
+    for log_entry in session.exec(statement):
+        if log_entry.action != "PATCH":
+            break
+        patches.append(log_entry.new_state)
+    else:
         return None
     
-    # In our implementation, we store the full 'new_state' in each log entry.
-    # This makes reconstruction a O(1) database lookup instead of a full playback.
-    # If the record was DELETED at that time, we'd check if the action was DELETE.
-    if latest_log.action == "DELETE":
+    # INSERT/UPDATE entries store the full 'new_state', so reconstruction only
+    # replays the (few) partial PATCH deltas on top of the latest snapshot.
+    # If the record was DELETED at that time, there is nothing to return.
+    if log_entry.action == "DELETE":
         return None
-        
-    return latest_log.new_state
+    
+    state = log_entry.new_state
+    for delta in reversed(patches):
+        state = apply_delta(state, delta)
+    return state
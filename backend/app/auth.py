@@ -72,13 +72,35 @@ async def get_current_user(
         raise credentials_exception
     return user
 
+def has_admin_level(user: User, admin_level: int) -> bool:
+    """
+    Checks whether a user holds at least the given administrative level.
+
+    :param user: The user to check.
+    :param admin_level: Minimum required level; superusers always pass.
+    :return: True if the user qualifies.
+    """
+    return user.is_superuser or user.admin_level >= admin_level
+
+def check_admin_level(user: User, admin_level: int) -> User:
+    """
+    Enforces an administrative level inside an endpoint, for checks that
+    depend on request data and so cannot be declared with `admin_required`.
+
+    :param user: The current user.
+    :param admin_level: Minimum required level.
+    :return: The user, if permitted.
+    :raises HTTPException: 403 if the user's level is too low.
+    """
+    if not has_admin_level(user, admin_level):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation not permitted for this administrative level"
+        )
+    return user
+
 def admin_required(admin_level: int = 1):
     """Higher-order function for RBAC level enforcement."""
     async def decorator(current_user: User = Depends(get_current_user)):
-        if not current_user.is_superuser and current_user.admin_level < admin_level:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Operation not permitted for this administrative level"
-            )
-        return current_user
+        return check_admin_level(current_user, admin_level)
     return decorator
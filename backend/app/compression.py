@@ -0,0 +1,234 @@
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Streaming responses that must reach the client unbuffered
+DEFAULT_EXCLUDED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class GzipEncoder:
+    """Streaming gzip encoder."""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliEncoder:
+    """Streaming brotli encoder (requires the `brotli` package)."""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdEncoder:
+    """Streaming zstd encoder (requires the `zstandard` package)."""
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """
+    Lists the content codings supported by the installed libraries.
+
+    :return: Encoding names, e.g. `["zstd", "br", "gzip"]`.
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parses an `Accept-Encoding` header into a map of coding to q-value.
+
+    :param header: Raw header value, e.g. `"gzip, br;q=0.8"`.
+    :return: Dictionary of lower-cased codings and their weights.
+    """
+    weights = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    return weights
+
+
+def negotiate_encoding(header: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    Picks the first server-preferred encoding the client accepts.
+
+    :param header: The client's `Accept-Encoding` header.
+    :param encodings: Enabled encodings in server preference order.
+    :return: The chosen encoding, or None for identity.
+    """
+    weights = parse_accept_encoding(header)
+    wildcard = weights.get("*", 0.0)
+    for encoding in encodings:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with zstd, brotli or gzip.
+
+    Small bodies (below `minimum_size`) are sent as-is. Streaming responses
+    are compressed chunk by chunk with a flush after each chunk, so chunked
+    exports still reach the client progressively.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str] = ("zstd", "br", "gzip"),
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        excluded_media_types: Sequence[str] = DEFAULT_EXCLUDED_MEDIA_TYPES,
+    ):
+        self.app = app
+        supported = available_encodings()
+        self.encodings = [e for e in encodings if e in supported]
+        self.minimum_size = minimum_size
+        self.excluded_media_types = tuple(excluded_media_types)
+        self.factories: Dict[str, Callable[[], object]] = {
+            "gzip": lambda: GzipEncoder(gzip_level),
+            "br": lambda: BrotliEncoder(brotli_quality),
+            "zstd": lambda: ZstdEncoder(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Per-request state machine wrapping the downstream `send`."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _should_skip(self, headers: Headers) -> bool:
+        """Checks for already-encoded, bodiless or excluded responses."""
+        status = self.start_message["status"]
+        media_type = headers.get("content-type", "").split(";")[0].strip()
+        return (
+            "content-encoding" in headers
+            or status < 200
+            or status in (204, 304)
+            or media_type in self.middleware.excluded_media_types
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            if self._should_skip(Headers(raw=message["headers"])):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Small, complete body: compression would not pay off
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self.encoder = self.middleware.factories[self.encoding]()
+
+            if not more_body:
+                # Complete body: compress in one shot and keep Content-Length
+                compressed = self.encoder.finish(body)
+                await self._send_start(len(compressed))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send_start(None)
+
+        if more_body:
+            await self._send({"type": "http.response.body", "body": self.encoder.chunk(body), "more_body": True})
+        else:
+            await self._send({"type": "http.response.body", "body": self.encoder.finish(body)})
+
+    async def _send_start(self, content_length: Optional[int]) -> None:
+        """
+        Rewrites the response headers for the chosen encoding and sends them.
+
+        :param content_length: Encoded body length, or None for a streamed body.
+        """
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        await self._send(self.start_message)
@@ -1,5 +1,7 @@
 import os
 import urllib.parse
+from typing import Optional
+from sqlalchemy.engine import Engine
 from sqlmodel import create_engine, Session, SQLModel
 from pydantic_settings import BaseSettings
 
@@ -11,6 +13,44 @@ class Settings(BaseSettings):
     PG_DB: str = "cras"
     GOOGLE_CLIENT_ID: str = ""
     
+    # Optional integrations; disabled ones are never imported
+    ENABLE_GOOGLE_AUTH: bool = True
+    ENABLE_MFA: bool = True
+    
+    # Response compression (encodings in server preference order)
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Logging and instrumentation
+    LOG_LEVEL: str = "INFO"
+    SQL_ECHO: bool = False
+    SLOW_REQUEST_MS: int = 500
+    METRICS_ENABLED: bool = True
+    
+    # Production server (gunicorn.conf.py); WEB_CONCURRENCY=0 means 2 x CPUs + 1
+    BIND: str = "0.0.0.0:8005"
+    WEB_CONCURRENCY: int = 0
+    WORKER_TIMEOUT: int = 60
+    GRACEFUL_TIMEOUT: int = 30
+    KEEPALIVE: int = 5
+    
+    # Connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    
+    # Bootstrap admin created by seed_db.py (and logged in by benchmarks/loadtest.py)
+    SEED_ADMIN_EMAIL: str = "admin@hku.hk"
+    SEED_ADMIN_PASSWORD: str = ""  # No default: must be set to create the admin
+    
+    # Background jobs (python -m app.worker)
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_STALE_SECONDS: int = 300  # A running job without a heartbeat for this long is reclaimed
+    JOB_RESULTS_DIR: str = "job_results"  # Export files; shared by the API and workers
+    
     @property
     def DATABASE_URL(self) -> str:
         encoded_password = urllib.parse.quote_plus(self.PG_PASSWORD)
@@ -21,10 +61,49 @@ class Settings(BaseSettings):
         "extra": "ignore"
     }
 
-settings = Settings()
+_settings: Optional[Settings] = None
+_engine: Optional[Engine] = None
+
+def get_settings() -> Settings:
+    """Returns the settings, reading the environment and `.env` on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+def get_engine() -> Engine:
+    """
+    Returns the process-wide engine, creating it on first use.
+
+    The app's lifespan hook creates it at worker startup. Under gunicorn the
+    app is imported once in the master and forked; the post_fork hook in
+    gunicorn.conf.py resets the pool in case the master already opened one.
+    """
+    global _engine
+    if _engine is None:
+        settings = get_settings()
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            echo=settings.SQL_ECHO,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    return _engine
+
+def engine_created() -> bool:
+    """Returns whether `get_engine` has already created this process's engine."""
+    return _engine is not None
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+def __getattr__(name: str):
+    # `from app.database import settings, engine` keeps working, lazily
+    if name == "settings":
+        return get_settings()
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
@@ -0,0 +1,121 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import func
+from sqlmodel import Session
+
+# Clients must revalidate, but may reuse the cached body after a 304.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Builds a weak ETag from the given version components.
+
+    :param parts: Values identifying the representation (IDs, timestamps, counts).
+    :return: A weak entity tag, e.g. `W/"3f2a..."`.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def record_etag(kind: str, record_id: Any, updated_at: Any, version: Any, *extra: Any) -> str:
+    """
+    Builds the ETag of a single record from its ID, `updated_at` and `version`.
+
+    :param kind: Entity name, e.g. "study".
+    :param record_id: The record's ID.
+    :param updated_at: The record's last modification time.
+    :param version: The record's optimistic-locking version.
+    :param extra: Additional version components.
+    :return: A weak entity tag.
+    """
+    return make_etag(kind, str(record_id).lower(), updated_at, version, *extra)
+
+
+def collection_etag(session: Session, statement, model: Any, *extra: Any) -> str:
+    """
+    Computes a list-level ETag from `count(*)` and `max(updated_at)`.
+
+    The aggregate reuses the list statement's WHERE clause, so filtered
+    lists get their own tag without loading any rows.
+
+    :param session: Active database session.
+    :param statement: The select statement that produces the list.
+    :param model: Model being listed (must have `updated_at`).
+    :param extra: Additional version components (e.g. query string).
+    :return: A weak entity tag.
+    """
+    aggregate = statement.with_only_columns(func.count(), func.max(model.updated_at))
+    # execute(), not exec(): a `select(Model)` keeps returning scalars after with_only_columns
+    count, last_updated = session.execute(aggregate).one()
+    return make_etag(model.__tablename__, count, last_updated, *extra)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an `If-None-Match` header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    Returns a 304 response if the client already holds this representation.
+
+    :param request: The incoming request.
+    :param etag: The current ETag of the resource.
+    :return: A 304 response, or None if the full body should be sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+    return None
+
+
+def check_if_match(request: Request, etag: str) -> None:
+    """
+    Enforces an `If-Match` precondition before a read-modify-write update.
+
+    The header is required: without it the client's edit may be based on a
+    copy that another user has since changed. Uses the same weak comparison
+    as `If-None-Match`: the tags are derived from the record version, so
+    equal tags mean the same stored state.
+
+    :param request: The incoming request.
+    :param etag: The record's current ETag.
+    :raises HTTPException: 428 without an `If-Match` header, 409 if the
+        client's copy is out of date.
+    """
+    if_match = request.headers.get("if-match")
+    if not if_match:
+        raise HTTPException(
+            status_code=428,
+            detail="If-Match header required; send the ETag of the record being edited",
+        )
+    if not _matches(if_match, etag):
+        raise HTTPException(
+            status_code=409,
+            detail="Record was modified by another user; reload and retry",
+        )
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    """
+    Attaches the ETag and revalidation headers to a response.
+
+    :param response: The outgoing response.
+    :param etag: The current ETag of the resource.
+    :return: The same response.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
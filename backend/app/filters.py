@@ -0,0 +1,198 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException
+from sqlalchemy import Numeric, Text, case, func, literal, not_, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel
+
+from app.models import Event
+
+# <column>[.<key>...]<op><value>, e.g. `procedure_data.bp_systolic>140`
+# or `metadata_blob@>{"site": "QMH"}`.
+FILTER_PATTERN = re.compile(
+    r"^(?P<column>[a-z_]+)(?P<path>(?:\.[A-Za-z0-9_\-]+)*)"
+    r"(?P<op>@>|>=|<=|!=|=|>|<)(?P<value>.*)$"
+)
+
+# Field names allowed in expression index names.
+INDEXABLE_FIELD = re.compile(r"^[A-Za-z0-9_]{1,40}$")
+
+COMPARATORS = {
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+def json_field(column: Any, key: str) -> ColumnElement:
+    """
+    Returns `column -> 'key'` as JSONB.
+
+    Built with an explicit operator (not subscripting) so that expressions
+    used in queries match the expression indexes created below.
+    """
+    return column.op("->", return_type=JSONB)(literal(key, Text))
+
+
+def text_field(column: Any, path: Sequence[str]) -> ColumnElement:
+    """
+    Returns the text value at `path` (`->>` for one key, `#>>` for nested keys).
+
+    :param column: A JSONB column.
+    :param path: Sequence of object keys.
+    :return: SQL expression of type TEXT.
+    """
+    if len(path) == 1:
+        return column.op("->>", return_type=Text)(literal(path[0], Text))
+    return column.op("#>>", return_type=Text)(
+        literal("{" + ",".join(path) + "}", Text)
+    )
+
+
+def numeric_field(column: Any, path: Sequence[str]) -> ColumnElement:
+    """
+    Returns the numeric value at `path`, or NULL when the value is not a number.
+
+    The CASE guard avoids cast errors on rows whose value is a string.
+
+    :param column: A JSONB column.
+    :param path: Sequence of object keys.
+    :return: SQL expression of type NUMERIC.
+    """
+    if len(path) == 1:
+        value = json_field(column, path[0])
+    else:
+        value = column.op("#>", return_type=JSONB)(
+            literal("{" + ",".join(path) + "}", Text)
+        )
+    return case(
+        (func.jsonb_typeof(value) == literal("number", Text), text_field(column, path).cast(Numeric)),
+    )
+
+
+def _nest(path: Sequence[str], value: Any) -> Any:
+    """Wraps `value` in nested objects, e.g. (a, b), 1 -> {"a": {"b": 1}}."""
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def _parse_value(raw: str) -> Any:
+    """Parses a filter value as JSON, falling back to a plain string."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def parse_filter(model: Type[SQLModel], expression: str, allowed: Sequence[str]) -> ColumnElement:
+    """
+    Translates a single filter expression into a JSONB SQL condition.
+
+    Equality and `@>` use containment so they are served by the GIN
+    `jsonb_path_ops` indexes; range comparisons use `->>` expressions that
+    match the per-field expression indexes.
+
+    :param model: Model being listed.
+    :param expression: Filter such as `procedure_data.bp_systolic>140`.
+    :param allowed: Names of the JSONB columns that may be filtered.
+    :return: A SQLAlchemy boolean expression.
+    :raises HTTPException: 400 if the expression is malformed.
+    """
+    match = FILTER_PATTERN.match(expression)
+    if not match or match.group("column") not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {expression}")
+
+    column = getattr(model, match.group("column"))
+    path = [key for key in match.group("path").split(".") if key]
+    op = match.group("op")
+    value = _parse_value(match.group("value"))
+
+    if op == "@>":
+        if not isinstance(value, (dict, list)):
+            raise HTTPException(status_code=400, detail=f"Containment requires a JSON object: {expression}")
+        return column.contains(_nest(path, value))
+
+    if not path:
+        raise HTTPException(status_code=400, detail=f"Filter requires a field path: {expression}")
+
+    if op == "=":
+        return column.contains(_nest(path, value))
+    if op == "!=":
+        return not_(column.contains(_nest(path, value)))
+
+    compare = COMPARATORS[op]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return compare(numeric_field(column, path), value)
+    return compare(text_field(column, path), value if isinstance(value, str) else match.group("value"))
+
+
+def apply_filters(statement, model: Type[SQLModel], filters: List[str], allowed: Sequence[str]):
+    """
+    Adds parsed filter expressions (ANDed together) to a select statement.
+
+    :param statement: The select statement to narrow.
+    :param model: Model being listed.
+    :param filters: Raw filter expressions from the query string.
+    :param allowed: Names of the JSONB columns that may be filtered.
+    :return: The filtered statement.
+    """
+    for expression in filters:
+        statement = statement.where(parse_filter(model, expression, allowed))
+    return statement
+
+
+def field_index_ddl(field: Dict[str, Any]) -> Optional[str]:
+    """
+    Builds the CREATE INDEX statement for a form field marked `"indexed": true`.
+
+    :param field: Field definition from `form_data_schema["fields"]`.
+    :return: SQL text, or None if the field cannot be indexed.
+    """
+    name = field.get("name") or ""
+    if not field.get("indexed") or not INDEXABLE_FIELD.match(name):
+        return None
+
+    if field.get("type") == "number":
+        expression, suffix = numeric_field(Event.procedure_data, [name]), "num"
+    else:
+        expression, suffix = text_field(Event.procedure_data, [name]), "txt"
+
+    compiled = expression.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    # Index expressions may not be table-qualified
+    sql = str(compiled).replace("event.procedure_data", "procedure_data")
+    # Names are case-sensitive JSON keys; hash them so `BP` and `bp` get distinct indexes
+    digest = hashlib.sha1(f"{name}:{suffix}".encode()).hexdigest()[:16]
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_pd_{digest}_{suffix} "
+        f"ON event (({sql}))"
+    )
+
+
+def ensure_field_indexes(engine: Engine, form_data_schema: Dict[str, Any]) -> None:
+    """
+    Creates expression indexes for the indexed fields of a procedure's form.
+
+    Runs outside a transaction so the indexes can be built CONCURRENTLY
+    without blocking event writes. Intended to run as a background task.
+
+    :param engine: Database engine.
+    :param form_data_schema: The procedure's form schema.
+    """
+    fields = (form_data_schema or {}).get("fields") or []
+    statements = [ddl for ddl in map(field_index_ddl, fields) if ddl]
+    if not statements:
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for ddl in statements:
+            connection.execute(text(ddl))
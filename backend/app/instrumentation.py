@@ -0,0 +1,223 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Longest SQL text kept per query in slow-request logs
+MAX_LOGGED_STATEMENT = 500
+
+
+class RequestMetrics:
+    """SQL activity recorded while handling one request."""
+
+    def __init__(self):
+        self.queries: List[Tuple[str, float]] = []
+        self.query_time = 0.0
+        self.rows = 0
+
+    def record(self, statement: str, duration: float, rows: int) -> None:
+        self.queries.append((statement, duration))
+        self.query_time += duration
+        self.rows += max(rows, 0)
+
+
+# Set by the middleware; copied into the threadpool that runs sync endpoints
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    """Minimal thread-safe Prometheus histogram keyed by label values."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            # Per-bucket counts followed by the total count and sum
+            series = self._series.setdefault(label_values, [0.0] * (len(self.buckets) + 2))
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for label_values, series in items:
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound:g}"}} {cumulative:g}')
+            lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {series[-2]:g}')
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]:g}")
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:g}")
+        return lines
+
+
+class Counter:
+    """Minimal thread-safe Prometheus counter keyed by label values."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{{{_format_labels(self.labels, label_values)}}} {value:g}")
+        return lines
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Formats label pairs, escaping values per the exposition format."""
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+
+
+REQUEST_LATENCY = Histogram(
+    "cras_http_request_duration_seconds", "HTTP request latency by route.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "cras_http_request_db_queries", "SQL statements executed per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+QUERY_SECONDS = Counter(
+    "cras_db_query_seconds_total", "Time spent executing SQL, by route.", ("method", "route"),
+)
+QUERY_ROWS = Counter(
+    "cras_db_rows_total", "Rows returned or affected by SQL statements, by route.", ("method", "route"),
+)
+SLOW_REQUESTS = Counter(
+    "cras_http_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.", ("method", "route"),
+)
+METRICS = (REQUEST_LATENCY, REQUEST_QUERIES, QUERY_SECONDS, QUERY_ROWS, SLOW_REQUESTS)
+
+
+def render_metrics() -> str:
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    Metrics are kept per process; with several workers each one reports
+    its own series and Prometheus aggregates them.
+
+    :return: Exposition text for the `/metrics` endpoint.
+    """
+    lines: List[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.record(statement, duration, cursor.rowcount)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the next statement on this pooled connection pairs correctly
+    connection = exception_context.connection
+    if connection is not None and exception_context.execution_context is not None:
+        start_times = connection.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+
+
+def install_query_listeners() -> None:
+    """Times every SQL statement run by any engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware recording latency, SQL statement counts, SQL time and
+    rows per route, and logging requests slower than `slow_request_ms`
+    together with the statements they ran.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: int = 500):
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            self._observe(scope, status_code, time.perf_counter() - start, metrics)
+
+    def _observe(self, scope: Scope, status_code: int, duration: float, metrics: RequestMetrics) -> None:
+        # Use the route template (e.g. /studies/{study_id}) to bound cardinality
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        method = scope["method"]
+        REQUEST_LATENCY.observe(duration, method, route, str(status_code))
+        REQUEST_QUERIES.observe(len(metrics.queries), method, route)
+        QUERY_SECONDS.inc(metrics.query_time, method, route)
+        QUERY_ROWS.inc(metrics.rows, method, route)
+
+        if duration >= self.slow_request_seconds:
+            SLOW_REQUESTS.inc(1, method, route)
+            logger.warning(
+                "Slow request %s %s -> %s: %.1f ms, %d queries (%.1f ms SQL, %d rows)\n%s",
+                method, scope["path"], status_code, duration * 1000, len(metrics.queries),
+                metrics.query_time * 1000, metrics.rows,
+                "\n".join(
+                    f"  [{query_duration * 1000:.1f} ms] {statement[:MAX_LOGGED_STATEMENT]}"
+                    for statement, query_duration in metrics.queries
+                ),
+            )
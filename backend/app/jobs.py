@@ -0,0 +1,347 @@
+"""
+Background jobs.
+
+A job is a row in the `job` table. The API enqueues it (`POST /jobs`, or
+an endpoint such as `DELETE /studies/{id}`) and a worker process
+(`python -m app.worker`) claims it with `SELECT ... FOR UPDATE SKIP LOCKED`,
+so any number of workers share the queue without a broker. Handlers are
+registered per `kind` with `@job_handler` and report progress through
+`checkpoint`, which also commits their work and notices cancellation. If a
+job is reclaimed from a worker that stalled, the stalled worker's next
+checkpoint sees the new `claimed_by` and abandons its run.
+"""
+import csv
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, func, or_, tuple_, update
+from sqlmodel import Session, select
+
+from app.audit import log_change
+from app.database import get_settings
+from app.models import Event, Job, Procedure, Study
+from app.notifications import notify_event_changes
+
+logger = logging.getLogger(__name__)
+
+# Records soft-deleted per transaction, so row locks are held only briefly
+DELETE_BATCH_SIZE = 500
+
+# Events written per export chunk (one checkpoint each)
+EXPORT_CHUNK_SIZE = 1000
+
+# A study's dependent tables, in deletion order
+STUDY_DEPENDENTS = (Event, Procedure)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# `Session.info` key: job ID -> worker that claimed the job through that session
+CLAIMS_KEY = "job_claims"
+
+
+class JobCancelled(Exception):
+    """Raised by `checkpoint` when the job was cancelled while running."""
+
+
+class JobReclaimed(Exception):
+    """Raised by `checkpoint` when another worker has claimed the job since."""
+
+
+@dataclass
+class JobHandler:
+    run: Callable[[Session, Job], None]
+    submittable: bool = True  # May be submitted through POST /jobs
+    cancellable: bool = True  # May be stopped part-way
+
+
+# Job kind -> handler
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, submittable: bool = True, cancellable: bool = True):
+    """
+    Registers a function as the handler of a job kind.
+
+    The handler receives the session and the claimed job; it sets `total`,
+    `processed`, `result` and `result_location` on the job and calls
+    `checkpoint` after each unit of work. Returning marks the job completed,
+    raising marks it failed.
+
+    :param kind: Job kind, e.g. "export_study".
+    :param submittable: Whether clients may submit it through `POST /jobs`.
+    :param cancellable: Whether it may be cancelled while running.
+    """
+    def register(run: Callable[[Session, Job], None]):
+        JOB_HANDLERS[kind] = JobHandler(run, submittable, cancellable)
+        return run
+    return register
+
+
+def enqueue_job(session: Session, kind: str, params: Dict[str, Any], created_by: str) -> Job:
+    """
+    Adds a pending job; it runs once the caller commits.
+
+    :param session: Active database session.
+    :param kind: A registered job kind.
+    :param params: JSON-serializable handler parameters.
+    :param created_by: Email of the submitting user.
+    :return: The new job.
+    """
+    job = Job(kind=kind, params=params, created_by=created_by)
+    session.add(job)
+    return job
+
+
+def _lock_claim(session: Session, job: Job) -> bool:
+    """
+    Locks the job's row until the next commit, fencing off other workers.
+
+    Reclaiming skips locked rows, so a job cannot change hands between this
+    check and the commit that follows it.
+
+    :param session: Session the job was claimed through.
+    :param job: The running job.
+    :return: Whether a cancel was requested.
+    :raises JobReclaimed: If another worker has claimed the job since.
+    """
+    claimed_by, cancel_requested = session.exec(
+        select(Job.claimed_by, Job.cancel_requested).where(Job.id == job.id).with_for_update()
+    ).one()
+    if claimed_by != session.info.get(CLAIMS_KEY, {}).get(job.id):
+        raise JobReclaimed(claimed_by)
+    return cancel_requested
+
+
+def checkpoint(session: Session, job: Job) -> None:
+    """
+    Commits the handler's work together with the job's progress and
+    heartbeat, unless the job was reclaimed by another worker.
+
+    :param session: Active database session.
+    :param job: The running job.
+    :raises JobReclaimed: If another worker has claimed the job since; nothing is committed.
+    :raises JobCancelled: If a cancel was requested and the job's kind allows it.
+    """
+    job.heartbeat_at = datetime.utcnow()
+    session.add(job)
+    cancel_requested = _lock_claim(session, job)
+    session.commit()
+    if cancel_requested and JOB_HANDLERS[job.kind].cancellable:
+        raise JobCancelled()
+
+
+def claim_next_job(session: Session, worker: str) -> Optional[Job]:
+    """
+    Claims the oldest runnable job for this worker.
+
+    Pending jobs, and running jobs whose worker stopped sending heartbeats,
+    are selected with `FOR UPDATE SKIP LOCKED`: concurrent workers skip each
+    other's candidate rows instead of waiting, so each job is claimed once.
+
+    :param session: Active database session.
+    :param worker: Name of the claiming worker.
+    :return: The claimed (now running) job, or None if the queue is empty.
+    """
+    stale = datetime.utcnow() - timedelta(seconds=get_settings().JOB_STALE_SECONDS)
+    job = session.exec(
+        select(Job)
+        .where(
+            Job.kind.in_(JOB_HANDLERS),
+            or_(Job.status == "pending", and_(Job.status == "running", Job.heartbeat_at < stale)),
+        )
+        .order_by(Job.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        session.commit()
+        return None
+    if job.status == "running":
+        logger.warning("Reclaiming job %s from %s", job.id, job.claimed_by)
+    job.status = "running"
+    job.started_at = job.started_at or datetime.utcnow()
+    job.claimed_by = worker
+    job.heartbeat_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    session.info.setdefault(CLAIMS_KEY, {})[job.id] = worker
+    return job
+
+
+def run_job(session: Session, job: Job) -> None:
+    """
+    Runs a claimed job's handler and records how it ended.
+
+    A job reclaimed by another worker is left to that worker: the
+    uncommitted work is rolled back and the outcome is not recorded.
+
+    :param session: Session the job was claimed through.
+    :param job: A job returned by `claim_next_job`.
+    """
+    try:
+        try:
+            JOB_HANDLERS[job.kind].run(session, job)
+            job.status = "completed"
+        except JobReclaimed:
+            raise
+        except JobCancelled:
+            session.rollback()
+            job.status = "cancelled"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            session.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        session.add(job)
+        _lock_claim(session, job)
+        session.commit()
+    except JobReclaimed as e:
+        session.rollback()
+        logger.warning("Job %s was reclaimed by %s; abandoning this run", job.id, e)
+
+
+def result_path(location: str) -> str:
+    """Absolute path of a job's `result_location` under JOB_RESULTS_DIR."""
+    return os.path.join(os.path.abspath(get_settings().JOB_RESULTS_DIR), location)
+
+
+# --- Handlers ---
+
+def delete_study_batch(session: Session, model, study_id: uuid.UUID, job: Job, batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """
+    Soft-deletes up to `batch_size` active records of one dependent table.
+
+    The batch is one `UPDATE ... WHERE id IN (SELECT ... LIMIT n)` and is
+    audited as a single `CASCADE_DELETE` entry on the study listing the IDs.
+    Records keep the study's deletion time as `deleted_at` but get the
+    batch's own time as `updated_at`, so syncs that ran since the study was
+    deleted still pick them up. Deleted events are announced on the event
+    stream. Does not commit.
+
+    :param session: Active database session.
+    :param model: `Event` or `Procedure`.
+    :param study_id: The deleted study's ID.
+    :param job: The deletion job (supplies the user and deletion time).
+    :param batch_size: Maximum records per batch.
+    :return: Number of records deleted; 0 when none are left.
+    """
+    deleted_at = datetime.fromisoformat(job.params["deleted_at"])
+    batch = (
+        select(model.id)
+        .where(model.study_id == study_id, model.deleted_at.is_(None))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    statement = (
+        update(model)
+        .where(model.id.in_(batch))
+        .values(deleted_at=deleted_at, updated_at=datetime.utcnow(), updated_by=job.created_by, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if model is Event:
+        rows = session.execute(statement.returning(
+            Event.id, Event.ref_code, Event.study_id, Event.subject_id, Event.version,
+            Event.start_datetime, Event.updated_at,
+        )).all()
+        notify_event_changes(session, "delete", rows)
+    else:
+        rows = session.execute(statement.returning(model.id)).all()
+    if rows:
+        log_change(
+            session=session,
+            table_name=model.__tablename__,
+            record_id=study_id,
+            action="CASCADE_DELETE",
+            changed_by=job.created_by,
+            new_state={"study_id": str(study_id), "job_id": str(job.id), "ids": [str(row.id) for row in rows]}
+        )
+    return len(rows)
+
+
+@job_handler("delete_study", submittable=False, cancellable=False)
+def delete_study_records(session: Session, job: Job) -> None:
+    """
+    Soft-deletes the procedures and events of a study deleted through
+    `DELETE /studies/{id}`, one committed batch at a time.
+    Params: `study_id`, `deleted_at`.
+    """
+    study_id = uuid.UUID(job.params["study_id"])
+    job.total = sum(
+        session.exec(
+            select(func.count()).select_from(model).where(model.study_id == study_id, model.deleted_at.is_(None))
+        ).one()
+        for model in STUDY_DEPENDENTS
+    ) + job.processed  # Resumed after a worker crash
+    checkpoint(session, job)
+
+    for model in STUDY_DEPENDENTS:
+        while True:
+            count = delete_study_batch(session, model, study_id, job, DELETE_BATCH_SIZE)
+            if not count:
+                break
+            job.processed += count
+            job.result = {**job.result, model.__tablename__: job.result.get(model.__tablename__, 0) + count}
+            checkpoint(session, job)
+
+
+EXPORT_COLUMNS = (
+    "id", "ref_code", "subject_id", "procedure_id", "start_datetime", "end_datetime",
+    "status", "notes", "procedure_data", "metadata_blob",
+)
+
+
+@job_handler("export_study")
+def export_study(session: Session, job: Job) -> None:
+    """
+    Writes a study's events to a CSV file (JSONB columns as JSON text),
+    read in chunks so memory stays flat for large studies.
+    Params: `study_id`.
+    """
+    study_id = uuid.UUID(job.params["study_id"])
+    if session.get(Study, study_id) is None:
+        raise ValueError(f"Study {study_id} not found")
+    job.total = session.exec(select(func.count()).select_from(Event).where(Event.study_id == study_id)).one()
+    job.processed = 0
+    checkpoint(session, job)
+
+    location = f"{job.id}.csv"
+    path = result_path(location)
+    # Written under a name of its own: a worker that reclaims this job writes a separate file
+    partial = f"{path}.{uuid.uuid4().hex}.part"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = [getattr(Event, column) for column in EXPORT_COLUMNS]
+    try:
+        with open(partial, "w", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(EXPORT_COLUMNS)
+            # Keyset pages rather than one cursor: checkpoints commit between chunks
+            after = None
+            while True:
+                statement = select(*columns).where(Event.study_id == study_id)
+                if after is not None:
+                    statement = statement.where(tuple_(Event.start_datetime, Event.id) > after)
+                chunk = session.exec(
+                    statement.order_by(Event.start_datetime, Event.id).limit(EXPORT_CHUNK_SIZE)
+                ).all()
+                if not chunk:
+                    break
+                writer.writerows(
+                    [json.dumps(value) if isinstance(value, dict) else value for value in row]
+                    for row in chunk
+                )
+                after = (chunk[-1].start_datetime, chunk[-1].id)
+                job.processed += len(chunk)
+                checkpoint(session, job)
+        os.replace(partial, path)
+    except BaseException:
+        os.remove(partial)
+        raise
+
+    job.result_location = location
+    job.result = {"rows": job.processed, "format": "csv"}
@@ -0,0 +1,253 @@
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Text, case, func, literal
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.filters import json_field
+
+MERGE_PATCH_MEDIA_TYPE = "application/merge-patch+json"
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+
+# JSON Patch operations that can be applied with jsonb_set / jsonb_insert / #-
+SUPPORTED_OPERATIONS = ("add", "replace", "remove", "test")
+
+# Key of an audit delta listing the pointers absent from the document (pointers start with "/")
+REMOVED = "removed"
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    Splits a JSON Pointer (RFC 6901) into its unescaped reference tokens.
+
+    :param pointer: Pointer such as `/procedure_data/visit~1date`.
+    :return: List of tokens, e.g. `["procedure_data", "visit/date"]`.
+    :raises HTTPException: 400 if the pointer does not start with `/`.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise HTTPException(status_code=400, detail=f"Invalid JSON pointer: {pointer}")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def to_pointer(tokens: Sequence[str]) -> str:
+    """Joins tokens into an escaped JSON Pointer."""
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+
+def jsonb_value(value: Any) -> ColumnElement:
+    """Returns a JSON value as a JSONB literal parameter."""
+    return literal(json.dumps(value), Text).cast(JSONB)
+
+
+def jsonb_path(tokens: Sequence[str]) -> ColumnElement:
+    """Returns a `text[]` path for `#>`, `#-` and `jsonb_set`."""
+    return array([literal(token, Text) for token in tokens])
+
+
+def get_path(column: Any, tokens: Sequence[str]) -> ColumnElement:
+    """Returns `column #> path` (the JSONB value at `tokens`, or NULL)."""
+    return column.op("#>", return_type=JSONB)(jsonb_path(tokens))
+
+
+def _as_object(value: Any) -> ColumnElement:
+    """Returns `value` if it is a JSON object, else an empty object."""
+    return case(
+        (func.jsonb_typeof(value) == literal("object", Text), value),
+        else_=jsonb_value({}),
+    )
+
+
+def merge_patch_expression(target: Any, patch: Dict[str, Any]) -> ColumnElement:
+    """
+    Translates a JSON Merge Patch (RFC 7396) into a single SQL expression.
+
+    Keys set to null are removed with `-`; other keys are merged with `||`.
+    Nested objects are merged recursively against the matching sub-object
+    of the *original* value, so the expression grows linearly with the patch.
+
+    :param target: The JSONB column (or sub-expression) being patched.
+    :param patch: The merge patch object.
+    :return: SQL expression evaluating to the patched JSONB value.
+    """
+    pairs: List[Any] = []
+    removed: List[str] = []
+    for key, value in patch.items():
+        if value is None:
+            removed.append(key)
+        elif isinstance(value, dict):
+            pairs += [literal(key, Text), merge_patch_expression(json_field(target, key), value)]
+        else:
+            pairs += [literal(key, Text), jsonb_value(value)]
+
+    expression = _as_object(target)
+    if pairs:
+        expression = expression.op("||", return_type=JSONB)(
+            func.jsonb_build_object(*pairs, type_=JSONB)
+        )
+    for key in removed:
+        expression = expression.op("-", return_type=JSONB)(literal(key, Text))
+    return expression
+
+
+def json_patch_expression(
+    column: Any, operations: Sequence[Dict[str, Any]]
+) -> Tuple[ColumnElement, List[ColumnElement]]:
+    """
+    Translates JSON Patch (RFC 6902) operations into a SQL expression.
+
+    `add`/`replace` use `jsonb_set` (a trailing `-` token appends to an array
+    with `jsonb_insert`), `remove` uses `#-`. `test` operations become
+    conditions for the UPDATE's WHERE clause, evaluated against the value
+    produced by the preceding operations. As with `jsonb_set`, adding below a
+    missing parent is a no-op rather than an error.
+
+    :param column: The JSONB column being patched.
+    :param operations: Operations whose paths are relative to the column.
+    :return: Tuple of (patched value expression, test conditions).
+    :raises HTTPException: 400 for unsupported or malformed operations.
+    """
+    expression = column
+    conditions = []
+    for operation in operations:
+        op = operation.get("op")
+        tokens = parse_pointer(operation.get("path", ""))
+        if op not in SUPPORTED_OPERATIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported patch operation: {op}")
+        if op != "remove" and "value" not in operation:
+            raise HTTPException(status_code=400, detail=f"Patch operation '{op}' requires a value")
+
+        if op == "test":
+            conditions.append(get_path(expression, tokens) == jsonb_value(operation["value"]))
+        elif not tokens:
+            # Whole-column operations
+            expression = jsonb_value({} if op == "remove" else operation["value"])
+        elif op == "remove":
+            expression = expression.op("#-", return_type=JSONB)(jsonb_path(tokens))
+        elif op == "add" and tokens[-1] == "-":
+            expression = func.jsonb_insert(
+                expression, jsonb_path([*tokens[:-1], "-1"]), jsonb_value(operation["value"]), True,
+                type_=JSONB,
+            )
+        else:
+            expression = func.jsonb_set(
+                expression, jsonb_path(tokens), jsonb_value(operation["value"]), True,
+                type_=JSONB,
+            )
+    return expression, conditions
+
+
+def compile_document_patch(
+    model: Any, allowed: Sequence[str], body: Any, media_type: str
+) -> Tuple[Dict[str, ColumnElement], List[ColumnElement], List[List[str]]]:
+    """
+    Compiles a patch of a record's JSONB columns into UPDATE values.
+
+    Merge patches look like `{"procedure_data": {...}}`; JSON Patch paths
+    start with the column, e.g. `/procedure_data/bp_systolic`.
+
+    :param model: Model being patched.
+    :param allowed: Names of the JSONB columns that may be patched.
+    :param body: Parsed request body.
+    :param media_type: `application/json-patch+json` selects JSON Patch;
+        anything else is treated as a merge patch.
+    :return: Tuple of (column values, test conditions, touched paths), where
+        each path is a token list starting with the column name.
+    :raises HTTPException: 400 if the patch is malformed or touches other columns.
+    """
+    values: Dict[str, ColumnElement] = {}
+    conditions: List[ColumnElement] = []
+    touched: List[List[str]] = []
+
+    if media_type == JSON_PATCH_MEDIA_TYPE:
+        if not isinstance(body, list) or not all(isinstance(op, dict) for op in body):
+            raise HTTPException(status_code=400, detail="JSON Patch body must be an array of operations")
+        by_column: Dict[str, List[Dict[str, Any]]] = {}
+        for operation in body:
+            tokens = parse_pointer(operation.get("path", ""))
+            if not tokens or tokens[0] not in allowed:
+                raise HTTPException(status_code=400, detail=f"Cannot patch path: {operation.get('path')}")
+            by_column.setdefault(tokens[0], []).append({**operation, "path": to_pointer(tokens[1:])})
+            if operation.get("op") != "test":
+                # Appends touch the array itself
+                touched.append(tokens[:-1] if tokens[-1] == "-" else tokens)
+        for name, operations in by_column.items():
+            values[name], tests = json_patch_expression(getattr(model, name), operations)
+            conditions += tests
+    else:
+        if not isinstance(body, dict) or not body:
+            raise HTTPException(status_code=400, detail="Merge patch body must be a non-empty object")
+        for name, patch in body.items():
+            if name not in allowed or not isinstance(patch, dict):
+                raise HTTPException(status_code=400, detail=f"Cannot merge-patch field: {name}")
+            values[name] = merge_patch_expression(getattr(model, name), patch)
+            touched += [[name, key] for key in patch]
+
+    # Drop duplicate paths while keeping their order
+    unique = list({to_pointer(tokens): tokens for tokens in touched}.values())
+    return values, conditions, unique
+
+
+def path_delta(pointers: Sequence[str], values: Sequence[Any], missing: Sequence[bool]) -> Dict[str, Any]:
+    """
+    Builds an audit delta for the touched paths of a PATCH.
+
+    Present paths map to their value (None meaning JSON null); absent paths
+    are listed under `REMOVED`, so a removal is not mistaken for a null.
+
+    :param pointers: JSON Pointers of the touched paths.
+    :param values: Each path's value.
+    :param missing: Whether each path is absent from the document.
+    :return: The delta, e.g. `{"/procedure_data/bp": 125, "removed": ["/procedure_data/note"]}`.
+    """
+    delta: Dict[str, Any] = {pointer: value for pointer, value, absent in zip(pointers, values, missing) if not absent}
+    removed = [pointer for pointer, absent in zip(pointers, missing) if absent]
+    if removed:
+        delta[REMOVED] = removed
+    return delta
+
+
+def apply_delta(document: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Applies an audited PATCH delta (see `path_delta`) to a record state.
+
+    Pointers are set to their values (None sets JSON null), then the
+    pointers listed under `REMOVED` are deleted.
+
+    :param document: Record state, e.g. an audit `new_state` snapshot.
+    :param delta: Mapping of JSON Pointers to their new values.
+    :return: A new dictionary with the delta applied.
+    """
+    result = json.loads(json.dumps(document))
+    for pointer, value in delta.items():
+        if pointer != REMOVED:
+            _apply_pointer(result, pointer, value, remove=False)
+    for pointer in delta.get(REMOVED, []):
+        _apply_pointer(result, pointer, None, remove=True)
+    return result
+
+
+def _apply_pointer(document: Dict[str, Any], pointer: str, value: Any, remove: bool) -> None:
+    """Sets (or removes) the value at a JSON Pointer in place."""
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return
+    parent = document
+    for token in tokens[:-1]:
+        if isinstance(parent, list):
+            parent = parent[int(token)]
+        else:
+            parent = parent.setdefault(token, {})
+    last = tokens[-1]
+    if isinstance(parent, list):
+        if remove:
+            parent.pop(int(last))
+        else:
+            parent[int(last)] = value
+    elif remove:
+        parent.pop(last, None)
+    else:
+        parent[last] = value
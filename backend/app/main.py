@@ -1,9 +1,16 @@
+import logging
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlalchemy.orm.exc import StaleDataError
 from sqlmodel import Session, select
-from app.database import get_session, engine
+from app.database import get_engine, get_session, get_settings
+from app.compression import CompressionMiddleware
+from app.instrumentation import InstrumentationMiddleware, install_query_listeners, render_metrics
+from app.notifications import broadcaster
 from app.models import User, Study
 from app.auth import (
     authenticate_user, 
@@ -14,13 +21,30 @@ from app.auth import (
 )
 
 import os
-from app.routers import studies, subjects, procedures, events, settings, users, auth_google, auth_mfa
+from app.routers import studies, subjects, procedures, events, settings, users, lookup, sync, health, jobs
+
+app_settings = get_settings()
+
+logging.basicConfig(
+    level=app_settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created per worker at startup rather than at import (and before forking)
+    get_engine()
+    yield
+    # Close the LISTEN connection behind GET /events/stream
+    broadcaster.stop()
 
 app = FastAPI(
     title="Clinical Research Management System (CRAS)",
     description="FDA Part 11 Compliant Research Management Platform",
     version="0.1.0",
-    root_path=os.getenv("CRAS_API_ROOT_PATH", "")
+    root_path=os.getenv("CRAS_API_ROOT_PATH", ""),
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -30,8 +54,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
+)
+
+# Response compression for large JSON lists (see Settings.COMPRESSION_*)
+app.add_middleware(
+    CompressionMiddleware,
+    encodings=[e.strip() for e in app_settings.COMPRESSION_ENCODINGS.split(",") if e.strip()],
+    minimum_size=app_settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=app_settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=app_settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=app_settings.COMPRESSION_ZSTD_LEVEL,
 )
 
+# Per-route latency / SQL metrics; outermost so it also times compression
+install_query_listeners()
+app.add_middleware(InstrumentationMiddleware, slow_request_ms=app_settings.SLOW_REQUEST_MS)
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request, exc):
+    """A concurrent write bumped the row's version between our read and UPDATE."""
+    return ORJSONResponse(
+        status_code=409,
+        content={"detail": "Record was modified by another user; reload and retry"},
+    )
+
 # Login endpoint
 @app.post("/auth/login")
 async def login_for_access_token(
@@ -48,6 +95,9 @@ async def login_for_access_token(
     
     # Check if MFA is enabled
     if user.mfa_enabled:
+        if not app_settings.ENABLE_MFA:
+            # Never skip the second factor; the verify endpoint is not mounted
+            raise HTTPException(status_code=503, detail="MFA is disabled on this server")
         # Issue a temporary token meant ONLY for MFA verification
         # Shorter expiry (5 mins)
         mfa_token_expires = timedelta(minutes=5)
@@ -79,8 +129,24 @@ app.include_router(procedures.router)
 app.include_router(events.router)
 app.include_router(settings.router)
 app.include_router(users.router)
-app.include_router(auth_google.router)
-app.include_router(auth_mfa.router)
+app.include_router(lookup.router)
+app.include_router(sync.router)
+app.include_router(health.router)
+app.include_router(jobs.router)
+
+# Optional integrations are only imported when enabled
+if app_settings.ENABLE_GOOGLE_AUTH:
+    from app.routers import auth_google
+    app.include_router(auth_google.router)
+if app_settings.ENABLE_MFA:
+    from app.routers import auth_mfa
+    app.include_router(auth_mfa.router)
+
+if app_settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint (per-process metrics)."""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
@@ -2,6 +2,8 @@ import uuid
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index, Text, and_, event, func, literal, literal_column
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
 from sqlalchemy.dialects.postgresql import JSONB
 from app.utils import (
     uuid7, 
@@ -13,6 +15,20 @@ from app.utils import (
     generate_user_code
 )
 
+def jsonb_path_index(table_name: str, column_name: str) -> Index:
+    """
+    Declares a GIN `jsonb_path_ops` index supporting `@>` containment queries.
+    """
+    return Index(
+        f"ix_{table_name}_{column_name}_gin",
+        column_name,
+        postgresql_using="gin",
+        postgresql_ops={column_name: "jsonb_path_ops"},
+    )
+
+# Partial-index predicate: index only rows that are not soft-deleted
+NOT_DELETED = literal_column("deleted_at IS NULL")
+
 # --- Base Model ---
 class BaseModel(SQLModel):
     """
@@ -27,8 +43,17 @@ class BaseModel(SQLModel):
     )
     created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
     created_by: Optional[str] = Field(default=None)
-    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    # Indexed for incremental sync (GET /sync) and list ETags
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow, index=True)
     updated_by: Optional[str] = Field(default=None)
+    # Optimistic locking: UPDATEs check and bump this, raising StaleDataError on conflict
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    # Soft delete: set instead of deleting the row (see _exclude_deleted)
+    deleted_at: Optional[datetime] = Field(default=None)
+    
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"version_id_col": cls.__table__.c.version}
 
 # --- Join Table for Study/Subject M2M ---
 class StudySubjectLink(SQLModel, table=True):
@@ -36,7 +61,8 @@ class StudySubjectLink(SQLModel, table=True):
     Many-to-many relationship between Studies and Subjects.
     """
     study_id: uuid.UUID = Field(foreign_key="study.id", primary_key=True)
-    subject_id: uuid.UUID = Field(foreign_key="subject.id", primary_key=True)
+    # Second PK column: needs its own index for subject -> studies lookups
+    subject_id: uuid.UUID = Field(foreign_key="subject.id", primary_key=True, index=True)
     joined_at: datetime = Field(default_factory=datetime.utcnow)
 
 # --- Join Table for Study/User Access ---
@@ -45,7 +71,7 @@ class StudyUserAccess(SQLModel, table=True):
     Many-to-many mapping for User access to specific Studies.
     """
     study_id: uuid.UUID = Field(foreign_key="study.id", primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True, index=True)
     access_level: int = Field(default=1)  # 1=Read, 2=CRUD
 
 # --- Entity Models ---
@@ -77,6 +103,8 @@ class Study(BaseModel, table=True):
     """
     A clinical research project.
     """
+    __table_args__ = (jsonb_path_index("study", "metadata_blob"),)
+
     title: str
     description: Optional[str] = None
     principal_investigator: str
@@ -111,10 +139,43 @@ class Subject(BaseModel, table=True):
     studies: List["Study"] = Relationship(back_populates="subjects", link_model=StudySubjectLink)
     events: List["Event"] = Relationship(back_populates="subject")
 
+def subject_search_document():
+    """
+    Lower-cased concatenation of the searchable Subject fields.
+    
+    Shared by the trigram index below and the search query so that the
+    planner can match the indexed expression.
+    """
+    parts = [
+        Subject.lastname,
+        Subject.firstname,
+        func.coalesce(Subject.middlename, literal("", Text)),
+        func.coalesce(Subject.email, literal("", Text)),
+        func.coalesce(Subject.phone, literal("", Text)),
+        func.coalesce(Subject.ref_code, literal("", Text)),
+    ]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op("||")(literal(" ", Text)).op("||")(part)
+    return func.lower(document)
+
+Index(
+    "ix_subject_search_trgm",
+    subject_search_document().label("search_document"),
+    postgresql_using="gin",
+    postgresql_ops={"search_document": "gin_trgm_ops"},
+    postgresql_where=NOT_DELETED,
+)
+
 class Procedure(BaseModel, table=True):
     """
     Protocol definitions with dynamic schemas.
     """
+    __table_args__ = (
+        jsonb_path_index("procedure", "metadata_blob"),
+        Index("ix_procedure_study_id", "study_id", postgresql_where=NOT_DELETED),
+    )
+
     study_id: uuid.UUID = Field(foreign_key="study.id")
     name: str  
     ref_code: str = Field(default_factory=generate_procedure_code, unique=True, index=True)
@@ -131,9 +192,19 @@ class Event(BaseModel, table=True):
     """
     Transactional record of a procedure performed on a subject.
     """
+    __table_args__ = (
+        jsonb_path_index("event", "procedure_data"),
+        jsonb_path_index("event", "metadata_blob"),
+        # Timeline indexes: serve keyset paging on (start_datetime, id)
+        Index("ix_event_subject_id_start_datetime", "subject_id", "start_datetime", "id", postgresql_where=NOT_DELETED),
+        Index("ix_event_study_id_start_datetime", "study_id", "start_datetime", "id", postgresql_where=NOT_DELETED),
+        # Date-range queries across studies (calendar, aggregates)
+        Index("ix_event_start_datetime", "start_datetime", postgresql_where=NOT_DELETED),
+    )
+
     study_id: uuid.UUID = Field(foreign_key="study.id")
     subject_id: uuid.UUID = Field(foreign_key="subject.id")
-    procedure_id: uuid.UUID = Field(foreign_key="procedure.id")
+    procedure_id: uuid.UUID = Field(foreign_key="procedure.id", index=True)
     
     start_datetime: datetime
     end_datetime: Optional[datetime] = None
@@ -150,6 +221,92 @@ class Event(BaseModel, table=True):
     subject: Optional[Subject] = Relationship(back_populates="events")
     procedure: Optional[Procedure] = Relationship(back_populates="events")
 
+# Events without an end time are treated as lasting this long when checking overlaps
+DEFAULT_EVENT_DURATION = "interval '1 hour'"
+
+# metadata_blob key naming a shared resource (room, scanner, ...) an event books
+RESOURCE_KEY = "resource"
+
+def event_period(model=Event):
+    """
+    The `[start, end)` time range an event occupies, as a `tsrange`.
+    
+    Shared by the GiST indexes below and the conflict queries (app.scheduling)
+    so that the planner can match the indexed expression. Events with an end
+    before their start get an empty range instead of failing the index.
+    
+    :param model: `Event` or an alias of it.
+    """
+    end = func.coalesce(model.end_datetime, model.start_datetime + literal_column(DEFAULT_EVENT_DURATION))
+    return func.tsrange(model.start_datetime, func.greatest(model.start_datetime, end))
+
+def event_resource(model=Event):
+    """The resource named in an event's `metadata_blob`, as text."""
+    return model.metadata_blob[RESOURCE_KEY].astext
+
+# Overlap lookups per subject and per resource (GiST on uuid/text needs btree_gist)
+Index(
+    "ix_event_subject_period",
+    Event.subject_id,
+    event_period(),
+    postgresql_using="gist",
+    postgresql_where=Event.deleted_at.is_(None),
+)
+Index(
+    "ix_event_resource_period",
+    event_resource(),
+    event_period(),
+    postgresql_using="gist",
+    postgresql_where=and_(Event.metadata_blob.has_key(RESOURCE_KEY), Event.deleted_at.is_(None)),
+)
+
+# --- Study Dashboard Counters ---
+
+class StudyStat(SQLModel, table=True):
+    """
+    Incrementally maintained counters behind `GET /studies/{id}/stats`.
+    
+    One row per (study, dimension, key), e.g. ("status", "completed") or
+    ("week", "2026-01-05"); see app.stats for the dimensions.
+    """
+    study_id: uuid.UUID = Field(foreign_key="study.id", primary_key=True, ondelete="CASCADE")
+    dimension: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+# --- Background Jobs ---
+
+class Job(SQLModel, table=True):
+    """
+    A long-running operation run by a worker process (`python -m app.worker`,
+    handlers in app.jobs), submitted and polled through `/jobs`.
+    """
+    __table_args__ = (
+        # Queue order for workers claiming pending jobs
+        Index("ix_job_pending", "created_at", postgresql_where=literal_column("status = 'pending'")),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    kind: str  # delete_study, export_study
+    status: str = Field(default="pending")  # pending, running, completed, failed, cancelled
+    params: Dict[str, Any] = Field(default={}, sa_type=JSONB)
+    
+    # Progress: records processed out of the total counted when the job started
+    total: int = Field(default=0)
+    processed: int = Field(default=0)
+    result: Dict[str, Any] = Field(default={}, sa_type=JSONB)
+    result_location: Optional[str] = None  # Output file under JOB_RESULTS_DIR
+    error: Optional[str] = None
+    cancel_requested: bool = Field(default=False)
+    
+    created_by: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Worker running the job and its last sign of life
+    claimed_by: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+
 # --- Audit Log (FDA Part 11) ---
 
 class AuditLog(SQLModel, table=True):
@@ -176,3 +333,31 @@ class SystemSetting(BaseModel, table=True):
     value: str
     description: Optional[str] = None
     category: str = Field(default="General")
+
+# --- Soft Delete ---
+
+# Execution option letting a query see soft-deleted rows, e.g.
+# `select(Event).execution_options(include_deleted=True)`
+INCLUDE_DELETED = "include_deleted"
+
+# One criterion per table model (a criterion on the BaseModel mixin cannot
+# reference its columns)
+NOT_DELETED_CRITERIA = tuple(
+    with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+    for model in (User, Study, Subject, Procedure, Event, SystemSetting)
+)
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted(execute_state):
+    """
+    Adds `deleted_at IS NULL` for every `BaseModel` entity (including joins,
+    aliases and relationship loads) to ORM SELECTs, so soft-deleted rows are
+    left out of lists, gets and lookups by default and the partial
+    `WHERE deleted_at IS NULL` indexes apply. Refreshing an already loaded object is not filtered.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.execution_options.get(INCLUDE_DELETED, False)
+    ):
+        execute_state.statement = execute_state.statement.options(*NOT_DELETED_CRITERIA)
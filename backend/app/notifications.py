@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import select as selectors
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel carrying event changes
+EVENT_CHANNEL = "cras_event_changes"
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+# Pending messages per subscriber before it is told to resynchronize
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Seconds between LISTEN connection attempts after a failure
+RECONNECT_SECONDS = 5.0
+
+# Seconds between keep-alive comments on idle streams (below typical proxy timeouts)
+HEARTBEAT_SECONDS = 15.0
+
+# Sent to subscribers that may have missed messages; clients reload their window
+RESET = {"action": "reset"}
+
+
+def notify_event_changes(session: Session, action: str, events: Iterable) -> None:
+    """
+    Queues change notifications for events in the caller's transaction.
+
+    NOTIFY is transactional: listeners receive the messages only if and when
+    the transaction commits, so a rolled-back write is never announced.
+    Events are batched per study into messages of the form
+    `{"action", "study_id", "events": [...]}`, split so each stays under
+    the NOTIFY payload limit, and all are sent with a single
+    `SELECT pg_notify(...) FROM unnest(...)`. Each entry carries IDs,
+    version and timestamps only; clients fetch the events themselves
+    (e.g. via `/sync` from the oldest `updated_at`) if they need them.
+
+    :param session: Active database session.
+    :param action: "create", "update" or "delete".
+    :param events: Events (or rows with id, ref_code, study_id, subject_id,
+        version, start_datetime and updated_at) that changed.
+    """
+    by_study: Dict[str, List[str]] = {}
+    for event in events:
+        by_study.setdefault(str(event.study_id), []).append(json.dumps({
+            "id": str(event.id),
+            "ref_code": event.ref_code,
+            "subject_id": str(event.subject_id),
+            "version": event.version,
+            "start_datetime": event.start_datetime.isoformat(),
+            "updated_at": event.updated_at.isoformat(),
+        }))
+    payloads = [
+        payload
+        for study_id, entries in by_study.items()
+        for payload in _batch_payloads(action, study_id, entries)
+    ]
+    if not payloads:
+        return
+    payload = func.unnest(array(payloads)).column_valued("payload")
+    session.exec(select(func.pg_notify(EVENT_CHANNEL, payload)))
+
+
+def _batch_payloads(action: str, study_id: str, entries: List[str]) -> List[str]:
+    """
+    Packs JSON-encoded event entries into as few messages as fit `MAX_PAYLOAD_BYTES`.
+
+    :param action: The change action.
+    :param study_id: Study shared by all entries (used to filter subscribers).
+    :param entries: JSON-encoded entries, each far below the limit.
+    :return: JSON payloads.
+    """
+    head = f'{{"action": {json.dumps(action)}, "study_id": {json.dumps(study_id)}, "events": ['
+    payloads, batch, size = [], [], len(head) + 2
+    for entry in entries:
+        if batch and size + len(entry) + 2 > MAX_PAYLOAD_BYTES:
+            payloads.append(head + ", ".join(batch) + "]}")
+            batch, size = [], len(head) + 2
+        batch.append(entry)
+        size += len(entry) + 2
+    if batch:
+        payloads.append(head + ", ".join(batch) + "]}")
+    return payloads
+
+
+@dataclass(eq=False)
+class Subscriber:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    study_id: Optional[str] = None
+
+
+class EventBroadcaster:
+    """
+    Fans Postgres notifications out to the SSE streams of this process.
+
+    One background thread per worker process holds a dedicated connection
+    that LISTENs on `EVENT_CHANNEL`; every uvicorn/gunicorn worker runs its
+    own, so a change committed through any worker reaches all streams. The
+    thread starts with the first subscriber and hands each message to the
+    subscribers' asyncio queues via `call_soon_threadsafe`. Without an
+    explicit engine it uses the application's, resolved when it starts.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self._engine = engine
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def subscribe(self, study_id: Optional[uuid.UUID] = None) -> Subscriber:
+        """
+        Registers a stream; call from the event loop that will read the queue.
+
+        :param study_id: Only deliver changes to events of this study.
+        :return: The subscriber; pass it to `unsubscribe` when the stream ends.
+        """
+        subscriber = Subscriber(
+            loop=asyncio.get_running_loop(),
+            queue=asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE),
+            study_id=str(study_id) if study_id else None,
+        )
+        with self._lock:
+            self._subscribers[id(subscriber)] = subscriber
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._listen, name="event-broadcaster", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.pop(id(subscriber), None)
+
+    def stop(self) -> None:
+        """Stops the listener thread (on application shutdown)."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=RECONNECT_SECONDS + 1)
+            self._thread = None
+
+    def publish(self, message: dict) -> None:
+        """Delivers a message to every matching subscriber (thread-safe)."""
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            if message is RESET or subscriber.study_id in (None, message.get("study_id")):
+                try:
+                    subscriber.loop.call_soon_threadsafe(_offer, subscriber.queue, message)
+                except RuntimeError:  # Event loop already closed
+                    self.unsubscribe(subscriber)
+
+    def _listen(self) -> None:
+        first_attempt = True
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                # Detached from the pool: this connection is held for the process lifetime
+                connection = (self._engine or get_engine()).raw_connection()
+                dbapi_connection = connection.driver_connection
+                connection.detach()
+                dbapi_connection.autocommit = True
+                dbapi_connection.cursor().execute(f"LISTEN {EVENT_CHANNEL}")
+                if not first_attempt:
+                    # Messages sent while disconnected are lost
+                    self.publish(RESET)
+                first_attempt = False
+                while not self._stopping.is_set():
+                    if selectors.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notification = dbapi_connection.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notification.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed notification: %r", notification.payload)
+            except Exception:
+                first_attempt = False
+                logger.exception("Event listener connection failed; retrying in %.0fs", RECONNECT_SECONDS)
+                self._stopping.wait(RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+def _offer(queue: asyncio.Queue, message: dict) -> None:
+    """Queues a message; a subscriber that fell behind gets a reset instead."""
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESET)
+
+
+def format_sse(message: dict, event: Optional[str] = None) -> str:
+    """
+    Formats one Server-Sent Events message.
+
+    :param message: JSON-serializable data.
+    :param event: SSE event name (defaults to the message's action).
+    :return: The message text, terminated by a blank line.
+    """
+    return f"event: {event or message.get('action', 'message')}\ndata: {json.dumps(message)}\n\n"
+
+
+broadcaster = EventBroadcaster()
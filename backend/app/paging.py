@@ -0,0 +1,78 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlmodel import Session
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(start_datetime: datetime, record_id: uuid.UUID) -> str:
+    """
+    Encodes the sort key of the last row on a page as an opaque cursor.
+
+    :param start_datetime: The row's sort timestamp.
+    :param record_id: The row's ID (tie-breaker for equal timestamps).
+    :return: URL-safe cursor string.
+    """
+    raw = f"{start_datetime.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    :param cursor: The cursor from a previous page.
+    :return: Tuple of (timestamp, ID).
+    :raises HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, record_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    session: Session,
+    statement,
+    sort_columns: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetches one page of rows ordered by `(timestamp, id)` using keyset paging.
+
+    The cursor condition is a row comparison, e.g.
+    `(start_datetime, id) > (:ts, :id)`, so with a matching composite index
+    each page is a single index range scan regardless of its offset.
+
+    :param session: Active database session.
+    :param statement: Select statement with the list's filters applied.
+    :param sort_columns: The (timestamp, id) columns to order by.
+    :param limit: Maximum rows to return.
+    :param cursor: Cursor returned with the previous page, if any.
+    :param descending: Newest first instead of oldest first.
+    :return: Tuple of (rows, cursor for the next page or None).
+    """
+    key = tuple_(*sort_columns)
+    if cursor:
+        position = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < position if descending else key > position)
+    order = [column.desc() if descending else column.asc() for column in sort_columns]
+    rows = session.exec(statement.order_by(*order).limit(limit + 1)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(*(getattr(last, column.key) for column in sort_columns))
@@ -0,0 +1,92 @@
+from typing import List, Type
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+
+from app.models import INCLUDE_DELETED
+from app.utils import REF_CODE_PREFIXES, generate_short_codes
+
+# Table name -> ref code prefix, e.g. "event" -> "ev-"
+PREFIX_BY_TABLE = {entity: prefix for prefix, entity in REF_CODE_PREFIXES.items()}
+
+# Retries before giving up; with 32^6 codes a second round is already rare
+MAX_ALLOCATION_ROUNDS = 5
+
+
+class RefCodeAllocationError(HTTPException):
+    """Raised when unique ref codes could not be allocated (503; the client may retry)."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=503, detail=detail)
+
+
+def allocate_ref_codes(session: Session, model: Type[SQLModel], count: int) -> List[str]:
+    """
+    Allocates `count` ref codes that are unused in the model's table.
+
+    Each round generates the missing codes (distinct within the batch) and
+    checks them against the unique `ref_code` index with a single `IN`
+    query; only colliding codes are regenerated in the next round.
+
+    :param session: Active database session.
+    :param model: Table model with a `ref_code` column (e.g. `Event`).
+    :param count: Number of codes needed.
+    :return: A list of `count` unused, distinct codes.
+    :raises RefCodeAllocationError: If collisions persist after all rounds.
+    """
+    prefix = PREFIX_BY_TABLE[model.__tablename__]
+    allocated: List[str] = []
+    rejected: set = set()
+
+    for _ in range(MAX_ALLOCATION_ROUNDS):
+        missing = count - len(allocated)
+        if missing <= 0:
+            break
+        candidates = generate_short_codes(missing, prefix=prefix, exclude=rejected.union(allocated))
+        # Soft-deleted rows keep their codes
+        taken = set(session.exec(
+            select(model.ref_code).where(model.ref_code.in_(candidates)).execution_options(**{INCLUDE_DELETED: True})
+        ).all())
+        rejected.update(taken)
+        allocated.extend(code for code in candidates if code not in taken)
+
+    if len(allocated) < count:
+        raise RefCodeAllocationError(
+            f"Could not allocate {count} unique {model.__tablename__} ref codes"
+        )
+    return allocated
+
+
+def insert_with_ref_codes(session: Session, records: List[SQLModel]) -> None:
+    """
+    Assigns ref codes to new records of one model and inserts them.
+
+    Allocation only sees committed codes, so a concurrent transaction may
+    insert one of the same codes first. The insert runs in a SAVEPOINT: if it
+    fails on a duplicate ref code, only the savepoint is rolled back and the
+    records are retried with freshly allocated codes. Snapshot records for
+    the audit log after this returns, as codes may change between attempts.
+
+    :param session: Active database session.
+    :param records: New (not yet added) records, e.g. `Event`s.
+    :raises RefCodeAllocationError: If duplicates persist after all rounds.
+    """
+    if not records:
+        return
+    model = type(records[0])
+    for _ in range(MAX_ALLOCATION_ROUNDS):
+        codes = allocate_ref_codes(session, model, len(records))
+        for record, code in zip(records, codes):
+            record.ref_code = code
+        try:
+            with session.begin_nested():
+                session.add_all(records)
+            return
+        except IntegrityError:
+            # Retry only if one of our codes was taken in the meantime
+            if not session.exec(select(model.ref_code).where(model.ref_code.in_(codes))).first():
+                raise
+    raise RefCodeAllocationError(
+        f"Could not insert {len(records)} {model.__tablename__} rows with unique ref codes"
+    )
@@ -1,15 +1,13 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from sqlmodel import Session, select
-from app.database import get_session, settings
+from app.database import get_session, get_settings
 from app.models import User
 from app.auth import create_access_token
 
 router = APIRouter(prefix="/auth/google", tags=["Authentication"])
-
-GOOGLE_CLIENT_ID = settings.GOOGLE_CLIENT_ID
+logger = logging.getLogger(__name__)
 
 class GoogleToken(BaseModel):
     token: str
@@ -22,30 +20,35 @@ def google_login(
     """
     Verifies a Google ID token and returns a local JWT if the user exists.
     """
-    if not GOOGLE_CLIENT_ID:
+    client_id = get_settings().GOOGLE_CLIENT_ID
+    if not client_id:
         raise HTTPException(
             status_code=500,
             detail="Google Client ID not configured"
         )
 
+    # google-auth (and `requests` under it) is slow to import; load on first login
+    from google.oauth2 import id_token
+    from google.auth.transport import requests
+
     try:
         # Verify the ID token
         idinfo = id_token.verify_oauth2_token(
             token_in.token, 
             requests.Request(), 
-            GOOGLE_CLIENT_ID
+            client_id
         )
 
         # ID token is valid. Get user's email from it.
         email = idinfo['email'].lower()
-        print(f"Verified Google email: {email}")
+        logger.info("Verified Google email: %s", email)
         
         # Check if user exists in the primary email field (case-insensitive)
         from sqlalchemy import func
         user = session.exec(select(User).where(func.lower(User.email) == email)).first()
         
         if not user:
-            print(f"User {email} not found in database")
+            logger.warning("User %s not found in database", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Google account {email} is not authorized for this system"
@@ -63,7 +66,7 @@ def google_login(
 
     except ValueError as e:
         # Invalid token
-        print(f"Google verification error: {str(e)}")
+        logger.warning("Google verification error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Google ID Token"
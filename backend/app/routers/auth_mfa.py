@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
-import pyotp
 import os
 from typing import Optional
 from jose import JWTError, jwt
@@ -13,6 +12,11 @@ from app.auth import get_current_user, create_access_token, ALGORITHM, SECRET_KE
 
 router = APIRouter(prefix="/auth/mfa", tags=["MFA"])
 
+def totp(secret: str):
+    """Returns a `pyotp.TOTP` for the secret (pyotp is imported on first use)."""
+    import pyotp
+    return pyotp.TOTP(secret)
+
 @router.get("/setup", response_model=MFASetupResponse)
 def setup_mfa(
     current_user: User = Depends(get_current_user),
@@ -20,11 +24,11 @@ def setup_mfa(
 ):
     """Generates a new TOTP secret for the user."""
     # Only generate if not already enabled, OR allow regeneration (overwrites old)
+    import pyotp
     secret = pyotp.random_base32()
     # Provisioning URI for QR code
     # Issuer name should be the system name
-    totp = pyotp.TOTP(secret)
-    provisioning_uri = totp.provisioning_uri(
+    provisioning_uri = totp(secret).provisioning_uri(
         name=current_user.email, 
         issuer_name="HKU-CRAS"
     )
@@ -46,8 +50,7 @@ def enable_mfa(
     if not current_user.mfa_secret:
         raise HTTPException(status_code=400, detail="MFA setup not initiated")
     
-    totp = pyotp.TOTP(current_user.mfa_secret)
-    if not totp.verify(verify_data.code):
+    if not totp(current_user.mfa_secret).verify(verify_data.code):
         raise HTTPException(status_code=400, detail="Invalid verification code")
     
     current_user.mfa_enabled = True
@@ -93,8 +96,7 @@ def verify_mfa_login(
     if not user or not user.mfa_secret:
         raise HTTPException(status_code=401, detail="User not found or MFA not configured")
         
-    totp = pyotp.TOTP(user.mfa_secret)
-    if not totp.verify(verify_data.code):
+    if not totp(user.mfa_secret).verify(verify_data.code):
         raise HTTPException(status_code=401, detail="Invalid MFA code")
         
     # Validation successful, issue final access token
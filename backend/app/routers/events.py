@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import json
+import asyncio
+from types import SimpleNamespace
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import joinedload
+from typing import Any, Dict, List, Literal, Optional
 from app.database import get_session
-from app.models import Event, User
+from app.models import RESOURCE_KEY, Event, User, Study, Subject, Procedure
 from app.auth import get_current_user
-from app.audit import log_change
-from datetime import datetime
+from app.audit import log_change, snapshot
+from app.stats import apply_stat_deltas, event_stat_keys
+from app.scheduling import ensure_no_conflicts, find_conflicts, schedule_key
+from app.notifications import HEARTBEAT_SECONDS, broadcaster, format_sse, notify_event_changes
+from app.schemas import EventConflict
+from app.validation import load_procedure, validate_procedure_data, validate_event_batch
+from app.refcodes import insert_with_ref_codes
+from app.filters import apply_filters
+from app.serialization import list_response
+from app.paging import NEXT_CURSOR_HEADER, keyset_page
+from app.jsonpatch import compile_document_patch, get_path, path_delta, to_pointer
+from app.etag import check_if_match, collection_etag, not_modified, record_etag, set_etag
+from app.utils import normalize_ref_code
+from datetime import datetime, timedelta
 from pydantic import BaseModel
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import uuid
 
 # Define basic Event schemas inline for now or move to schemas.py
@@ -16,7 +33,7 @@ class EventBase(BaseModel):
     subject_id: uuid.UUID
     procedure_id: uuid.UUID
     start_datetime: datetime
-    end_datetime: datetime = None
+    end_datetime: Optional[datetime] = None
     status: str = "pending"
     notes: Optional[str] = None
     metadata_blob: dict = {}
@@ -28,25 +45,158 @@ class EventCreate(EventBase):
 class EventRead(EventBase):
     id: uuid.UUID
     ref_code: str
+    version: int
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class StudySummary(BaseModel):
+    id: uuid.UUID
+    ref_code: str
+    title: str
+
+    class Config:
+        from_attributes = True
+
+class SubjectSummary(BaseModel):
+    id: uuid.UUID
+    ref_code: str
+    lastname: str
+    firstname: str
+
+    class Config:
+        from_attributes = True
+
+class ProcedureSummary(BaseModel):
+    id: uuid.UUID
+    ref_code: str
+    name: str
+    form_data_schema: dict = {}
+
+    class Config:
+        from_attributes = True
+
+class EventDetail(EventRead):
+    study: Optional[StudySummary] = None
+    subject: Optional[SubjectSummary] = None
+    procedure: Optional[ProcedureSummary] = None
+
+class EventBucket(BaseModel):
+    bucket_start: datetime # Local wall-clock time in the requested timezone
+    group_id: Optional[uuid.UUID] = None # Study or procedure ID when grouped
+    total: int
+    by_status: Dict[str, int]
+
 router = APIRouter(prefix="/events", tags=["Events"])
 
+# Relationships that can be eager-loaded via `expand=` and their models
+EXPANDABLE = {
+    "study": (Event.study, Study),
+    "subject": (Event.subject, Subject),
+    "procedure": (Event.procedure, Procedure),
+}
+
+def parse_expand(expand: List[str]) -> List[str]:
+    """
+    Parses `expand` values (repeated or comma-separated) into relationship names.
+    
+    :param expand: Raw query values, e.g. ["study,subject"].
+    :return: Sorted, de-duplicated relationship names.
+    :raises HTTPException: 400 for unknown relationships.
+    """
+    names = {name.strip() for value in expand for name in value.split(",") if name.strip()}
+    unknown = names - EXPANDABLE.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(sorted(unknown))}")
+    return sorted(names)
+
+# Upper bound on rows accepted by POST /events/bulk
+MAX_BULK_EVENTS = 1000
+
+# Columns PATCH /events/{id} must never overwrite from the request body
+PROTECTED_FIELDS = {"id", "ref_code", "version", "created_at", "created_by"}
+
+# Longest window GET /events/aggregate and /events/conflicts accept
+MAX_QUERY_WINDOW = timedelta(days=366)
+
+# Columns GET /events/aggregate can group by
+AGGREGATE_GROUPS = {"study": Event.study_id, "procedure": Event.procedure_id}
+
+# JSONB columns PATCH /events/{id}/data may modify in place
+PATCHABLE_COLUMNS = ("procedure_data", "metadata_blob")
+
+def check_window(start: datetime, end: datetime) -> None:
+    """
+    Validates a `[start, end)` query window.
+    
+    :raises HTTPException: 400 if it is empty or longer than `MAX_QUERY_WINDOW`.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > MAX_QUERY_WINDOW:
+        raise HTTPException(status_code=400, detail=f"Window is limited to {MAX_QUERY_WINDOW.days} days")
+
+def event_timeline(
+    session: Session,
+    condition,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Response:
+    """
+    Returns one keyset page of events matching `condition`, ordered by time.
+
+    Used by the subject and study timelines; with the (fk, start_datetime, id)
+    indexes each page is an index range scan.
+
+    :param session: Active database session.
+    :param condition: Filter such as `Event.subject_id == subject_id`.
+    :param start: Only events starting at or after this time.
+    :param end: Only events starting before this time.
+    :param cursor: Cursor from the previous page's `X-Next-Cursor` header.
+    :param limit: Page size.
+    :param descending: Newest first.
+    :return: JSON response with the next cursor in `X-Next-Cursor`.
+    """
+    statement = select(Event).where(condition)
+    if start:
+        statement = statement.where(Event.start_datetime >= start)
+    if end:
+        statement = statement.where(Event.start_datetime < end)
+    rows, next_cursor = keyset_page(
+        session, statement, (Event.start_datetime, Event.id), limit, cursor, descending
+    )
+    response = list_response(EventRead, rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
 @router.post("/", response_model=EventRead, status_code=status.HTTP_201_CREATED)
 def create_event(
     event_in: EventCreate,
+    allow_overlap: bool = False,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Records a new clinical event (procedure performanced on a subject)."""
+    """
+    Records a new clinical event (procedure performanced on a subject).
+    Returns 409 if it overlaps another event of the subject, or of the
+    resource named in `metadata_blob.resource`, unless `allow_overlap=true`.
+    """
+    procedure = load_procedure(session, event_in.procedure_id)
+    validate_procedure_data(procedure, event_in.procedure_data)
+
     db_event = Event.from_orm(event_in)
     db_event.created_by = current_user.email
     db_event.updated_by = current_user.email
     
-    session.add(db_event)
+    insert_with_ref_codes(session, [db_event])
+    if not allow_overlap:
+        ensure_no_conflicts(session, [db_event.id])
+    apply_stat_deltas(session, added=event_stat_keys(db_event))
     session.commit()
     session.refresh(db_event)
     
@@ -57,44 +207,286 @@ def create_event(
         record_id=db_event.id,
         action="INSERT",
         changed_by=current_user.email,
-        new_state=json.loads(db_event.json())
+        new_state=snapshot(db_event)
     )
+    notify_event_changes(session, "create", [db_event])
     session.commit()
     
     return db_event
 
+@router.post("/bulk", response_model=List[EventRead], status_code=status.HTTP_201_CREATED)
+def create_events_bulk(
+    events_in: List[EventCreate],
+    allow_overlap: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Records many clinical events in one transaction.
+    Form data is validated per procedure with cached validators and ref codes
+    are allocated for the whole batch at once, so cost does not grow per row
+    in round trips. Overlaps with existing events or within the batch are
+    checked in one query (409 unless `allow_overlap=true`).
+    """
+    if len(events_in) > MAX_BULK_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_EVENTS} events per request")
+    
+    validate_event_batch(session, ((e.procedure_id, e.procedure_data) for e in events_in))
+    
+    db_events = []
+    for event_in in events_in:
+        db_event = Event.from_orm(event_in)
+        db_event.created_by = current_user.email
+        db_event.updated_by = current_user.email
+        db_events.append(db_event)
+    insert_with_ref_codes(session, db_events)
+    
+    for db_event in db_events:
+        # Audit Log (all values are set client-side, so the snapshot is complete)
+        log_change(
+            session=session,
+            table_name="event",
+            record_id=db_event.id,
+            action="INSERT",
+            changed_by=current_user.email,
+            new_state=snapshot(db_event)
+        )
+    
+    session.flush()
+    if not allow_overlap:
+        ensure_no_conflicts(session, [db_event.id for db_event in db_events])
+    apply_stat_deltas(session, added=[key for db_event in db_events for key in event_stat_keys(db_event)])
+    notify_event_changes(session, "create", db_events)
+    response = list_response(EventRead, db_events)
+    session.commit()
+    
+    return response
+
 @router.get("/", response_model=List[EventRead])
 def list_events(
+    request: Request,
+    filters: List[str] = Query(default=[], alias="filter"),
+    expand: List[str] = Query(default=[]),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Lists all clinical events.
+    Optional `filter` parameters query the JSONB fields, e.g.
+    `procedure_data.bp_systolic>140` or `metadata_blob@>{"site": "QMH"}`.
+    `expand=study,subject,procedure` embeds summaries of the related records,
+    loaded with the events in a single joined query.
+    Supports `If-None-Match` revalidation against a count/max(updated_at) ETag.
+    """
+    relations = parse_expand(expand)
+    statement = apply_filters(select(Event), Event, filters, ["procedure_data", "metadata_blob"])
+    
+    # Embedded summaries go stale when the related tables change
+    related_versions = [
+        session.exec(select(func.max(EXPANDABLE[name][1].updated_at))).one()
+        for name in relations
+    ]
+    etag = collection_etag(session, statement, Event, request.url.query, *related_versions)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    if not relations:
+        results = session.exec(statement).all()
+        return set_etag(list_response(EventRead, results), etag)
+    
+    statement = statement.options(*(joinedload(EXPANDABLE[name][0]) for name in relations))
+    results = session.exec(statement).unique().all()
+    return set_etag(list_response(EventDetail, results), etag)
+
+@router.get("/aggregate", response_model=List[EventBucket])
+def aggregate_events(
+    start: datetime,
+    end: datetime,
+    bucket: Literal["hour", "day", "week", "month"] = "day",
+    group_by: Optional[Literal["study", "procedure"]] = None,
+    study_id: Optional[uuid.UUID] = None,
+    tz: str = "UTC",
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Lists all clinical events."""
-    statement = select(Event)
-    results = session.exec(statement).all()
-    return results
+    """
+    Counts events starting in `[start, end)` per time bucket, with a status
+    breakdown, for month and quarter calendar overviews.
+    `start`/`end` are UTC like the stored timestamps; buckets are truncated
+    in `tz` (e.g. `Asia/Hong_Kong`) so days follow the local calendar.
+    `group_by=study|procedure` returns one series per study or procedure.
+    A single `date_trunc` GROUP BY over a `start_datetime` index range, so
+    the response size depends on the number of buckets, not events.
+    """
+    check_window(start, end)
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+    
+    local_start = func.timezone(tz, func.timezone("UTC", Event.start_datetime))
+    keys = [func.date_trunc(bucket, local_start).label("bucket_start")]
+    if group_by:
+        keys.append(AGGREGATE_GROUPS[group_by].label("group_id"))
+    
+    statement = (
+        select(*keys, Event.status, func.count())
+        .where(Event.start_datetime >= start, Event.start_datetime < end)
+        .group_by(*keys, Event.status)
+        .order_by(*keys, Event.status)
+    )
+    if study_id:
+        statement = statement.where(Event.study_id == study_id)
+    
+    buckets: Dict[tuple, EventBucket] = {}
+    for *key, status, count in session.exec(statement).all():
+        item = buckets.get(tuple(key))
+        if item is None:
+            item = buckets[tuple(key)] = EventBucket(
+                bucket_start=key[0], group_id=key[1] if group_by else None, total=0, by_status={}
+            )
+        item.total += count
+        item.by_status[status] = count
+    return list(buckets.values())
+
+@router.get("/conflicts", response_model=List[EventConflict])
+def list_conflicts(
+    start: datetime,
+    end: datetime,
+    study_id: Optional[uuid.UUID] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Lists overlapping pairs of active events starting in `[start, end)`:
+    double-booked subjects and events booking the same
+    `metadata_blob.resource`. Found with a single range-overlap self-join.
+    """
+    check_window(start, end)
+    return find_conflicts(session, start, end, study_id)
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_event_changes(
+    request: Request,
+    study_id: Optional[uuid.UUID] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events stream of event `create`/`update`/`delete`
+    notifications, optionally limited to one study, so open calendars can
+    apply deltas instead of re-polling `GET /events/`.
+    Each message carries its action and study plus an `events` list with
+    each changed event's id, ref code, subject, version, start time and
+    `updated_at`; bulk changes arrive as a few batched messages. A `reset` message means messages may have been lost
+    (listener reconnect or a slow client); reload the visible window then.
+    Changes made through any worker arrive via Postgres LISTEN/NOTIFY.
+    """
+    # The stream may stay open for hours; don't hold the auth query's connection
+    session.close()
+    subscriber = broadcaster.subscribe(study_id)
+
+    async def messages():
+        try:
+            yield "retry: 5000\n" + format_sse({"study_id": str(study_id) if study_id else None}, event="ready")
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/by-code/{ref_code}", response_model=EventRead)
+def get_event_by_code(
+    ref_code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Returns an event by its ref code (e.g. `ev-A7B9X2`) using the unique index."""
+    event = session.exec(select(Event).where(Event.ref_code == normalize_ref_code(ref_code))).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+@router.get("/{event_id}", response_model=EventDetail)
+def get_event(
+    event_id: uuid.UUID,
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns an event with summaries of its study, subject and procedure
+    (including the form schema), fetched together in one joined query.
+    Send the ETag back as `If-Match` when patching the event.
+    """
+    statement = (
+        select(Event)
+        .where(Event.id == event_id)
+        .options(*(joinedload(relationship) for relationship, _ in EXPANDABLE.values()))
+    )
+    event = session.exec(statement).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    set_etag(response, record_etag("event", event_id, event.updated_at, event.version))
+    return EventDetail.model_validate(event, from_attributes=True)
 
 @router.patch("/{event_id}", response_model=EventRead)
 def update_event(
     event_id: str,
     event_data: dict, # Dynamic data update
+    request: Request,
+    response: Response,
+    allow_overlap: bool = False,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Updates event status or procedure data and logs the change."""
+    """
+    Updates event status or procedure data and logs the change.
+    Requires an `If-Match` header with the event's ETag (from GET): 428
+    without it. Returns 409 if it no longer matches, or if a changed time,
+    subject or resource makes the event overlap another one (unless
+    `allow_overlap=true`).
+    """
     db_event = session.get(Event, event_id)
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
+    check_if_match(request, record_etag("event", event_id, db_event.updated_at, db_event.version))
     
-    prev_state = json.loads(db_event.json())
+    # Re-validate form data when it, or the procedure it belongs to, changes
+    if "procedure_data" in event_data or "procedure_id" in event_data:
+        procedure = load_procedure(session, event_data.get("procedure_id", db_event.procedure_id))
+        validate_procedure_data(procedure, event_data.get("procedure_data", db_event.procedure_data))
+    
+    prev_state = snapshot(db_event)
+    prev_stat_keys = event_stat_keys(db_event)
+    prev_schedule = schedule_key(db_event)
     
     for key, value in event_data.items():
-        if hasattr(db_event, key):
+        if hasattr(db_event, key) and key not in PROTECTED_FIELDS:
             setattr(db_event, key, value)
     
     db_event.updated_at = datetime.utcnow()
     db_event.updated_by = current_user.email
     
     session.add(db_event)
+    session.flush()
+    session.refresh(db_event)
+    if not allow_overlap and schedule_key(db_event) != prev_schedule:
+        ensure_no_conflicts(session, [db_event.id])
+    apply_stat_deltas(session, added=event_stat_keys(db_event), removed=prev_stat_keys)
     session.commit()
     session.refresh(db_event)
     
@@ -106,26 +498,153 @@ def update_event(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_event.json())
+        new_state=snapshot(db_event)
     )
+    notify_event_changes(session, "update", [db_event])
     session.commit()
     
+    set_etag(response, record_etag("event", event_id, db_event.updated_at, db_event.version))
     return db_event
 
+@router.patch("/{event_id}/data", response_model=EventRead)
+def patch_event_data(
+    event_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    patch: Any = Body(...),
+    allow_overlap: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Applies a partial update to `procedure_data` / `metadata_blob` in the database.
+
+    With `Content-Type: application/merge-patch+json` (or plain JSON) the body
+    is a merge patch such as `{"procedure_data": {"bp_systolic": 120}}`; with
+    `application/json-patch+json` it is a list of JSON Patch operations whose
+    paths start with the column, e.g. `/procedure_data/bp_systolic`.
+
+    The patch runs as one `UPDATE ... RETURNING` using `jsonb_set`/`||`, so
+    concurrent edits to different fields do not overwrite each other. Only
+    the touched paths are audited (action `PATCH`). `If-Match` is optional
+    here, since a patch touches only its own paths. Returns 409 if `If-Match`
+    or a JSON Patch `test` operation fails, or if a changed
+    `metadata_blob.resource` is already booked (unless `allow_overlap=true`).
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    values, conditions, paths = compile_document_patch(Event, PATCHABLE_COLUMNS, patch, media_type)
+
+    if request.headers.get("if-match"):
+        current = session.exec(
+            select(Event.updated_at, Event.version).where(Event.id == event_id)
+        ).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        check_if_match(request, record_etag("event", event_id, *current))
+        conditions.append(Event.version == current.version)
+
+    # Lock the row and read the touched paths as they were before the update
+    previous = (
+        select(
+            Event.id,
+            Event.updated_at,
+            Event.updated_by,
+            *(get_path(getattr(Event, path[0]), path[1:]).label(f"old_{i}") for i, path in enumerate(paths)),
+            # SQL NULL: the path does not exist (JSON null is a value)
+            *(get_path(getattr(Event, path[0]), path[1:]).is_(None).label(f"old_missing_{i}") for i, path in enumerate(paths)),
+        )
+        .where(Event.id == event_id, Event.deleted_at.is_(None))
+        .with_for_update()
+        .subquery("previous")
+    )
+    now = datetime.utcnow()
+    statement = (
+        update(Event)
+        .where(Event.id == previous.c.id, *conditions)
+        .values(**values, version=Event.version + 1, updated_at=now, updated_by=current_user.email)
+        .returning(
+            *Event.__table__.c,
+            previous.c.updated_at.label("previous_updated_at"),
+            previous.c.updated_by.label("previous_updated_by"),
+            *(previous.c[f"old_{i}"] for i in range(len(paths))),
+            *(previous.c[f"old_missing_{i}"] for i in range(len(paths))),
+            *(get_path(getattr(Event, path[0]), path[1:]).label(f"new_{i}") for i, path in enumerate(paths)),
+            *(get_path(getattr(Event, path[0]), path[1:]).is_(None).label(f"new_missing_{i}") for i, path in enumerate(paths)),
+        )
+    )
+    row = session.execute(statement).mappings().first()
+    if row is None:
+        session.rollback()
+        if session.get(Event, event_id) is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        raise HTTPException(status_code=409, detail="Patch precondition failed; reload and retry")
+
+    if "procedure_data" in values:
+        try:
+            validate_procedure_data(load_procedure(session, row["procedure_id"]), row["procedure_data"])
+        except HTTPException:
+            session.rollback()
+            raise
+    # Only a changed resource can create a new overlap
+    resource_changed = any(
+        path[0] == "metadata_blob" and path[1:2] in ([], [RESOURCE_KEY]) and row[f"old_{i}"] != row[f"new_{i}"]
+        for i, path in enumerate(paths)
+    )
+    if resource_changed and not allow_overlap:
+        try:
+            ensure_no_conflicts(session, [event_id])
+        except HTTPException:
+            session.rollback()
+            raise
+
+    # Audit Log: only the touched paths, as {JSON pointer: value} plus the absent ones
+    pointers = [to_pointer(path) for path in paths]
+    prev_state = path_delta(pointers, [row[f"old_{i}"] for i in range(len(paths))], [row[f"old_missing_{i}"] for i in range(len(paths))])
+    new_state = path_delta(pointers, [row[f"new_{i}"] for i in range(len(paths))], [row[f"new_missing_{i}"] for i in range(len(paths))])
+    prev_state.update({
+        "/version": row["version"] - 1,
+        "/updated_at": row["previous_updated_at"].isoformat() if row["previous_updated_at"] else None,
+        "/updated_by": row["previous_updated_by"],
+    })
+    new_state.update({"/version": row["version"], "/updated_at": now.isoformat(), "/updated_by": current_user.email})
+    log_change(
+        session=session,
+        table_name="event",
+        record_id=event_id,
+        action="PATCH",
+        changed_by=current_user.email,
+        prev_state=prev_state,
+        new_state=new_state
+    )
+    patched = EventRead.model_validate(dict(row))
+    notify_event_changes(session, "update", [SimpleNamespace(**row)])
+    session.commit()
+
+    set_etag(response, record_etag("event", event_id, row["updated_at"], row["version"]))
+    return patched
+
 @router.delete("/{event_id}")
 def delete_event(
     event_id: uuid.UUID,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Deletes an event and logs the change."""
+    """
+    Soft-deletes an event (sets `deleted_at`) and logs the change.
+    The row is kept for audit reconstruction but no longer listed or counted.
+    """
     db_event = session.get(Event, event_id)
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    prev_state = json.loads(db_event.json())
+    prev_state = snapshot(db_event)
+    prev_stat_keys = event_stat_keys(db_event)
     
-    session.delete(db_event)
+    db_event.deleted_at = datetime.utcnow()
+    db_event.updated_at = db_event.deleted_at
+    db_event.updated_by = current_user.email
+    session.add(db_event)
+    apply_stat_deltas(session, removed=prev_stat_keys)
     session.commit()
     
     # Audit Log
@@ -138,6 +657,7 @@ def delete_event(
         prev_state=prev_state,
         new_state=None
     )
+    notify_event_changes(session, "delete", [db_event])
     session.commit()
     
     return {"message": "Event deleted successfully"}
@@ -0,0 +1,32 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from app.database import get_session
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/live")
+def liveness():
+    """
+    Liveness probe: the worker is up and serving requests.
+    Does not touch the database, so an outage does not get workers restarted.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+def readiness(session: Session = Depends(get_session)):
+    """
+    Readiness probe: the worker can reach the database.
+
+    :raises HTTPException: 503 when a connection cannot be checked out or `SELECT 1` fails.
+    """
+    try:
+        session.exec(text("SELECT 1")).one()
+    except SQLAlchemyError:
+        logger.warning("Readiness check failed", exc_info=True)
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ok"}
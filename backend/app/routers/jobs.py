@@ -0,0 +1,111 @@
+import os
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Job, User
+from app.schemas import JobCreate, JobRead
+from app.auth import get_current_user
+from app.jobs import FINISHED_STATUSES, JOB_HANDLERS, enqueue_job, result_path
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def load_own_job(session: Session, job_id: uuid.UUID, current_user: User, action: str, **options) -> Job:
+    """
+    Loads a job that the current user may see or change.
+
+    :param session: Active database session.
+    :param job_id: The job's ID.
+    :param current_user: The requesting user.
+    :param action: What the user is doing, for the 403 message (e.g. "cancel").
+    :param options: Extra `session.get` options, e.g. `with_for_update=True`.
+    :return: The job.
+    :raises HTTPException: 404 if the job does not exist, 403 unless the user
+        submitted it or is an administrator.
+    """
+    job = session.get(Job, job_id, **options)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.created_by != current_user.email and not current_user.is_superuser and current_user.admin_level < 2:
+        raise HTTPException(status_code=403, detail=f"Only the submitter or an administrator can {action} this job")
+    return job
+
+@router.post("/", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(
+    job_in: JobCreate,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queues a job (e.g. `{"kind": "export_study", "params": {"study_id": ...}}`)
+    for a worker process (`python -m app.worker`). Returns 202 with the job;
+    poll `GET /jobs/{id}` (the `Location` header) for progress.
+    """
+    handler = JOB_HANDLERS.get(job_in.kind)
+    if handler is None or not handler.submittable:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job_in.kind}")
+    job = enqueue_job(session, job_in.kind, job_in.params, current_user.email)
+    session.commit()
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(
+    job_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns a background job's status and progress (`processed` of `total`
+    records). Poll until `status` is `completed`, `failed` or `cancelled`.
+    Only the submitter or an administrator may view it.
+    """
+    return load_own_job(session, job_id, current_user, "view")
+
+@router.post("/{job_id}/cancel", response_model=JobRead)
+def cancel_job(
+    job_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cancels a job. A pending job is cancelled at once; a running one stops
+    at its next checkpoint (work already committed is kept).
+    Only the submitter or an administrator may cancel. Returns 409 if the
+    job already finished or its kind cannot be stopped part-way.
+    """
+    job = load_own_job(session, job_id, current_user, "cancel", with_for_update=True)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    if not JOB_HANDLERS[job.kind].cancellable:
+        raise HTTPException(status_code=409, detail=f"{job.kind} jobs cannot be cancelled")
+    
+    job.cancel_requested = True
+    if job.status == "pending":
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    return job
+
+@router.get("/{job_id}/result", response_class=FileResponse)
+def get_job_result(
+    job_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Downloads the output file of a completed job (e.g. an export's CSV).
+    Only the submitter or an administrator may download it.
+    """
+    job = load_own_job(session, job_id, current_user, "download the result of")
+    if job.status != "completed" or not job.result_location:
+        raise HTTPException(status_code=404, detail="Job has no result")
+    path = result_path(job.result_location)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Job result is no longer available")
+    return FileResponse(path, filename=f"{job.kind}-{job.id}{os.path.splitext(path)[1]}")
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, select
+from app.database import get_session
+from app.models import Study, Subject, Event, Procedure, User
+from app.schemas import StudyRead, ProcedureRead, UserRead, RefCodeLookup
+from app.auth import check_admin_level, get_current_user
+from app.routers.events import EventRead
+from app.routers.subjects import to_subject_read
+from app.utils import normalize_ref_code, ref_code_entity
+
+router = APIRouter(prefix="/lookup", tags=["Lookup"])
+
+# Entity name (from the ref code prefix) -> (table model, read schema)
+LOOKUP_TARGETS = {
+    "study": (Study, StudyRead),
+    "subject": (Subject, None), # Built with to_subject_read for study_id
+    "event": (Event, EventRead),
+    "procedure": (Procedure, ProcedureRead),
+    "user": (User, UserRead),
+}
+
+@router.get("/{code}", response_model=RefCodeLookup)
+def lookup_ref_code(
+    code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Resolves any ref code (`st-`, `su-`, `ev-`, `pr-`, `us-`) to its record.
+    The prefix selects the table, so the lookup is one query on its unique `ref_code` index.
+    """
+    entity = ref_code_entity(code)
+    if entity is None:
+        raise HTTPException(status_code=400, detail="Unrecognized ref code prefix")
+    if entity == "user":
+        # Same rule as GET /users/by-code/{ref_code}
+        check_admin_level(current_user, 2)
+    
+    model, schema = LOOKUP_TARGETS[entity]
+    record = session.exec(select(model).where(model.ref_code == normalize_ref_code(code))).first()
+    if not record:
+        raise HTTPException(status_code=404, detail=f"No {entity} found for {code}")
+    
+    data = to_subject_read(record) if model is Subject else schema.model_validate(record, from_attributes=True)
+    return RefCodeLookup(
+        entity=entity,
+        id=record.id,
+        ref_code=record.ref_code,
+        data=data.model_dump(mode="json")
+    )
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from typing import List
-from app.database import get_session
+from app.database import get_session, get_engine
 from app.models import Procedure, User
 from app.schemas import ProcedureCreate, ProcedureUpdate, ProcedureRead
-from app.auth import get_current_user
-from app.audit import log_change
+from app.auth import get_current_user, has_admin_level
+from app.audit import log_change, snapshot
+from app.validation import invalidate_procedure_validator
+from app.filters import apply_filters, ensure_field_indexes
+from app.serialization import list_response
+from app.etag import check_if_match, collection_etag, not_modified, record_etag, set_etag
+from app.utils import normalize_ref_code
 from datetime import datetime
 
 router = APIRouter(prefix="/procedures", tags=["Procedures"])
@@ -14,12 +18,15 @@ router = APIRouter(prefix="/procedures", tags=["Procedures"])
 @router.post("/", response_model=ProcedureRead, status_code=status.HTTP_201_CREATED)
 def create_procedure(
     procedure_in: ProcedureCreate,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Creates a new research procedure/protocol.
-    The `form_data_schema` JSONB field allows defining dynamic form fields.
+    The `form_data_schema` JSONB field allows defining dynamic form fields;
+    fields marked `"indexed": true` get an expression index on `Event.procedure_data`
+    when the procedure is saved by an administrator (level 2+).
     """
     db_procedure = Procedure.from_orm(procedure_in)
     db_procedure.created_by = current_user.email
@@ -36,47 +43,94 @@ def create_procedure(
         record_id=db_procedure.id,
         action="INSERT",
         changed_by=current_user.email,
-        new_state=json.loads(db_procedure.json())
+        new_state=snapshot(db_procedure)
     )
     session.commit()
     
+    # Index DDL runs against the shared event table, so only admins may trigger it
+    if has_admin_level(current_user, 2):
+        background_tasks.add_task(ensure_field_indexes, get_engine(), procedure_in.form_data_schema)
     return db_procedure
 
 @router.get("/", response_model=List[ProcedureRead])
 def list_procedures(
+    request: Request,
+    filters: List[str] = Query(default=[], alias="filter"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Lists all procedures."""
-    statement = select(Procedure)
+    """
+    Lists all procedures.
+    Optional `filter` parameters query `metadata_blob`, e.g. `metadata_blob.category=lab`.
+    Supports `If-None-Match` revalidation against a count/max(updated_at) ETag.
+    """
+    statement = apply_filters(select(Procedure), Procedure, filters, ["metadata_blob"])
+    etag = collection_etag(session, statement, Procedure, request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     results = session.exec(statement).all()
-    return results
+    return set_etag(list_response(ProcedureRead, results), etag)
+
+@router.get("/by-code/{ref_code}", response_model=ProcedureRead)
+def get_procedure_by_code(
+    ref_code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Returns a procedure by its ref code (e.g. `pr-A7B9X2`) using the unique index."""
+    procedure = session.exec(select(Procedure).where(Procedure.ref_code == normalize_ref_code(ref_code))).first()
+    if not procedure:
+        raise HTTPException(status_code=404, detail="Procedure not found")
+    return procedure
 
 @router.get("/{procedure_id}", response_model=ProcedureRead)
 def get_procedure(
     procedure_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Returns details for a specific procedure."""
-    procedure = session.get(Procedure, procedure_id)
-    if not procedure:
+    """Returns details for a specific procedure, or 304 if the client's ETag is current."""
+    row = session.exec(select(Procedure.updated_at, Procedure.version).where(Procedure.id == procedure_id)).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Procedure not found")
+    
+    etag = record_etag("procedure", procedure_id, *row)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    procedure = session.get(Procedure, procedure_id)
+    set_etag(response, etag)
     return procedure
 
 @router.patch("/{procedure_id}", response_model=ProcedureRead)
 def update_procedure(
     procedure_id: str,
     procedure_in: ProcedureUpdate,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Updates protocol definitions and audits the changes."""
+    """
+    Updates protocol definitions and audits the changes.
+    Requires an `If-Match` header with the procedure's ETag (from GET): 428
+    without it, 409 if it no longer matches.
+    """
     db_procedure = session.get(Procedure, procedure_id)
     if not db_procedure:
         raise HTTPException(status_code=404, detail="Procedure not found")
+    check_if_match(
+        request,
+        record_etag("procedure", procedure_id, db_procedure.updated_at, db_procedure.version),
+    )
     
-    prev_state = json.loads(db_procedure.json())
+    prev_state = snapshot(db_procedure)
     
     procedure_data = procedure_in.dict(exclude_unset=True)
     for key, value in procedure_data.items():
@@ -88,6 +142,7 @@ def update_procedure(
     session.add(db_procedure)
     session.commit()
     session.refresh(db_procedure)
+    invalidate_procedure_validator(db_procedure.id)
     
     # Audit Log
     log_change(
@@ -97,8 +152,11 @@ def update_procedure(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_procedure.json())
+        new_state=snapshot(db_procedure)
     )
     session.commit()
     
+    if procedure_in.form_data_schema is not None and has_admin_level(current_user, 2):
+        background_tasks.add_task(ensure_field_indexes, get_engine(), procedure_in.form_data_schema)
+    set_etag(response, record_etag("procedure", procedure_id, db_procedure.updated_at, db_procedure.version))
     return db_procedure
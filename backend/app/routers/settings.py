@@ -6,7 +6,7 @@ from app.database import get_session
 from app.models import SystemSetting, User
 from app.schemas import SubjectRead # Temporary placeholder if needed, usually we define specific schemas
 from app.auth import get_current_user, admin_required
-from app.audit import log_change
+from app.audit import log_change, snapshot
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
@@ -40,7 +40,7 @@ async def update_setting(
         # Create it if it doesn't exist? For now, just raise error if we expect predefined keys
         raise HTTPException(status_code=404, detail="Setting not found")
     
-    prev_state = setting.dict()
+    prev_state = snapshot(setting)
     setting.value = value
     
     session.add(setting)
@@ -54,7 +54,7 @@ async def update_setting(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=setting.dict()
+        new_state=snapshot(setting)
     )
     
     return setting
@@ -77,7 +77,7 @@ async def create_setting(
         action="INSERT",
         changed_by=current_user.email,
         prev_state={},
-        new_state=setting_in.dict()
+        new_state=snapshot(setting_in)
     )
     
     return setting_in
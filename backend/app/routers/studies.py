@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 import uuid
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Literal, Optional
 from app.database import get_session
-from app.models import Study, User, StudySubjectLink
-from app.schemas import StudyCreate, StudyUpdate, StudyRead, SubjectRead
+from app.models import Event, Study, Subject, User, StudySubjectLink
+from app.schemas import JobRead, StudyCreate, StudyUpdate, StudyRead, StudyStats, SubjectRead
 from app.auth import get_current_user, admin_required
-from app.audit import log_change
+from app.audit import log_change, snapshot
+from app.stats import apply_stat_deltas, study_stats, subject_stat_keys
+from app.jobs import enqueue_job
+from app.filters import apply_filters
+from app.serialization import list_response
+from app.etag import check_if_match, collection_etag, not_modified, record_etag, set_etag
+from app.utils import normalize_ref_code
+from app.paging import MAX_PAGE_SIZE
+from app.routers.events import EventRead, event_timeline
 from datetime import datetime
 
 router = APIRouter(prefix="/studies", tags=["Studies"])
+logger = logging.getLogger(__name__)
 
 @router.post("/", response_model=StudyRead, status_code=status.HTTP_201_CREATED)
 def create_study(
@@ -38,52 +47,92 @@ def create_study(
             record_id=db_study.id,
             action="INSERT",
             changed_by=current_user.email,
-            new_state=json.loads(db_study.json())
+            new_state=snapshot(db_study)
         )
         session.commit()
     except Exception as e:
         # We record the error but don't fail the primary transaction if audit fails
         # In a real production system, you might want stricter adherence.
-        print(f"Audit Log Error (Study Create): {e}")
+        logger.exception("Audit Log Error (Study Create): %s", e)
     
     return db_study
 
 @router.get("/", response_model=List[StudyRead])
 def list_studies(
+    request: Request,
+    filters: List[str] = Query(default=[], alias="filter"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Lists all studies that the current user has access to."""
+    """
+    Lists all studies that the current user has access to.
+    Optional `filter` parameters query `metadata_blob`, e.g. `metadata_blob.phase=2`.
+    Supports `If-None-Match` revalidation against a count/max(updated_at) ETag.
+    """
     # TODO: Implement granular StudyUserAccess filtering
-    statement = select(Study)
+    statement = apply_filters(select(Study), Study, filters, ["metadata_blob"])
+    etag = collection_etag(session, statement, Study, request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     results = session.exec(statement).all()
-    return results
+    return set_etag(list_response(StudyRead, results), etag)
+
+@router.get("/by-code/{ref_code}", response_model=StudyRead)
+def get_study_by_code(
+    ref_code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Returns a study by its ref code (e.g. `st-A7B9X2`) using the unique index."""
+    study = session.exec(select(Study).where(Study.ref_code == normalize_ref_code(ref_code))).first()
+    if not study:
+        raise HTTPException(status_code=404, detail="Study not found")
+    return study
 
 @router.get("/{study_id}", response_model=StudyRead)
 def get_study(
     study_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Returns details for a specific study."""
-    study = session.get(Study, study_id)
-    if not study:
+    """Returns details for a specific study, or 304 if the client's ETag is current."""
+    row = session.exec(select(Study.updated_at, Study.version).where(Study.id == study_id)).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Study not found")
+    
+    etag = record_etag("study", study_id, *row)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    study = session.get(Study, study_id)
+    set_etag(response, etag)
     return study
 
 @router.patch("/{study_id}", response_model=StudyRead)
 def update_study(
     study_id: str,
     study_in: StudyUpdate,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Updates an existing study and records the change in the audit log."""
+    """
+    Updates an existing study and records the change in the audit log.
+    Requires an `If-Match` header with the study's ETag (from GET): 428
+    without it, 409 if it no longer matches.
+    """
     db_study = session.get(Study, study_id)
     if not db_study:
         raise HTTPException(status_code=404, detail="Study not found")
+    check_if_match(request, record_etag("study", study_id, db_study.updated_at, db_study.version))
     
-    prev_state = json.loads(db_study.json())
+    prev_state = snapshot(db_study)
     
     study_data = study_in.dict(exclude_unset=True)
     for key, value in study_data.items():
@@ -104,27 +153,44 @@ def update_study(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_study.json())
+        new_state=snapshot(db_study)
     )
     session.commit()
     
+    set_etag(response, record_etag("study", study_id, db_study.updated_at, db_study.version))
     return db_study
 
-@router.delete("/{study_id}", status_code=status.HTTP_204_NO_CONTENT)
-@admin_required
+@router.delete("/{study_id}", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
 def delete_study(
-    study_id: str,
+    study_id: uuid.UUID,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(admin_required(2))
 ):
-    """Deletes a study. Requires administrative privileges."""
+    """
+    Soft-deletes a study and queues a job for the worker to soft-delete its
+    procedures and events in batches. Requires administrative privileges.
+    The study disappears immediately; rows are kept (`deleted_at` set) so
+    events and audit history stay reconstructible. Returns 202 with the
+    job; poll `GET /jobs/{id}` (the `Location` header) for progress.
+    """
     db_study = session.get(Study, study_id)
     if not db_study:
         raise HTTPException(status_code=404, detail="Study not found")
     
-    prev_state = json.loads(db_study.json())
+    prev_state = snapshot(db_study)
     
-    session.delete(db_study)
+    db_study.deleted_at = datetime.utcnow()
+    db_study.updated_at = db_study.deleted_at
+    db_study.updated_by = current_user.email
+    session.add(db_study)
+    job = enqueue_job(
+        session,
+        "delete_study",
+        {"study_id": str(db_study.id), "deleted_at": db_study.deleted_at.isoformat()},
+        current_user.email,
+    )
     
     # Audit Log
     log_change(
@@ -138,7 +204,8 @@ def delete_study(
     )
     
     session.commit()
-    return None
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
 
 # --- M2M Study-Subject Linkage ---
 
@@ -158,9 +225,13 @@ def link_subject_to_study(
     existing = session.exec(statement).first()
     if existing:
         return {"message": "Subject already linked to study"}
+    subject = session.get(Subject, subject_id)
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
     
     link = StudySubjectLink(study_id=study_id, subject_id=subject_id)
     session.add(link)
+    apply_stat_deltas(session, added=subject_stat_keys(study_id, subject))
     
     # Audit log (optional but recommended for FDA compliance)
     log_change(
@@ -192,6 +263,7 @@ def unlink_subject_from_study(
         raise HTTPException(status_code=404, detail="Link not found")
     
     session.delete(link)
+    apply_stat_deltas(session, removed=subject_stat_keys(study_id, session.get(Subject, subject_id)))
     
     log_change(
         session=session,
@@ -205,6 +277,42 @@ def unlink_subject_from_study(
     session.commit()
     return {"message": "Subject unlinked successfully"}
 
+@router.get("/{study_id}/stats", response_model=StudyStats)
+def get_study_stats(
+    study_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns dashboard statistics for a study: enrolled subjects, events by
+    status, procedure and week, completion and no-show rates, and the sex
+    and age distribution of its subjects.
+    Served from counters maintained as events and enrollments change, so
+    the cost does not grow with the size of the study.
+    """
+    if not session.get(Study, study_id):
+        raise HTTPException(status_code=404, detail="Study not found")
+    return study_stats(session, study_id)
+
+@router.get("/{study_id}/events", response_model=List[EventRead])
+def get_study_events(
+    study_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    order: Literal["asc", "desc"] = "asc",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns a study's events ordered by start time, optionally within
+    [`start`, `end`). Keyset-paged via the `X-Next-Cursor` header.
+    """
+    if not session.get(Study, study_id):
+        raise HTTPException(status_code=404, detail="Study not found")
+    return event_timeline(session, Event.study_id == study_id, start, end, cursor, limit, order == "desc")
+
 @router.get("/{study_id}/subjects", response_model=List[SubjectRead])
 def get_study_subjects(
     study_id: uuid.UUID,
@@ -215,4 +323,4 @@ def get_study_subjects(
     study = session.get(Study, study_id)
     if not study:
         raise HTTPException(status_code=404, detail="Study not found")
-    return study.subjects
+    return list_response(SubjectRead, study.subjects)
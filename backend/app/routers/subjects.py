@@ -1,16 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from typing import List, Literal, Optional
+import uuid
 from app.database import get_session
-from app.models import Subject, User, StudySubjectLink
-from app.schemas import SubjectCreate, SubjectUpdate, SubjectRead
+from app.models import Event, Subject, User, StudySubjectLink, subject_search_document
+from app.schemas import SubjectCreate, SubjectUpdate, SubjectRead, SubjectSearchResult
 from app.auth import get_current_user
-from app.audit import log_change
+from app.audit import log_change, snapshot
+from app.stats import apply_stat_deltas, subject_stat_keys
+from app.serialization import list_response
+from app.etag import check_if_match, collection_etag, not_modified, record_etag, set_etag
+from app.utils import normalize_ref_code
+from app.refcodes import insert_with_ref_codes
+from app.paging import MAX_PAGE_SIZE
+from app.routers.events import EventRead, event_timeline
 from datetime import datetime
 
 router = APIRouter(prefix="/subjects", tags=["Subjects"])
 
+# Upper bound on rows accepted by POST /subjects/bulk
+MAX_BULK_SUBJECTS = 1000
+
+def to_subject_read(subject: Subject) -> SubjectRead:
+    """
+    Builds the read schema for a subject, populating its primary study_id.
+    
+    :param subject: The subject record.
+    :return: SubjectRead with `study_id` set to the first linked study, if any.
+    """
+    s_read = SubjectRead.from_orm(subject)
+    if subject.studies:
+        s_read.study_id = subject.studies[0].id
+    return s_read
+
+def _link_version(session: Session, subject_id: Optional[str] = None) -> tuple:
+    """
+    Returns (count, max(joined_at)) of study links, which determine `study_id`.
+    
+    :param session: Active database session.
+    :param subject_id: Restrict to one subject's links if given.
+    :return: Tuple used as an ETag component.
+    """
+    statement = select(func.count(), func.max(StudySubjectLink.joined_at))
+    if subject_id is not None:
+        statement = statement.where(StudySubjectLink.subject_id == subject_id)
+    return tuple(session.exec(statement).one())
+
 @router.post("/", response_model=SubjectRead, status_code=status.HTTP_201_CREATED)
 def create_subject(
     subject_in: SubjectCreate,
@@ -23,14 +60,14 @@ def create_subject(
     db_subject.created_by = current_user.email
     db_subject.updated_by = current_user.email
     
-    session.add(db_subject)
-    session.commit()
-    session.refresh(db_subject)
+    insert_with_ref_codes(session, [db_subject])
     
     # Create the link to the study
     link = StudySubjectLink(study_id=subject_in.study_id, subject_id=db_subject.id)
     session.add(link)
+    apply_stat_deltas(session, added=subject_stat_keys(subject_in.study_id, db_subject))
     session.commit()
+    session.refresh(db_subject)
     
     # Audit Log
     log_change(
@@ -39,7 +76,7 @@ def create_subject(
         record_id=db_subject.id,
         action="INSERT",
         changed_by=current_user.email,
-        new_state=json.loads(db_subject.json())
+        new_state=snapshot(db_subject)
     )
     session.commit()
     
@@ -48,13 +85,69 @@ def create_subject(
     response_subject.study_id = subject_in.study_id
     return response_subject
 
+@router.post("/bulk", response_model=List[SubjectRead], status_code=status.HTTP_201_CREATED)
+def create_subjects_bulk(
+    subjects_in: List[SubjectCreate],
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Adds many research subjects, each linked to its study, in one transaction.
+    Ref codes for the whole batch are allocated and checked in a single query.
+    """
+    if len(subjects_in) > MAX_BULK_SUBJECTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_SUBJECTS} subjects per request")
+    
+    db_subjects = []
+    for subject_in in subjects_in:
+        db_subject = Subject(**subject_in.dict(exclude={"study_id"}))
+        db_subject.created_by = current_user.email
+        db_subject.updated_by = current_user.email
+        db_subjects.append(db_subject)
+    # Inserted (flushed) before their links: nothing else orders the link rows after them
+    insert_with_ref_codes(session, db_subjects)
+    
+    results = []
+    stat_keys = []
+    for subject_in, db_subject in zip(subjects_in, db_subjects):
+        session.add(StudySubjectLink(study_id=subject_in.study_id, subject_id=db_subject.id))
+        stat_keys += subject_stat_keys(subject_in.study_id, db_subject)
+        
+        # Audit Log
+        log_change(
+            session=session,
+            table_name="subject",
+            record_id=db_subject.id,
+            action="INSERT",
+            changed_by=current_user.email,
+            new_state=snapshot(db_subject)
+        )
+        
+        s_read = SubjectRead.from_orm(db_subject)
+        s_read.study_id = subject_in.study_id
+        results.append(s_read)
+    
+    apply_stat_deltas(session, added=stat_keys)
+    session.commit()
+    return list_response(SubjectRead, results)
+
 @router.get("/", response_model=List[SubjectRead])
 def list_subjects(
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Lists all subjects with their primary study_id."""
-    statement = select(Subject)
+    """
+    Lists all subjects with their primary study_id.
+    Supports `If-None-Match` revalidation against a count/max(updated_at) ETag.
+    """
+    etag = collection_etag(session, select(Subject), Subject, *_link_version(session))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    # Load study links in one extra query instead of one per subject
+    statement = select(Subject).options(selectinload(Subject.studies))
     subjects = session.exec(statement).all()
     
     results = []
@@ -64,37 +157,129 @@ def list_subjects(
         if s.studies:
             s_read.study_id = s.studies[0].id
         results.append(s_read)
-    return results
+    return set_etag(list_response(SubjectRead, results), etag)
+
+@router.get("/search", response_model=List[SubjectSearchResult])
+def search_subjects(
+    q: str = Query(min_length=2, max_length=100),
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Type-ahead search over name, email, phone and ref code.
+    Substring and fuzzy (word similarity) matches are both served by the
+    `pg_trgm` GIN index; results are ranked and limited in the database.
+    """
+    term = q.strip().lower()
+    if len(term) < 2:
+        # Padding alone would otherwise turn into a match-everything pattern
+        return []
+    pattern = "%" + term.replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+    document = subject_search_document()
+    score = func.word_similarity(term, document)
+    statement = (
+        select(
+            Subject.id,
+            Subject.ref_code,
+            Subject.lastname,
+            Subject.firstname,
+            Subject.middlename,
+            score.label("score"),
+        )
+        .where(document.like(pattern, escape="/") | document.op("%>")(term))
+        .order_by(score.desc(), Subject.lastname, Subject.firstname)
+        .limit(limit)
+    )
+    rows = session.exec(statement).all()
+    return list_response(SubjectSearchResult, (dict(row._mapping) for row in rows))
+
+@router.get("/by-code/{ref_code}", response_model=SubjectRead)
+def get_subject_by_code(
+    ref_code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Returns a subject by its ref code (e.g. `su-A7B9X2`) using the unique index."""
+    subject = session.exec(select(Subject).where(Subject.ref_code == normalize_ref_code(ref_code))).first()
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    return to_subject_read(subject)
+
+@router.get("/{subject_id}/events", response_model=List[EventRead])
+def get_subject_events(
+    subject_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    order: Literal["asc", "desc"] = "asc",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns a subject's visit timeline ordered by start time.
+    Results are keyset-paged: pass the `X-Next-Cursor` response header back
+    as `cursor` to fetch the next page; the header is absent on the last page.
+    """
+    if not session.get(Subject, subject_id):
+        raise HTTPException(status_code=404, detail="Subject not found")
+    return event_timeline(session, Event.subject_id == subject_id, start, end, cursor, limit, order == "desc")
 
 @router.get("/{subject_id}", response_model=SubjectRead)
 def get_subject(
     subject_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Returns details for a specific subject with its primary study_id."""
-    subject = session.get(Subject, subject_id)
-    if not subject:
+    """
+    Returns details for a specific subject with its primary study_id,
+    or 304 if the client's ETag is current.
+    """
+    row = session.exec(select(Subject.updated_at, Subject.version).where(Subject.id == subject_id)).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Subject not found")
     
+    etag = record_etag("subject", subject_id, *row, *_link_version(session, subject_id))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    subject = session.get(Subject, subject_id)
     s_read = SubjectRead.from_orm(subject)
     if subject.studies:
         s_read.study_id = subject.studies[0].id
+    set_etag(response, etag)
     return s_read
 
 @router.patch("/{subject_id}", response_model=SubjectRead)
 def update_subject(
     subject_id: str,
     subject_in: SubjectUpdate,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Updates participant information and audits the change."""
+    """
+    Updates participant information and audits the change.
+    Requires an `If-Match` header with the subject's ETag (from GET): 428
+    without it, 409 if it no longer matches.
+    """
     db_subject = session.get(Subject, subject_id)
     if not db_subject:
         raise HTTPException(status_code=404, detail="Subject not found")
+    link_version = _link_version(session, subject_id)
+    check_if_match(
+        request,
+        record_etag("subject", subject_id, db_subject.updated_at, db_subject.version, *link_version),
+    )
     
-    prev_state = json.loads(db_subject.json())
+    prev_state = snapshot(db_subject)
+    study_ids = [study.id for study in db_subject.studies]
+    prev_stat_keys = [key for study_id in study_ids for key in subject_stat_keys(study_id, db_subject)]
     
     subject_data = subject_in.dict(exclude_unset=True)
     for key, value in subject_data.items():
@@ -104,6 +289,11 @@ def update_subject(
     db_subject.updated_by = current_user.email
     
     session.add(db_subject)
+    apply_stat_deltas(
+        session,
+        added=[key for study_id in study_ids for key in subject_stat_keys(study_id, db_subject)],
+        removed=prev_stat_keys,
+    )
     session.commit()
     session.refresh(db_subject)
     
@@ -115,11 +305,15 @@ def update_subject(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_subject.json())
+        new_state=snapshot(db_subject)
     )
     session.commit()
     
     s_read = SubjectRead.from_orm(db_subject)
     if db_subject.studies:
         s_read.study_id = db_subject.studies[0].id
+    set_etag(
+        response,
+        record_etag("subject", subject_id, db_subject.updated_at, db_subject.version, *link_version),
+    )
     return s_read
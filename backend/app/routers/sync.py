@@ -0,0 +1,181 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, select
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import selectinload
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import base64
+import json
+import uuid
+from app.database import get_session
+from app.models import INCLUDE_DELETED, AuditLog, Event, Procedure, Study, StudySubjectLink, Subject, User
+from app.schemas import ProcedureRead, StudyRead, SyncChanges, SyncResponse
+from app.auth import get_current_user
+from app.paging import decode_cursor, encode_cursor
+from app.routers.events import EventRead
+from app.routers.subjects import to_subject_read
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+# Entity name -> (table model, read schema)
+SYNC_TARGETS = {
+    "study": (Study, StudyRead),
+    "subject": (Subject, None), # Built with to_subject_read for study_id
+    "procedure": (Procedure, ProcedureRead),
+    "event": (Event, EventRead),
+}
+
+# Upper bound on changed and deleted records returned per entity per call
+MAX_SYNC_ROWS = 5000
+
+# `updated_at` is stamped before commit, so a transaction still in flight can
+# commit rows older than "now"; watermarks stay this far behind to catch them
+SYNC_LAG = timedelta(seconds=30)
+
+def parse_entities(entities: List[str]) -> List[str]:
+    """
+    Parses `entities` values (repeated or comma-separated) into entity names.
+
+    :param entities: Raw query values; empty means all entities.
+    :return: Entity names in `SYNC_TARGETS` order.
+    :raises HTTPException: 400 for unknown entities.
+    """
+    names = {name.strip() for value in entities for name in value.split(",") if name.strip()}
+    unknown = names - SYNC_TARGETS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot sync: {', '.join(sorted(unknown))}")
+    return [name for name in SYNC_TARGETS if not names or name in names]
+
+def _changed_statement(name: str, since: Optional[datetime], after: Optional[Tuple[datetime, uuid.UUID]] = None):
+    """
+    Select of records of one entity changed at or after `since`, oldest
+    first, including soft-deleted ones (deletion bumps `updated_at`).
+    Rows are ordered by `(updated_at, id)`; `after` skips those at or before
+    a position with a row comparison, as in app.paging.
+    """
+    model, _ = SYNC_TARGETS[name]
+    statement = select(model).order_by(model.updated_at, model.id)
+    if name == "subject":
+        statement = statement.options(selectinload(Subject.studies))
+    if after is not None:
+        statement = statement.where(tuple_(model.updated_at, model.id) > tuple_(*after))
+    if since is None:
+        # Full load: nothing to report as deleted
+        return statement
+    statement = statement.execution_options(**{INCLUDE_DELETED: True})
+    changed = model.updated_at >= since
+    if name == "subject":
+        # A subject's study_id also changes when it is linked or unlinked
+        linked = select(StudySubjectLink.subject_id).where(StudySubjectLink.joined_at >= since)
+        unlinked = select(AuditLog.prev_state["subject_id"].astext.cast(Subject.id.type)).where(
+            AuditLog.table_name == "studysubjectlink",
+            AuditLog.action == "UNLINK_SUBJECT",
+            AuditLog.changed_at >= since,
+        )
+        changed = or_(changed, Subject.id.in_(linked), Subject.id.in_(unlinked))
+    return statement.where(changed)
+
+def encode_sync_cursor(since: Optional[datetime], watermark: datetime, positions: Dict[str, Tuple[datetime, uuid.UUID]]) -> str:
+    """
+    Encodes the state of a truncated sync as an opaque cursor.
+
+    :param since: The `since` the sync started from (None for a full load).
+    :param watermark: Watermark to return once every entity is complete.
+    :param positions: `(updated_at, id)` of the last row returned, per
+        truncated entity; entities not listed are complete.
+    :return: URL-safe cursor string.
+    """
+    state = {
+        "since": since.isoformat() if since else None,
+        "watermark": watermark.isoformat(),
+        "after": {name: encode_cursor(*position) for name, position in positions.items()},
+    }
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+def decode_sync_cursor(cursor: str) -> Tuple[Optional[datetime], datetime, Dict[str, Tuple[datetime, uuid.UUID]]]:
+    """
+    Decodes a cursor produced by `encode_sync_cursor`.
+
+    :param cursor: The cursor from a previous sync.
+    :return: Tuple of (since, watermark, positions).
+    :raises HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        since = datetime.fromisoformat(state["since"]) if state["since"] else None
+        positions = {name: decode_cursor(position) for name, position in state["after"].items()}
+        if not positions.keys() <= SYNC_TARGETS.keys():
+            raise ValueError("unknown entity")
+        return since, datetime.fromisoformat(state["watermark"]), positions
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    entities: List[str] = Query(default=[]),
+    limit: int = Query(default=MAX_SYNC_ROWS, ge=1, le=MAX_SYNC_ROWS),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns records created, updated or deleted since a watermark so clients
+    can keep a local cache instead of reloading full lists.
+    Omit `since` for a full load, then pass back the returned `watermark`.
+    Changes and (soft) deletions both come from an `updated_at` index range
+    per table. Watermarks lag slightly behind, so a
+    record may be returned again; apply changes as upserts keyed by `id`
+    (newer `version` wins). When `has_more` is true, sync again right away,
+    passing back both `watermark` and `cursor`. The cursor keeps each
+    truncated entity's own `(updated_at, id)` position, so rows are never
+    skipped or returned twice and every call makes progress; entities that
+    were complete are not queried again. While `has_more`, the watermark is
+    never below `since`.
+    """
+    names = parse_entities(entities)
+    if cursor:
+        # Continue the original sync; its positions only hold for its `since`
+        since, watermark, positions = decode_sync_cursor(cursor)
+    else:
+        watermark = datetime.utcnow() - SYNC_LAG
+        if since is not None:
+            watermark = max(watermark, since)
+        positions = {}
+    # Last row returned by each truncated entity
+    resume_after = {}
+
+    changes = {}
+    for name in names:
+        model, schema = SYNC_TARGETS[name]
+        if cursor and name not in positions:
+            # Completed on an earlier page
+            changes[name] = SyncChanges(changed=[], deleted=[])
+            continue
+        records = session.exec(_changed_statement(name, since, positions.get(name)).limit(limit + 1)).all()
+        if len(records) > limit:
+            records = records[:limit]
+            resume_after[name] = (records[-1].updated_at, records[-1].id)
+
+        changes[name] = SyncChanges(
+            changed=[
+                (to_subject_read(record) if model is Subject else schema.model_validate(record, from_attributes=True)).model_dump(mode="json")
+                for record in records
+                if record.deleted_at is None
+            ],
+            deleted=[record.id for record in records if record.deleted_at is not None],
+        )
+
+    if not resume_after:
+        return SyncResponse(watermark=watermark, has_more=False, changes=changes)
+    # Safe to resume from even without the cursor: nothing unreturned is older, except
+    # link-matched subjects, whose `updated_at` may predate `since`
+    resume_watermark = min(position[0] for position in resume_after.values())
+    if since is not None:
+        resume_watermark = max(since, resume_watermark)
+    return SyncResponse(
+        watermark=resume_watermark,
+        has_more=True,
+        cursor=encode_sync_cursor(since, watermark, resume_after),
+        changes=changes,
+    )
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 from typing import List
-import json
 
 from app.database import get_session
 from app.models import User
 from app.auth import get_current_user, admin_required, get_password_hash
 from app.schemas import UserCreate, UserUpdate, UserRead
-from app.audit import log_change
+from app.audit import log_change, snapshot
+from app.serialization import list_response
+from app.utils import normalize_ref_code
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -19,7 +20,19 @@ def list_users(
     """Lists all users (Administrator only)."""
     statement = select(User)
     results = session.exec(statement).all()
-    return results
+    return list_response(UserRead, results)
+
+@router.get("/by-code/{ref_code}", response_model=UserRead)
+def get_user_by_code(
+    ref_code: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(admin_required(2))
+):
+    """Returns a user by its ref code (e.g. `us-A7B9X2`) (Administrator only)."""
+    user = session.exec(select(User).where(User.ref_code == normalize_ref_code(ref_code))).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def create_user(
@@ -67,7 +80,7 @@ def create_user(
         record_id=db_user.id,
         action="INSERT",
         changed_by=current_user.email,
-        new_state=json.loads(db_user.json())
+        new_state=snapshot(db_user)
     )
     session.commit()
     
@@ -85,7 +98,7 @@ def update_user(
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    prev_state = json.loads(db_user.json())
+    prev_state = snapshot(db_user)
     
     update_data = user_in.dict(exclude_unset=True)
     
@@ -113,7 +126,7 @@ def update_user(
         action="UPDATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_user.json())
+        new_state=snapshot(db_user)
     )
     session.commit()
     
@@ -131,7 +144,7 @@ def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Instead of hard delete, we'll set status to inactive
-    prev_state = json.loads(db_user.json())
+    prev_state = snapshot(db_user)
     db_user.status = "inactive"
     db_user.updated_by = current_user.email
     
@@ -146,7 +159,7 @@ def delete_user(
         action="DEACTIVATE",
         changed_by=current_user.email,
         prev_state=prev_state,
-        new_state=json.loads(db_user.json())
+        new_state=snapshot(db_user)
     )
     session.commit()
     
@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.models import RESOURCE_KEY, Event, event_period, event_resource
+from app.schemas import EventConflict
+
+# Statuses that no longer occupy their time slot
+INACTIVE_STATUSES = ("cancelled",)
+
+
+def conflict_statement():
+    """
+    Self-join pairing events with other active events whose time ranges
+    overlap (`&&`) and that share the subject or the booked resource.
+
+    Each side of the join is answered by `ix_event_subject_period` or
+    `ix_event_resource_period`, so one statement finds every conflict
+    regardless of how many events exist.
+
+    Callers restrict the `candidate` side to the events they want checked.
+
+    :return: Tuple of (select producing `EventConflict` rows, candidate alias, other alias).
+    """
+    candidate = aliased(Event, name="candidate")
+    other = aliased(Event, name="other")
+    candidate_period, other_period = event_period(candidate), event_period(other)
+    same_subject = other.subject_id == candidate.subject_id
+    same_resource = and_(
+        candidate.metadata_blob.has_key(RESOURCE_KEY),
+        other.metadata_blob.has_key(RESOURCE_KEY),
+        event_resource(other) == event_resource(candidate),
+    )
+    overlap = candidate_period * other_period
+    return (
+        select(
+            candidate.id.label("event_id"),
+            candidate.ref_code.label("event_ref_code"),
+            other.id.label("other_id"),
+            other.ref_code.label("other_ref_code"),
+            case((same_subject, "subject"), else_="resource").label("kind"),
+            candidate.subject_id,
+            event_resource(candidate).label("resource"),
+            func.lower(overlap).label("overlap_start"),
+            func.upper(overlap).label("overlap_end"),
+        )
+        .join(other, and_(
+            other.id != candidate.id,
+            other.status.not_in(INACTIVE_STATUSES),
+            other_period.op("&&")(candidate_period),
+            or_(same_subject, same_resource),
+        ))
+        .where(candidate.status.not_in(INACTIVE_STATUSES))
+        .order_by(func.lower(overlap), candidate.id, other.id)
+    ), candidate, other
+
+
+def find_conflicts(session: Session, start: datetime, end: datetime, study_id: Optional[uuid.UUID] = None) -> List[EventConflict]:
+    """
+    Lists every pair of overlapping events where the first starts in `[start, end)`.
+
+    Each pair is reported once (the event with the lower ID first).
+
+    :param session: Active database session.
+    :param start: Window start (UTC).
+    :param end: Window end (UTC).
+    :param study_id: Only check events of this study (the other side may be in any study).
+    :return: The conflicts, ordered by when the overlap begins.
+    """
+    statement, candidate, other = conflict_statement()
+    statement = statement.where(
+        candidate.start_datetime >= start,
+        candidate.start_datetime < end,
+        # Report a pair once, unless its other event starts outside the window
+        or_(candidate.id < other.id, other.start_datetime < start, other.start_datetime >= end),
+    )
+    if study_id:
+        statement = statement.where(candidate.study_id == study_id)
+    return [EventConflict.model_validate(dict(row)) for row in session.execute(statement).mappings()]
+
+
+def ensure_no_conflicts(session: Session, event_ids: Iterable[uuid.UUID]) -> None:
+    """
+    Raises 409 if any of the given (already flushed) events overlaps another
+    active event of the same subject or booking the same resource.
+
+    Takes a transaction-level advisory lock per subject and resource first, so
+    concurrent writers to the same schedule are checked one after the other:
+    the second one sees the first one's committed event.
+
+    :param session: Active database session.
+    :param event_ids: IDs of the events just inserted or updated.
+    :raises HTTPException: 409 listing the conflicting ref codes.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return
+    keys = session.exec(
+        select(Event.subject_id, event_resource()).where(Event.id.in_(event_ids))
+    ).all()
+    lock_keys = sorted(
+        {f"subject:{subject_id}" for subject_id, _ in keys}
+        | {f"resource:{resource}" for _, resource in keys if resource is not None}
+    )
+    for key in lock_keys:
+        session.exec(select(func.pg_advisory_xact_lock(func.hashtext(f"event-schedule:{key}"))))
+
+    statement, candidate, _ = conflict_statement()
+    conflicts = session.execute(statement.where(candidate.id.in_(event_ids))).mappings().all()
+    if conflicts:
+        raise HTTPException(status_code=409, detail={
+            "message": "Event overlaps existing events; pass allow_overlap=true to book anyway",
+            "conflicts": [
+                {"event": row["event_ref_code"], "conflicts_with": row["other_ref_code"], "kind": row["kind"]}
+                for row in conflicts
+            ],
+        })
+
+
+def schedule_key(event: Event) -> tuple:
+    """
+    The fields that decide which slot an event occupies.
+
+    Updates leaving this unchanged skip the conflict check, so editing notes
+    or form data of an event booked with `allow_overlap` does not fail.
+
+    :param event: The event, with values as loaded from the database.
+    :return: Tuple of (subject, start, end, active, resource).
+    """
+    return (
+        event.subject_id,
+        event.start_datetime,
+        event.end_datetime,
+        event.status not in INACTIVE_STATUSES,
+        (event.metadata_blob or {}).get(RESOURCE_KEY),
+    )
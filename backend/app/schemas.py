@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, EmailStr
 import uuid
@@ -24,6 +24,7 @@ class StudyUpdate(BaseModel):
 class StudyRead(StudyBase):
     id: uuid.UUID
     ref_code: str
+    version: int
     created_at: datetime
     updated_at: datetime
     created_by: str
@@ -57,6 +58,7 @@ class SubjectUpdate(BaseModel):
 class SubjectRead(SubjectBase):
     id: uuid.UUID
     ref_code: str
+    version: int
     unique_uuid: uuid.UUID
     study_id: Optional[uuid.UUID] = None # For frontend display, we will populate this with the first study found
     created_at: datetime
@@ -65,6 +67,15 @@ class SubjectRead(SubjectBase):
     class Config:
         from_attributes = True
 
+class SubjectSearchResult(BaseModel):
+    # Deliberately omits contact details and birthdate; fetch the subject for those
+    id: uuid.UUID
+    ref_code: str
+    lastname: str
+    firstname: str
+    middlename: Optional[str] = None
+    score: float
+
 # --- Procedure Schemas ---
 class ProcedureBase(BaseModel):
     study_id: uuid.UUID
@@ -85,6 +96,7 @@ class ProcedureUpdate(BaseModel):
 class ProcedureRead(ProcedureBase):
     id: uuid.UUID
     ref_code: str
+    version: int
     created_at: datetime
 
     class Config:
@@ -124,6 +136,7 @@ class UserUpdate(BaseModel):
 class UserRead(UserBase):
     id: uuid.UUID
     ref_code: str
+    version: int
     created_at: datetime
     updated_at: datetime
 
@@ -138,3 +151,79 @@ class MFASetupResponse(BaseModel):
 class MFAVerify(BaseModel):
     code: str
     mfa_token: Optional[str] = None # Used for login stage 2
+
+# --- Lookup Schemas ---
+class RefCodeLookup(BaseModel):
+    entity: str # study, subject, event, procedure, user
+    id: uuid.UUID
+    ref_code: str
+    data: Dict[str, Any] # The entity's read schema
+
+# --- Study Statistics Schemas ---
+class ProcedureCount(BaseModel):
+    procedure_id: uuid.UUID
+    name: Optional[str] = None
+    count: int
+
+class WeekCount(BaseModel):
+    week_start: date # Monday of the week
+    count: int
+
+class StudyStats(BaseModel):
+    study_id: uuid.UUID
+    enrolled_subjects: int
+    total_events: int
+    events_by_status: Dict[str, int]
+    events_by_procedure: List[ProcedureCount]
+    events_by_week: List[WeekCount]
+    completion_rate: float # completed / events no longer pending
+    no_show_rate: float # no_show / events no longer pending
+    sex_distribution: Dict[str, int]
+    age_distribution: Dict[str, int]
+
+# --- Scheduling Schemas ---
+class EventConflict(BaseModel):
+    event_id: uuid.UUID
+    event_ref_code: str
+    other_id: uuid.UUID
+    other_ref_code: str
+    kind: str # subject, resource
+    subject_id: uuid.UUID # Subject of `event_id`
+    resource: Optional[str] = None # Resource booked by `event_id`
+    overlap_start: datetime
+    overlap_end: datetime
+
+# --- Sync Schemas ---
+class SyncChanges(BaseModel):
+    changed: List[Dict[str, Any]] # Read schema of each record created or updated
+    deleted: List[uuid.UUID]
+
+class SyncResponse(BaseModel):
+    watermark: datetime # Pass back as `since` on the next sync
+    has_more: bool # More changes are waiting; sync again right away
+    cursor: Optional[str] = None # With has_more: pass back as `cursor` together with `since`
+    changes: Dict[str, SyncChanges] # By entity: study, subject, procedure, event
+
+# --- Job Schemas ---
+class JobCreate(BaseModel):
+    kind: str # e.g. export_study
+    params: Dict[str, Any] = {}
+
+class JobRead(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str # pending, running, completed, failed, cancelled
+    params: Dict[str, Any]
+    total: int
+    processed: int
+    result: Dict[str, Any]
+    result_location: Optional[str] = None # Download from GET /jobs/{id}/result
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_by: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
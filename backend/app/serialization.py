@@ -0,0 +1,29 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """Returns a cached TypeAdapter for `List[schema]`."""
+    return TypeAdapter(List[schema])
+
+
+def list_response(schema: Type[BaseModel], rows: Iterable[Any]) -> Response:
+    """
+    Validates ORM rows against a read schema and encodes them in one pass.
+
+    Returning a `Response` directly skips FastAPI's `response_model`
+    re-validation and the intermediate list of dicts, so each row is
+    validated once and written straight to JSON bytes. Routes should still
+    declare `response_model` for the OpenAPI schema.
+
+    :param schema: The pydantic read schema (e.g. `StudyRead`).
+    :param rows: ORM objects or schema instances.
+    :return: A JSON response.
+    """
+    adapter = _list_adapter(schema)
+    items = adapter.validate_python(list(rows), from_attributes=True)
+    return Response(content=adapter.dump_json(items), media_type="application/json")
@@ -0,0 +1,224 @@
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.models import INCLUDE_DELETED, Event, Procedure, StudyStat, Subject
+from app.schemas import ProcedureCount, StudyStats, WeekCount
+
+# A counter row: (study_id, dimension, key)
+StatKey = Tuple[uuid.UUID, str, str]
+
+# Event dimensions
+STATUS = "status"
+PROCEDURE = "procedure"
+WEEK = "week"
+# Enrolled-subject dimensions
+ENROLLED = "enrolled"
+SEX = "sex"
+BIRTH_YEAR = "birth_year"
+
+# (source, study ID column, live-row condition) for rebuilding the counters
+EVENT_ROWS = ("event", "event.study_id", "event.deleted_at IS NULL")
+ENROLLMENT_ROWS = (
+    "studysubjectlink JOIN subject ON subject.id = studysubjectlink.subject_id",
+    "studysubjectlink.study_id",
+    "subject.deleted_at IS NULL",
+)
+
+# (dimension, key expression, rows): the GROUP BY queries the studystat
+# migration backfilled with; keys must match the `*_stat_keys` functions
+STAT_QUERIES = (
+    (STATUS, "status", EVENT_ROWS),
+    (PROCEDURE, "procedure_id::text", EVENT_ROWS),
+    (WEEK, "to_char(date_trunc('week', start_datetime), 'YYYY-MM-DD')", EVENT_ROWS),
+    (ENROLLED, "''", ENROLLMENT_ROWS),
+    (SEX, "coalesce(sex, 'unknown')", ENROLLMENT_ROWS),
+    (BIRTH_YEAR, "extract(year FROM birthdate)::int::text", ENROLLMENT_ROWS),
+)
+
+# (label, lowest age, highest age) for the age distribution
+AGE_BANDS = (
+    ("<18", 0, 17),
+    ("18-29", 18, 29),
+    ("30-44", 30, 44),
+    ("45-64", 45, 64),
+    ("65+", 65, None),
+)
+
+
+def week_start(moment: datetime) -> date:
+    """
+    Returns the Monday of the week containing `moment`.
+
+    Matches Postgres `date_trunc('week', ...)`, which the migration uses to
+    backfill the counters.
+    """
+    day = moment.date()
+    return day - timedelta(days=day.weekday())
+
+
+def event_stat_keys(event: Event) -> List[StatKey]:
+    """
+    Lists the counters an event contributes to.
+
+    :param event: The event as stored (or as it was before a change).
+    :return: One key per event dimension.
+    """
+    return [
+        (event.study_id, STATUS, event.status),
+        (event.study_id, PROCEDURE, str(event.procedure_id)),
+        (event.study_id, WEEK, week_start(event.start_datetime).isoformat()),
+    ]
+
+
+def subject_stat_keys(study_id: uuid.UUID, subject: Subject) -> List[StatKey]:
+    """
+    Lists the counters a subject enrolled in a study contributes to.
+
+    :param study_id: The study the subject is linked to.
+    :param subject: The subject as stored (or as it was before a change).
+    :return: One key per enrollment dimension.
+    """
+    return [
+        (study_id, ENROLLED, ""),
+        (study_id, SEX, subject.sex or "unknown"),
+        (study_id, BIRTH_YEAR, str(subject.birthdate.year)),
+    ]
+
+
+def apply_stat_deltas(
+    session: Session,
+    added: Iterable[StatKey] = (),
+    removed: Iterable[StatKey] = (),
+) -> None:
+    """
+    Adjusts the study counters in the caller's transaction.
+
+    All deltas are applied with one `INSERT ... ON CONFLICT DO UPDATE SET
+    count = count + excluded.count`, so concurrent writers to the same study
+    only contend on the rows they change. Keys that appear in both `added`
+    and `removed` (e.g. an update that leaves the status alone) cancel out
+    and are not written; rows are written in key order so that concurrent
+    transactions lock them in the same order.
+
+    :param session: Active database session.
+    :param added: Counters to increment by one per occurrence.
+    :param removed: Counters to decrement by one per occurrence.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    rows = [
+        {"study_id": study_id, "dimension": dimension, "key": key, "count": count}
+        for (study_id, dimension, key), count in sorted(deltas.items(), key=lambda item: tuple(map(str, item[0])))
+        if count
+    ]
+    if not rows:
+        return
+
+    statement = insert(StudyStat).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[StudyStat.study_id, StudyStat.dimension, StudyStat.key],
+        set_={"count": StudyStat.count + statement.excluded.count},
+    )
+    session.exec(statement)
+
+
+def rebuild_study_stats(session: Session, study_id: uuid.UUID) -> None:
+    """
+    Recomputes a study's counters from its events and enrolled subjects.
+
+    Replaces the study's rows in the caller's transaction, e.g. to repair
+    counters after rows were changed outside the API. Soft-deleted events
+    and subjects are not counted.
+
+    :param session: Active database session.
+    :param study_id: The study's ID.
+    """
+    session.execute(delete(StudyStat).where(StudyStat.study_id == study_id))
+    for dimension, key, (source, study_column, live) in STAT_QUERIES:
+        session.execute(
+            text(
+                f"INSERT INTO studystat (study_id, dimension, key, count) "
+                f"SELECT {study_column}, :dimension, {key}, count(*) FROM {source} "
+                f"WHERE {study_column} = :study_id AND {live} GROUP BY 1, 3"
+            ),
+            {"dimension": dimension, "study_id": study_id},
+        )
+
+
+def _rate(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def _age_band(age: int) -> Optional[str]:
+    for label, lowest, highest in AGE_BANDS:
+        if age >= lowest and (highest is None or age <= highest):
+            return label
+    return None
+
+
+def study_stats(session: Session, study_id: uuid.UUID, today: Optional[date] = None) -> StudyStats:
+    """
+    Builds the dashboard statistics of a study from its counter rows.
+
+    Completion and no-show rates are relative to events that are no longer
+    pending. Ages are derived from birth years, so they may be one year
+    high for subjects whose birthday has not yet come this year.
+
+    :param session: Active database session.
+    :param study_id: The study's ID.
+    :param today: Reference date for ages (defaults to today).
+    :return: The study's statistics.
+    """
+    counters: Dict[str, Dict[str, int]] = {}
+    rows = session.exec(
+        select(StudyStat.dimension, StudyStat.key, StudyStat.count)
+        .where(StudyStat.study_id == study_id, StudyStat.count != 0)
+    ).all()
+    for dimension, key, count in rows:
+        counters.setdefault(dimension, {})[key] = count
+
+    by_status = counters.get(STATUS, {})
+    total_events = sum(by_status.values())
+    concluded = total_events - by_status.get("pending", 0)
+
+    by_procedure = counters.get(PROCEDURE, {})
+    names = dict(session.exec(
+        select(Procedure.id, Procedure.name)
+        .where(Procedure.id.in_([uuid.UUID(key) for key in by_procedure]))
+        .execution_options(**{INCLUDE_DELETED: True})
+    ).all()) if by_procedure else {}
+
+    year = (today or date.today()).year
+    age_distribution = {label: 0 for label, _, _ in AGE_BANDS}
+    for birth_year, count in counters.get(BIRTH_YEAR, {}).items():
+        band = _age_band(year - int(birth_year))
+        if band:
+            age_distribution[band] += count
+
+    return StudyStats(
+        study_id=study_id,
+        enrolled_subjects=counters.get(ENROLLED, {}).get("", 0),
+        total_events=total_events,
+        events_by_status=dict(sorted(by_status.items())),
+        events_by_procedure=sorted(
+            (
+                ProcedureCount(procedure_id=key, name=names.get(uuid.UUID(key)), count=count)
+                for key, count in by_procedure.items()
+            ),
+            key=lambda item: (-item.count, item.name or ""),
+        ),
+        events_by_week=[
+            WeekCount(week_start=date.fromisoformat(key), count=count)
+            for key, count in sorted(counters.get(WEEK, {}).items())
+        ],
+        completion_rate=_rate(by_status.get("completed", 0), concluded),
+        no_show_rate=_rate(by_status.get("no_show", 0), concluded),
+        sex_distribution=dict(sorted(counters.get(SEX, {}).items())),
+        age_distribution=age_distribution,
+    )
@@ -1,10 +1,20 @@
 import secrets
 import uuid
+from typing import Dict, Iterable, List, Optional
 from uuid6 import uuid7 as v7_generator
 
 # Custom alphabet excluding ambiguous chars (0/O, 1/I)
 ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
 
+# Ref code prefixes and the entity (table) each one identifies
+REF_CODE_PREFIXES = {
+    "st-": "study",
+    "su-": "subject",
+    "ev-": "event",
+    "pr-": "procedure",
+    "us-": "user",
+}
+
 def generate_short_code(length: int = 6, prefix: str = "", use_mid_hyphen: bool = False) -> str:
     """
     Generates a readable code with optional prefix and middle hyphen.
@@ -21,6 +31,50 @@ def generate_short_code(length: int = 6, prefix: str = "", use_mid_hyphen: bool
         code = f"{code[:mid]}-{code[mid:]}"
     return f"{prefix}{code}"
 
+def generate_short_codes(count: int, length: int = 6, prefix: str = "", exclude: Iterable[str] = ()) -> List[str]:
+    """
+    Generates `count` distinct codes in one call.
+    
+    :param count: Number of codes to generate.
+    :param length: Length of the alphanumeric part.
+    :param prefix: Optional string prefix (e.g., 'ev-').
+    :param exclude: Codes that must not be returned (e.g. already allocated).
+    :return: A list of unique codes, none of which appear in `exclude`.
+    """
+    excluded = set(exclude)
+    codes: Dict[str, None] = {}  # Insertion-ordered set
+    while len(codes) < count:
+        code = generate_short_code(length=length, prefix=prefix)
+        if code not in excluded:
+            codes[code] = None
+    return list(codes)
+
+def normalize_ref_code(code: str) -> str:
+    """
+    Normalizes a typed or scanned ref code to its stored form.
+    Example: ' st-a7b9x2 ' -> 'st-A7B9X2'.
+    
+    Codes are stored with a lowercase prefix and an uppercase body, so
+    normalizing lets lookups use the unique `ref_code` index with equality.
+    
+    :param code: The code as entered by the user.
+    :return: The normalized code.
+    """
+    code = code.strip()
+    prefix = code[:3].lower()
+    if prefix in REF_CODE_PREFIXES:
+        return f"{prefix}{code[3:].upper()}"
+    return code.upper()
+
+def ref_code_entity(code: str) -> Optional[str]:
+    """
+    Returns the entity type identified by a ref code's prefix.
+    
+    :param code: A ref code such as 'su-K3M9PQ'.
+    :return: The entity name (e.g. 'subject'), or None for unknown prefixes.
+    """
+    return REF_CODE_PREFIXES.get(code.strip()[:3].lower())
+
 def uuid7() -> uuid.UUID:
     """
     Generates a time-sortable UUID v7.
@@ -0,0 +1,180 @@
+import uuid
+from datetime import date, datetime
+from typing import Annotated, Any, Dict, Iterable, List, Literal, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, ValidationError, create_model
+from sqlmodel import Session, select
+
+from app.models import Procedure
+
+# Maps DynamicForm field types (see frontend DynamicForm.tsx) to Python types.
+FIELD_TYPES: Dict[str, Any] = {
+    "text": str,
+    "number": float,
+    "date": date,
+}
+
+# Compiled validators keyed by procedure id. Each entry remembers the
+# procedure's `updated_at` so a schema edited by another worker is detected.
+_validator_cache: Dict[uuid.UUID, Tuple[Optional[datetime], Optional[Type[BaseModel]]]] = {}
+
+
+def _blank_to_none(value: Any) -> Any:
+    # DynamicForm sends "" for a blank "Select an option" or a cleared date input
+    return None if value == "" else value
+
+
+def _field_definition(field: Dict[str, Any]) -> Tuple[Any, Any]:
+    """
+    Builds the pydantic (type, default) pair for a single form field.
+
+    :param field: Field definition from `form_data_schema["fields"]`.
+    :return: Tuple usable as a `create_model` field definition.
+    """
+    field_type = field.get("type", "text")
+    if field_type == "select" and field.get("options"):
+        python_type: Any = Literal[tuple(field["options"])]
+    else:
+        python_type = FIELD_TYPES.get(field_type, Any)
+
+    if field.get("required"):
+        if python_type is str:
+            return (str, Field(min_length=1))
+        return (python_type, ...)
+    return (Annotated[Optional[python_type], BeforeValidator(_blank_to_none)], None)
+
+
+def compile_form_schema(form_data_schema: Dict[str, Any]) -> Optional[Type[BaseModel]]:
+    """
+    Compiles a procedure's `form_data_schema` into a pydantic model.
+
+    Keys the schema does not declare are ignored rather than rejected:
+    events keep data for fields later removed from the procedure, and the
+    UI sends that data back on every save.
+
+    :param form_data_schema: Schema of the form `{"fields": [...]}`.
+    :return: A pydantic model class, or None if the schema declares no fields.
+    """
+    fields = (form_data_schema or {}).get("fields") or []
+    if not fields:
+        return None
+
+    definitions = {
+        field["name"]: _field_definition(field)
+        for field in fields
+        if field.get("name")
+    }
+    return create_model(
+        "ProcedureData",
+        __config__=ConfigDict(extra="ignore"),
+        **definitions,
+    )
+
+
+def get_procedure_validator(procedure: Procedure) -> Optional[Type[BaseModel]]:
+    """
+    Returns the compiled validator for a procedure, compiling it on first use.
+
+    :param procedure: The procedure whose schema should be enforced.
+    :return: A pydantic model class, or None if no validation is required.
+    """
+    cached = _validator_cache.get(procedure.id)
+    if cached and cached[0] == procedure.updated_at:
+        return cached[1]
+
+    validator = compile_form_schema(procedure.form_data_schema)
+    _validator_cache[procedure.id] = (procedure.updated_at, validator)
+    return validator
+
+
+def invalidate_procedure_validator(procedure_id: uuid.UUID) -> None:
+    """
+    Drops the cached validator for a procedure after its schema changes.
+
+    :param procedure_id: ID of the modified procedure.
+    """
+    _validator_cache.pop(procedure_id, None)
+
+
+def validate_procedure_data(
+    procedure: Procedure,
+    procedure_data: Dict[str, Any],
+    loc_prefix: Tuple[Any, ...] = ("body", "procedure_data"),
+) -> None:
+    """
+    Validates `procedure_data` against the procedure's form schema.
+
+    :param procedure: The procedure the event records.
+    :param procedure_data: The submitted form data.
+    :param loc_prefix: Error location prefix reported to the client.
+    :raises HTTPException: 422 with pydantic-style error details.
+    """
+    validator = get_procedure_validator(procedure)
+    if validator is None:
+        return
+    try:
+        validator.model_validate(procedure_data or {})
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                {**error, "loc": [*loc_prefix, *error["loc"]]}
+                for error in e.errors(include_url=False, include_context=False)
+            ],
+        )
+
+
+def load_procedure(session: Session, procedure_id: Any) -> Procedure:
+    """
+    Fetches the procedure referenced by an event.
+
+    :param session: Active database session.
+    :param procedure_id: ID of the procedure.
+    :return: The procedure.
+    :raises HTTPException: 422 if the procedure does not exist.
+    """
+    procedure = session.get(Procedure, procedure_id)
+    if not procedure:
+        raise HTTPException(status_code=422, detail="Procedure not found")
+    return procedure
+
+
+def validate_event_batch(
+    session: Session,
+    rows: Iterable[Tuple[uuid.UUID, Dict[str, Any]]],
+) -> None:
+    """
+    Validates many `(procedure_id, procedure_data)` pairs at once.
+
+    All referenced procedures are loaded in a single query and each schema
+    is compiled at most once, so batch imports do not pay per-row costs.
+
+    :param session: Active database session.
+    :param rows: Pairs of procedure ID and submitted form data.
+    :raises HTTPException: 422 naming the offending row index.
+    """
+    rows = list(rows)
+    procedure_ids = {procedure_id for procedure_id, _ in rows}
+    procedures = {
+        p.id: p
+        for p in session.exec(select(Procedure).where(Procedure.id.in_(procedure_ids))).all()
+    }
+
+    errors: List[Dict[str, Any]] = []
+    for index, (procedure_id, procedure_data) in enumerate(rows):
+        procedure = procedures.get(procedure_id)
+        if procedure is None:
+            errors.append({
+                "type": "missing_procedure",
+                "loc": ["body", index, "procedure_id"],
+                "msg": "Procedure not found",
+            })
+            continue
+        try:
+            validate_procedure_data(procedure, procedure_data, ("body", index, "procedure_data"))
+        except HTTPException as e:
+            errors.extend(e.detail)
+
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
@@ -0,0 +1,58 @@
+"""
+Background job worker:
+
+    python -m app.worker
+
+Claims and runs jobs from the `job` table one at a time (see app.jobs);
+run several processes for parallelism. SIGTERM/SIGINT let the current job
+finish before exiting; a worker killed mid-job stops heartbeating and its
+job is reclaimed by another worker after JOB_STALE_SECONDS.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+
+from sqlmodel import Session
+
+from app.database import get_engine, get_settings
+from app.jobs import claim_next_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    settings = get_settings()
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        logger.info("Stopping after the current job")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Worker %s started", worker)
+    engine = get_engine()
+    while not stopping.is_set():
+        try:
+            with Session(engine) as session:
+                job = claim_next_job(session, worker)
+                if job is not None:
+                    logger.info("Running job %s (%s)", job.id, job.kind)
+                    run_job(session, job)
+                    logger.info("Job %s %s", job.id, job.status)
+                    continue
+        except Exception:
+            logger.exception("Worker loop failed")
+        stopping.wait(settings.JOB_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
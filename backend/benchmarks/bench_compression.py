@@ -0,0 +1,76 @@
+"""
+Benchmark for response compression of the calendar (`GET /events/`) payload.
+
+Encodes a realistic event list with each enabled encoding through the same
+encoders used by `CompressionMiddleware`, then estimates end-to-end latency
+over constrained links as: RTT + compress + size / bandwidth + decompress.
+
+Usage: python benchmarks/bench_compression.py [events]
+"""
+import gzip
+import sys
+import time
+from os.path import abspath, dirname
+
+# Add backend directory to sys.path
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from app.compression import CompressionMiddleware, available_encodings, brotli, zstandard
+from app.routers.events import EventRead
+from app.serialization import list_response
+from bench_serialization import make_events
+
+# (label, bandwidth in bits/s, round-trip time in seconds)
+LINKS = [
+    ("3G (1.6 Mbit/s, 150 ms)", 1.6e6, 0.150),
+    ("hospital Wi-Fi (10 Mbit/s, 30 ms)", 10e6, 0.030),
+    ("LAN (100 Mbit/s, 2 ms)", 100e6, 0.002),
+]
+
+DECOMPRESSORS = {
+    "identity": lambda data: data,
+    "gzip": gzip.decompress,
+    "br": lambda data: brotli.decompress(data),
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+def timed(func, *args, repeat: int = 5):
+    """Returns (result, best wall time in seconds)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payload = list_response(EventRead, make_events(count)).body
+    middleware = CompressionMiddleware(app=None)
+
+    results = [("identity", len(payload), 0.0, 0.0)]
+    for encoding in available_encodings():
+        encode = lambda body: middleware.factories[encoding]().finish(body)
+        compressed, encode_time = timed(encode, payload)
+        _, decode_time = timed(DECOMPRESSORS[encoding], compressed)
+        results.append((encoding, len(compressed), encode_time, decode_time))
+
+    print(f"Calendar payload: {count} events, {len(payload) / 1024:.1f} KiB uncompressed\n")
+    print(f"{'encoding':<10} {'size KiB':>10} {'ratio':>7} {'enc ms':>8} {'dec ms':>8}")
+    for encoding, size, encode_time, decode_time in results:
+        print(
+            f"{encoding:<10} {size / 1024:>10.1f} {len(payload) / size:>7.1f} "
+            f"{encode_time * 1e3:>8.2f} {decode_time * 1e3:>8.2f}"
+        )
+
+    for label, bandwidth, rtt in LINKS:
+        print(f"\nEstimated end-to-end latency over {label}")
+        for encoding, size, encode_time, decode_time in results:
+            total = rtt + encode_time + size * 8 / bandwidth + decode_time
+            print(f"  {encoding:<10} {total * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for per-row serialization cost of list endpoints and audit snapshots.
+
+Compares the previous path (stdlib JSON, `json.loads(obj.json())` snapshots,
+FastAPI `response_model` validation) with the current one (`model_dump`
+snapshots, single-pass `TypeAdapter` encoding, orjson default responses).
+
+Usage: python benchmarks/bench_serialization.py [rows]
+"""
+import json
+import sys
+import timeit
+import uuid
+import warnings
+from datetime import datetime, timedelta
+from os.path import abspath, dirname
+
+# Add backend directory to sys.path
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.audit import snapshot
+from app.models import Event
+from app.routers.events import EventRead
+from app.serialization import list_response
+
+warnings.filterwarnings("ignore")
+
+
+def make_events(count: int):
+    """Builds in-memory events resembling a calendar payload."""
+    start = datetime(2026, 1, 5, 9, 0)
+    study_id, subject_id, procedure_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    return [
+        Event(
+            study_id=study_id,
+            subject_id=subject_id,
+            procedure_id=procedure_id,
+            start_datetime=start + timedelta(hours=i),
+            end_datetime=start + timedelta(hours=i, minutes=30),
+            status="completed",
+            notes="Routine follow-up visit",
+            metadata_blob={"site": "QMH", "room": i % 12},
+            procedure_data={"bp_systolic": 120 + i % 30, "bp_diastolic": 80, "arm": "left"},
+        )
+        for i in range(count)
+    ]
+
+
+def old_list(events):
+    """FastAPI response_model path: validate, dump to dicts, stdlib json.dumps."""
+    adapter = TypeAdapter(list[EventRead])
+    items = adapter.validate_python(events, from_attributes=True)
+    return json.dumps(adapter.dump_python(items, mode="json")).encode()
+
+
+def new_list(events):
+    """Single-pass validation and encoding."""
+    return list_response(EventRead, events).body
+
+
+def old_snapshot(events):
+    return [json.loads(e.json()) for e in events]
+
+
+def new_snapshot(events):
+    return [snapshot(e) for e in events]
+
+
+def orjson_snapshot(events):
+    return orjson.dumps([snapshot(e) for e in events])
+
+
+def report(label: str, func, events, repeat: int = 5) -> float:
+    best = min(timeit.repeat(lambda: func(events), number=1, repeat=repeat))
+    per_row_us = best / len(events) * 1e6
+    print(f"{label:<32} {per_row_us:8.2f} us/row")
+    return per_row_us
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    events = make_events(rows)
+    print(f"Serializing {rows} events (best of 5)\n")
+
+    before = report("list: response_model + stdlib", old_list, events)
+    after = report("list: list_response", new_list, events)
+    print(f"{'speedup':<32} {before / after:8.2f}x\n")
+
+    before = report("audit: json.loads(obj.json())", old_snapshot, events)
+    after = report("audit: snapshot()", new_snapshot, events)
+    print(f"{'speedup':<32} {before / after:8.2f}x\n")
+
+    report("audit: snapshot() + orjson", orjson_snapshot, events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Synthetic data generator for load tests and benchmarks.
+
+Seeds the admin user (via `seed_db.seed`), benchmark login users, studies,
+procedures with form schemas, subjects, study links, events (a fraction of
+them soft-deleted) and their audit rows, then builds the study counters.
+Small tables go through the ORM; subjects, links, events and audit rows
+are streamed with COPY so millions of rows load in minutes. Row contents
+are deterministic for a given `--seed` (IDs are fresh UUIDv7s).
+
+Intended for an empty local database (run `alembic upgrade head` first).
+
+Usage: python benchmarks/datagen.py [--events 1000000] [--subjects 50000] ...
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from os.path import abspath, dirname
+
+# Add backend directory to sys.path
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from sqlmodel import Session, select
+
+from app.auth import get_password_hash
+from app.database import engine
+from app.filters import ensure_field_indexes
+from app.models import Procedure, Study, User
+from app.stats import rebuild_study_stats
+from app.utils import ALPHABET, uuid7
+from seed_db import seed
+
+# Shared with benchmarks/loadtest.py
+BENCH_USER_EMAIL = "bench-user-{}@example.org"
+BENCH_PASSWORD = "bench-password-2026"
+CREATED_BY = "datagen"
+
+LASTNAMES = ["Chan", "Wong", "Lee", "Cheung", "Lau", "Ng", "Ho", "Leung", "Yip", "Tang",
+             "Lam", "Chow", "Tsang", "Kwok", "Fung", "Mak", "Yeung", "Li", "Choi", "Lo"]
+FIRSTNAMES = ["Ka Ming", "Wai Man", "Siu Fong", "Chi Keung", "Mei Ling", "Tsz Hin",
+              "Hoi Yan", "Ka Yan", "Wing Sze", "Man Kit", "Pui Shan", "Chun Wai"]
+SITES = ["QMH", "PWH", "QEH", "TMH", "KWH"]
+STATUSES = ["completed"] * 6 + ["pending"] * 3 + ["cancelled", "no_show"]
+
+# Form schemas in the DynamicForm format (see frontend DynamicForm.tsx)
+FORM_TEMPLATES = [
+    ("Vital Signs", [
+        {"name": "bp_systolic", "type": "number", "label": "Systolic BP", "required": True, "indexed": True},
+        {"name": "bp_diastolic", "type": "number", "label": "Diastolic BP", "required": True},
+        {"name": "heart_rate", "type": "number", "label": "Heart Rate"},
+        {"name": "arm", "type": "select", "label": "Arm", "options": ["left", "right"]},
+    ]),
+    ("Blood Draw", [
+        {"name": "sample_id", "type": "text", "label": "Sample ID", "required": True},
+        {"name": "collected_on", "type": "date", "label": "Collected On"},
+        {"name": "tubes", "type": "number", "label": "Tubes"},
+    ]),
+    ("Questionnaire", [
+        {"name": "score", "type": "number", "label": "Score", "required": True},
+        {"name": "version", "type": "select", "label": "Version", "options": ["v1", "v2"]},
+        {"name": "comments", "type": "text", "label": "Comments"},
+    ]),
+]
+
+CALENDAR_START = datetime(2025, 1, 6, 8, 0)
+CALENDAR_WEEKS = 104
+
+
+def ref_code(prefix: str, index: int, length: int = 6) -> str:
+    """
+    Returns a unique, random-looking ref code for a row index.
+
+    Multiplying by an odd constant modulo 32**length is a bijection, so
+    codes never collide within a table.
+    """
+    value = (index * 0x2545F491 + 0x1B873593) % (len(ALPHABET) ** length)
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return prefix + "".join(chars)
+
+
+def iso_week(moment: datetime) -> str:
+    """Formats the ISO week of a datetime, e.g. '2026-W05' (used by calendar filters)."""
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def field_value(rng: random.Random, field: dict):
+    """Returns a random value that is valid for a single form field."""
+    if field["type"] == "number":
+        return rng.randint(60, 180)
+    if field["type"] == "select":
+        return rng.choice(field["options"])
+    if field["type"] == "date":
+        return (CALENDAR_START + timedelta(days=rng.randrange(CALENDAR_WEEKS * 7))).date().isoformat()
+    return f"{field['name']}-{rng.randrange(10**6):06d}"
+
+
+def make_procedure_data(rng: random.Random, form_data_schema: dict) -> dict:
+    """
+    Builds form data that passes validation for a procedure's form schema.
+
+    :param rng: Random source.
+    :param form_data_schema: Schema of the form `{"fields": [...]}`.
+    :return: A `procedure_data` dictionary.
+    """
+    return {
+        field["name"]: field_value(rng, field)
+        for field in form_data_schema.get("fields", [])
+        if field.get("required") or rng.random() >= 0.2
+    }
+
+
+def copy_rows(connection, table: str, columns, rows, batch_size: int) -> int:
+    """
+    Streams rows into a table with COPY, `batch_size` rows per round trip.
+
+    :param connection: Raw DBAPI (psycopg2) connection.
+    :param table: Table name.
+    :param columns: Column names, in row order.
+    :param rows: Iterable of row tuples (None for NULL, dicts for JSONB).
+    :param batch_size: Rows per COPY statement.
+    :return: Number of rows written.
+    """
+    sql = f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    cursor = connection.cursor()
+
+    def flush():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow([json.dumps(v) if isinstance(v, (dict, list)) else v for v in row])
+        total += 1
+        if total % batch_size == 0:
+            flush()
+    flush()
+    cursor.close()
+    return total
+
+
+def create_reference_data(session: Session, args, rng: random.Random):
+    """Creates bench users, studies and procedures through the ORM."""
+    hashed = get_password_hash(BENCH_PASSWORD)
+    for i in range(args.users):
+        email = BENCH_USER_EMAIL.format(i)
+        if not session.exec(select(User).where(User.email == email)).first():
+            session.add(User(
+                lastname="Bench", firstname=f"User {i}", email=email, gmail=email, status="active",
+                admin_level=2, created_by=CREATED_BY, updated_by=CREATED_BY,
+                metadata_blob={"hashed_password": hashed},
+            ))
+
+    studies = [
+        Study(
+            title=f"Benchmark Study {i + 1}", description="Synthetic load-test data",
+            principal_investigator=f"Dr. {rng.choice(LASTNAMES)}",
+            created_by=CREATED_BY, updated_by=CREATED_BY,
+            metadata_blob={"site": SITES[i % len(SITES)]},
+        )
+        for i in range(args.studies)
+    ]
+    session.add_all(studies)
+    session.flush()
+
+    procedures = []
+    for study in studies:
+        for j in range(args.procedures_per_study):
+            name, fields = FORM_TEMPLATES[j % len(FORM_TEMPLATES)]
+            procedures.append(Procedure(
+                study_id=study.id, name=name, description=f"{name} for {study.title}",
+                form_data_schema={"fields": fields},
+                created_by=CREATED_BY, updated_by=CREATED_BY,
+            ))
+    session.add_all(procedures)
+    session.commit()
+    return (
+        [study.id for study in studies],
+        [(p.id, p.study_id, p.form_data_schema) for p in procedures],
+    )
+
+
+def generate(args) -> None:
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    seed()
+    with Session(engine) as session:
+        study_ids, procedures = create_reference_data(session, args, rng)
+    procedures_by_study = {}
+    for procedure in procedures:
+        procedures_by_study.setdefault(procedure[1], []).append(procedure)
+    print(f"Created {len(study_ids)} studies, {len(procedures)} procedures, {args.users} users")
+
+    subject_ids = [uuid7() for _ in range(args.subjects)]
+    subject_studies = [
+        rng.sample(study_ids, k=min(len(study_ids), 1 + (rng.random() < 0.1)))
+        for _ in subject_ids
+    ]
+
+    connection = engine.raw_connection()
+    try:
+        def subjects():
+            for i, subject_id in enumerate(subject_ids):
+                lastname, firstname = rng.choice(LASTNAMES), rng.choice(FIRSTNAMES)
+                yield (
+                    subject_id, now, CREATED_BY, now, CREATED_BY, lastname, firstname,
+                    f"{firstname.replace(' ', '.').lower()}.{lastname.lower()}{i}@example.org",
+                    f"+852 {rng.randrange(10**8):08d}", ref_code("su-", i),
+                    datetime(1940, 1, 1) + timedelta(days=rng.randrange(60 * 365)),
+                    rng.choice(["male", "female"]), rng.getrandbits(128).to_bytes(16, "big").hex(),
+                )
+
+        count = copy_rows(connection, "subject", [
+            "id", "created_at", "created_by", "updated_at", "updated_by", "lastname", "firstname",
+            "email", "phone", "ref_code", "birthdate", "sex", "unique_uuid",
+        ], subjects(), args.batch_size)
+        print(f"Copied {count} subjects")
+
+        links = (
+            (study_id, subject_id, now)
+            for subject_id, studies in zip(subject_ids, subject_studies)
+            for study_id in studies
+        )
+        count = copy_rows(connection, "studysubjectlink", ["study_id", "subject_id", "joined_at"], links, args.batch_size)
+        print(f"Copied {count} study links")
+
+        audit_rows = []
+
+        def events():
+            for i in range(args.events):
+                index = rng.randrange(len(subject_ids))
+                study_id = rng.choice(subject_studies[index])
+                procedure_id, _, schema = rng.choice(procedures_by_study[study_id])
+                start = CALENDAR_START + timedelta(
+                    weeks=rng.randrange(CALENDAR_WEEKS), days=rng.randrange(5),
+                    minutes=15 * rng.randrange(36),
+                )
+                row = {
+                    "id": str(uuid7()), "study_id": str(study_id), "subject_id": str(subject_ids[index]),
+                    "procedure_id": str(procedure_id), "start_datetime": start.isoformat(),
+                    "end_datetime": (start + timedelta(minutes=30)).isoformat(),
+                    "ref_code": ref_code("ev-", i), "status": rng.choice(STATUSES),
+                    "metadata_blob": {"site": rng.choice(SITES), "week": iso_week(start)},
+                    "procedure_data": make_procedure_data(rng, schema),
+                }
+                # Audit rows are buffered and flushed alongside the events
+                audit_rows.append(("INSERT", {}, row))
+                if rng.random() < args.audit_updates:
+                    audit_rows.append(("UPDATE", row, row))
+                deleted_at = now if rng.random() < args.deleted else None
+                if deleted_at:
+                    audit_rows.append(("DELETE", row, {}))
+                yield (
+                    row["id"], now, CREATED_BY, now, CREATED_BY, row["study_id"], row["subject_id"],
+                    row["procedure_id"], start, start + timedelta(minutes=30), row["ref_code"],
+                    row["status"], row["metadata_blob"], row["procedure_data"], deleted_at,
+                )
+
+        def audits():
+            while audit_rows:
+                action, prev_state, new_state = audit_rows.pop()
+                record_id = (new_state or prev_state)["id"]
+                yield (uuid7(), "event", record_id, action, CREATED_BY, now, prev_state, new_state)
+
+        event_columns = [
+            "id", "created_at", "created_by", "updated_at", "updated_by", "study_id", "subject_id",
+            "procedure_id", "start_datetime", "end_datetime", "ref_code", "status",
+            "metadata_blob", "procedure_data", "deleted_at",
+        ]
+        audit_columns = ["id", "table_name", "record_id", "action", "changed_by", "changed_at", "prev_state", "new_state"]
+        event_count = audit_count = 0
+        remaining = args.events
+        generator = events()
+        while remaining > 0:
+            chunk = min(remaining, args.batch_size * 10)
+            event_count += copy_rows(connection, "event", event_columns, (next(generator) for _ in range(chunk)), args.batch_size)
+            audit_count += copy_rows(connection, "auditlog", audit_columns, audits(), args.batch_size)
+            connection.commit()
+            remaining -= chunk
+            print(f"  {event_count} events, {audit_count} audit rows")
+        connection.commit()
+
+        cursor = connection.cursor()
+        for table in ("subject", "studysubjectlink", "event", "auditlog"):
+            cursor.execute(f'ANALYZE "{table}"')
+        cursor.close()
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Counters behind the study dashboards (COPY bypasses apply_stat_deltas)
+    with Session(engine) as session:
+        for study_id in study_ids:
+            rebuild_study_stats(session, study_id)
+        session.commit()
+    print(f"Built stats for {len(study_ids)} studies")
+
+    # Expression indexes for fields marked "indexed", built after the bulk load
+    for _, fields in FORM_TEMPLATES:
+        ensure_field_indexes(engine, {"fields": fields})
+
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--studies", type=int, default=20)
+    parser.add_argument("--procedures-per-study", type=int, default=3)
+    parser.add_argument("--subjects", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--audit-updates", type=float, default=0.5,
+                        help="Fraction of events that also get an UPDATE audit row")
+    parser.add_argument("--deleted", type=float, default=0.02,
+                        help="Fraction of events that are soft-deleted")
+    parser.add_argument("--users", type=int, default=50, help="Bench login users")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per COPY")
+    parser.add_argument("--seed", type=int, default=2026)
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
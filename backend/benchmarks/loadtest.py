@@ -0,0 +1,257 @@
+"""
+Scripted load test for the API.
+
+Runs each workload for a fixed duration with N concurrent clients against a
+running server whose database was filled by `benchmarks/datagen.py`, then
+reports throughput and p50/p95/p99 latency. Results can be saved as JSON and
+compared against a saved baseline; the exit status is 1 if any workload's
+p95 or throughput regressed by more than `--max-regression`.
+
+Workloads:
+  calendar      one week of events with subject/procedure summaries
+  search        subject name / ref code search
+  event-create  POST /events/ with valid form data
+  event-update  merge patch of one form field (PATCH /events/{id}/data)
+  login         password logins by the benchmark users (bcrypt-bound)
+
+Fixtures (event IDs, study/subject/procedure combinations) are sampled
+directly from the database configured in Settings.
+
+Usage: python benchmarks/loadtest.py [--base-url http://127.0.0.1:8005]
+           [--workloads calendar,search] [--duration 30] [--concurrency 16]
+           [--json results.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from datetime import timedelta
+from os.path import abspath, dirname
+
+# Add backend directory to sys.path
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import httpx
+from sqlalchemy import text
+
+from app.database import engine, get_settings
+from datagen import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, CALENDAR_START, CALENDAR_WEEKS, FIRSTNAMES, LASTNAMES,
+    field_value, iso_week, make_procedure_data,
+)
+
+def load_fixtures(sample_size: int) -> dict:
+    """
+    Samples IDs the workloads need from the benchmark database.
+
+    :param sample_size: Approximate number of rows to sample per fixture.
+    :return: Dictionary of fixture lists.
+    """
+    with engine.connect() as connection:
+        events = connection.execute(text(
+            "SELECT e.id, p.form_data_schema FROM event e TABLESAMPLE SYSTEM (1) "
+            "JOIN procedure p ON p.id = e.procedure_id WHERE e.deleted_at IS NULL LIMIT :n"
+        ), {"n": sample_size}).all()
+        combos = connection.execute(text(
+            "SELECT l.study_id, l.subject_id, p.id, p.form_data_schema "
+            "FROM studysubjectlink l TABLESAMPLE SYSTEM (1) "
+            "JOIN procedure p ON p.study_id = l.study_id LIMIT :n"
+        ), {"n": sample_size}).all()
+        ref_codes = connection.execute(text(
+            "SELECT ref_code FROM subject TABLESAMPLE SYSTEM (1) LIMIT :n"
+        ), {"n": sample_size}).scalars().all()
+    if not events or not combos:
+        sys.exit("No benchmark data found; run benchmarks/datagen.py first.")
+    return {
+        "events": [(str(event_id), schema) for event_id, schema in events if schema.get("fields")],
+        "combos": [(str(a), str(b), str(c), schema) for a, b, c, schema in combos],
+        "search_terms": [name[:3].lower() for name in LASTNAMES] + [name.split()[0] for name in FIRSTNAMES]
+                        + [code[3:7] for code in ref_codes],
+        "weeks": [iso_week(CALENDAR_START + timedelta(weeks=i)) for i in range(CALENDAR_WEEKS)],
+    }
+
+
+async def calendar(client: httpx.AsyncClient, rng: random.Random, fixtures: dict) -> httpx.Response:
+    week = rng.choice(fixtures["weeks"])
+    return await client.get("/events/", params=[
+        ("filter", f'metadata_blob@>{{"week": "{week}"}}'),
+        ("expand", "subject"),
+        ("expand", "procedure"),
+    ])
+
+
+async def search(client: httpx.AsyncClient, rng: random.Random, fixtures: dict) -> httpx.Response:
+    return await client.get("/subjects/search", params={"q": rng.choice(fixtures["search_terms"]), "limit": 20})
+
+
+async def event_create(client: httpx.AsyncClient, rng: random.Random, fixtures: dict) -> httpx.Response:
+    study_id, subject_id, procedure_id, schema = rng.choice(fixtures["combos"])
+    start = CALENDAR_START + timedelta(weeks=rng.randrange(CALENDAR_WEEKS), minutes=15 * rng.randrange(36))
+    return await client.post("/events/", json={
+        "study_id": study_id,
+        "subject_id": subject_id,
+        "procedure_id": procedure_id,
+        "start_datetime": start.isoformat(),
+        "end_datetime": (start + timedelta(minutes=30)).isoformat(),
+        "metadata_blob": {"source": "loadtest", "week": iso_week(start)},
+        "procedure_data": make_procedure_data(rng, schema),
+    })
+
+
+async def event_update(client: httpx.AsyncClient, rng: random.Random, fixtures: dict) -> httpx.Response:
+    event_id, schema = rng.choice(fixtures["events"])
+    field = rng.choice(schema["fields"])
+    return await client.patch(
+        f"/events/{event_id}/data",
+        json={"procedure_data": {field["name"]: field_value(rng, field)}},
+        headers={"Content-Type": "application/merge-patch+json"},
+    )
+
+
+async def login(client: httpx.AsyncClient, rng: random.Random, fixtures: dict) -> httpx.Response:
+    email = BENCH_USER_EMAIL.format(rng.randrange(fixtures["users"]))
+    return await client.post("/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+
+
+WORKLOADS = {
+    "calendar": calendar,
+    "search": search,
+    "event-create": event_create,
+    "event-update": event_update,
+    "login": login,
+}
+
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def run_workload(name: str, args, fixtures: dict, token: str) -> dict:
+    """
+    Runs one workload with `args.concurrency` clients for `args.duration` seconds.
+
+    :return: Summary with request/error counts, throughput and latency percentiles (ms).
+    """
+    workload = WORKLOADS[name]
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+    headers = {"Authorization": f"Bearer {token}"} if name != "login" else {}
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        async def worker(worker_id: int):
+            nonlocal errors
+            rng = random.Random(args.seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = (await workload(client, rng, fixtures)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if start >= measure_from:
+                    latencies.append(time.perf_counter() - start)
+                    errors += not ok
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+
+    elapsed = time.perf_counter() - measure_from
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Lists workloads whose p95 latency or throughput regressed beyond the threshold.
+
+    :param results: Current results by workload.
+    :param baseline: Baseline results by workload.
+    :param max_regression: Allowed relative change, e.g. 0.2 for 20%.
+    :return: Human-readable regression descriptions.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["throughput"] < previous["throughput"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8005")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per workload")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds per workload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--users", type=int, default=50, help="Bench users created by datagen")
+    parser.add_argument("--sample-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Unknown workloads: {', '.join(sorted(unknown))}")
+
+    fixtures = load_fixtures(args.sample_size)
+    fixtures["users"] = args.users
+    settings = get_settings()
+    response = httpx.post(
+        f"{args.base_url}/auth/login",
+        data={"username": settings.SEED_ADMIN_EMAIL, "password": settings.SEED_ADMIN_PASSWORD},
+    )
+    response.raise_for_status()
+    token = response.json()["access_token"]
+
+    results = {}
+    print(f"{'workload':<14} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in names:
+        summary = asyncio.run(run_workload(name, args, fixtures, token))
+        results[name] = summary
+        print(
+            f"{name:<14} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput']:>8.1f} "
+            f"{summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} {summary['p99_ms']:>8.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
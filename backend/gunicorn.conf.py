@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for production:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Settings come from `app.database.Settings` (environment or `.env`), e.g.
+`WEB_CONCURRENCY=8 BIND=0.0.0.0:8005`. The app is imported once in the
+master (`preload_app`) and forked into uvicorn workers, so a broken import
+fails at startup and workers share the imported code copy-on-write.
+"""
+import multiprocessing
+
+from app.database import engine_created, get_engine, get_settings
+
+settings = get_settings()
+
+bind = settings.BIND
+workers = settings.WEB_CONCURRENCY or multiprocessing.cpu_count() * 2 + 1
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Seconds a silent worker is given before it is killed and restarted
+timeout = settings.WORKER_TIMEOUT
+# Seconds in-flight requests get to finish after SIGTERM / SIGHUP
+graceful_timeout = settings.GRACEFUL_TIMEOUT
+keepalive = settings.KEEPALIVE
+
+accesslog = "-"
+loglevel = settings.LOG_LEVEL.lower()
+
+
+def post_fork(server, worker):
+    """
+    Gives each worker its own connection pool.
+
+    Connections opened in the master before forking would otherwise be shared
+    by every worker's socket. The engine is normally first created by each
+    worker's lifespan hook, after the fork; this covers anything the master
+    opened while preloading. `close=False` drops the inherited connections
+    without closing them, which would also close them for the master.
+    The event-stream LISTEN thread is not inherited: it starts in each
+    worker with its first subscriber. Nothing is done (and no engine is
+    built) if the master never created one.
+    """
+    if engine_created():
+        get_engine().dispose(close=False)
@@ -5,32 +5,36 @@ from sqlmodel import Session, select
 # Add backend directory to sys.path
 sys.path.insert(0, abspath(dirname(__file__)))
 
-from app.database import engine
+from app.database import engine, get_settings
 from app.models import User
 from app.auth import get_password_hash
 
 def seed():
     with Session(engine) as session:
         # Check if admin already exists
-        admin_email = "admin@hku.hk"
+        settings = get_settings()
+        admin_email = settings.SEED_ADMIN_EMAIL
         existing = session.exec(select(User).where(User.email == admin_email)).first()
         
         if existing:
             print(f"User {admin_email} already exists.")
             return
 
+        if not settings.SEED_ADMIN_PASSWORD:
+            sys.exit("Set SEED_ADMIN_PASSWORD (environment or .env) to create the admin user.")
         print(f"Creating seed user: {admin_email}...")
         admin_user = User(
             lastname="Admin",
             firstname="System",
             email=admin_email,
+            gmail=admin_email,  # Password logins look users up by gmail
             status="active",
             is_superuser=True,
             admin_level=10,
             created_by="system",
             updated_by="system",
             metadata_blob={
-                "hashed_password": get_password_hash("hku-admin-2026")
+                "hashed_password": get_password_hash(settings.SEED_ADMIN_PASSWORD)
             }
         )
         session.add(admin_user)
@@ -1,20 +1,11 @@
 import pytest
 import uuid
 from datetime import datetime, timedelta
-from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel import Session, select
 from app.models import AuditLog
 from app.audit import log_change, reconstruct_state
 
-# Mock DB for testing
-sqlite_url = "sqlite://"
-engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
-
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+# `session` is the rolled-back Postgres session from conftest.py
 
 def test_log_change(session: Session):
     """Test that log_change correctly adds an entry to the AuditLog."""
@@ -80,5 +71,3 @@ def test_reconstruct_with_delete(session: Session):
     assert reconstruct_state(session, "study", record_id, t1 + timedelta(minutes=30)) == {"name": "S1"}
     # State after t2
     assert reconstruct_state(session, "study", record_id, t2 + timedelta(minutes=30)) is None
-
-from sqlmodel import select # Ensure select is available for the test helper
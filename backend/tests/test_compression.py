@@ -0,0 +1,82 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+LARGE_BODY = '{"status": "pending", "notes": "Routine follow-up"}' * 200
+
+def make_client(**options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_BODY, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("{}", media_type="application/json")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((LARGE_BODY for _ in range(3)), media_type="application/json")
+
+    @app.get("/sse")
+    def sse():
+        return StreamingResponse(iter(["data: x\n\n"] * 100), media_type="text/event-stream")
+
+    return TestClient(app)
+
+def test_negotiate_encoding_prefers_server_order():
+    """Test that the server's preference order wins among accepted codings."""
+    assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip, br;q=0", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("*", ["zstd", "gzip"]) == "zstd"
+    assert negotiate_encoding("identity", ["gzip"]) is None
+    assert negotiate_encoding("", ["gzip"]) is None
+
+def test_large_response_is_gzipped():
+    """Test that bodies above the threshold are compressed with correct headers."""
+    client = make_client(encodings=["gzip"])
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(LARGE_BODY)
+    assert response.text == LARGE_BODY
+
+def test_small_response_is_not_compressed():
+    """Test that bodies below minimum_size are sent as-is."""
+    client = make_client(encodings=["gzip"], minimum_size=500)
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "{}"
+
+def test_streaming_response_is_compressed_per_chunk():
+    """Test that streamed bodies are compressed and decode to the full payload."""
+    client = make_client(encodings=["gzip"])
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == LARGE_BODY * 3
+
+def test_event_stream_is_never_compressed():
+    """Test that server-sent events bypass compression."""
+    client = make_client(encodings=["gzip"], minimum_size=0)
+    response = client.get("/sse", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings_round_trip(encoding, module):
+    """Test brotli and zstd output when the optional libraries are installed."""
+    lib = pytest.importorskip(module)
+    client = make_client(encodings=[encoding])
+    with client.stream("GET", "/large", headers={"Accept-Encoding": encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == encoding
+    if encoding == "br":
+        assert lib.decompress(raw).decode() == LARGE_BODY
+    else:
+        assert lib.ZstdDecompressor().decompressobj().decompress(raw).decode() == LARGE_BODY
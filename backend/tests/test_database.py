@@ -0,0 +1,24 @@
+import os
+import runpy
+
+from app import database
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+def test_post_fork_does_not_create_engine(monkeypatch):
+    """Test that a worker forked before any engine exists does not build one."""
+    monkeypatch.setattr(database, "_engine", None)
+    runpy.run_path(GUNICORN_CONF)["post_fork"](server=None, worker=None)
+    assert not database.engine_created()
+
+def test_post_fork_disposes_inherited_engine(monkeypatch):
+    """Test that an engine created in the master drops its inherited connections in the worker."""
+    calls = []
+
+    class Engine:
+        def dispose(self, close=True):
+            calls.append(close)
+
+    monkeypatch.setattr(database, "_engine", Engine())
+    runpy.run_path(GUNICORN_CONF)["post_fork"](server=None, worker=None)
+    assert calls == [False]
@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+from starlette.requests import Request
+from app.auth import get_current_user
+from app.database import get_session
+from app.etag import check_if_match, collection_etag, make_etag, not_modified, record_etag
+from app.main import app
+from app.models import Event, Procedure, User
+
+def make_request(if_none_match=None, if_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    if if_match:
+        headers.append((b"if-match", if_match.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_make_etag_is_weak_and_stable():
+    """Test that ETags are weak and change with the version components."""
+    updated = datetime(2026, 1, 1, 10, 0)
+    etag = make_etag("study", "abc", updated)
+    assert etag.startswith('W/"')
+    assert etag == make_etag("study", "abc", updated)
+    assert etag != make_etag("study", "abc", datetime(2026, 1, 1, 10, 1))
+
+def test_not_modified_returns_304_on_match():
+    """Test that matching If-None-Match headers (weak or strong, listed or *) yield 304."""
+    etag = make_etag("study", 1)
+    strong = etag.removeprefix("W/")
+    for header in (etag, strong, f'"other", {etag}', "*"):
+        response = not_modified(make_request(header), etag)
+        assert response is not None
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+def test_not_modified_returns_none_without_match():
+    """Test that a missing or stale If-None-Match header sends the full body."""
+    etag = make_etag("study", 1)
+    assert not_modified(make_request(), etag) is None
+    assert not_modified(make_request(make_etag("study", 2)), etag) is None
+
+def test_record_etag_changes_with_version():
+    """Test that record ETags change when the version is bumped."""
+    updated = datetime(2026, 1, 1, 10, 0)
+    etag = record_etag("event", "ABC", updated, 1)
+    assert etag == record_etag("event", "abc", updated, 1)
+    assert etag != record_etag("event", "abc", updated, 2)
+
+def test_check_if_match_rejects_stale_etag():
+    """Test that If-Match passes when current, raises 409 when stale and 428 when absent."""
+    current = record_etag("event", "abc", None, 2)
+    check_if_match(make_request(if_match=current), current)
+    with pytest.raises(HTTPException) as exc_info:
+        check_if_match(make_request(), current)
+    assert exc_info.value.status_code == 428
+    with pytest.raises(HTTPException) as exc_info:
+        check_if_match(make_request(if_match=record_etag("event", "abc", None, 1)), current)
+    assert exc_info.value.status_code == 409
+
+def test_list_endpoint_revalidates_with_collection_etag():
+    """Test that a list endpoint sends a collection ETag and answers a matching If-None-Match with 304."""
+    # In-memory SQLite with only the listed table; JSONB is stored as JSON
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    engine.dialect.type_compiler_instance.visit_JSONB = engine.dialect.type_compiler_instance.visit_JSON
+    Procedure.__table__.create(engine)
+    with Session(engine) as session:
+        session.add(Procedure(study_id=uuid.UUID(int=1), name="Vitals", description="Vital signs"))
+        session.commit()
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_current_user] = lambda: User(lastname="Lee", firstname="Ann", email="ann@hku.hk")
+    try:
+        client = TestClient(app)
+        response = client.get("/procedures/")
+        assert response.status_code == 200
+        assert [procedure["name"] for procedure in response.json()] == ["Vitals"]
+        etag = response.headers["ETag"]
+        assert client.get("/procedures/", headers={"If-None-Match": etag}).status_code == 304
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+def test_collection_etag_changes_on_soft_delete(session: Session, make_event):
+    """Test that the list ETag counts only active rows, so deleting one changes it."""
+    event = make_event()
+    statement = select(Event).where(Event.study_id == event.study_id)
+    before = collection_etag(session, statement, Event)
+    assert before == collection_etag(session, statement, Event)
+    event.deleted_at = event.updated_at = datetime.utcnow()
+    session.add(event)
+    session.commit()
+    assert collection_etag(session, statement, Event) != before
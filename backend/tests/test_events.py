@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi import Response
+from sqlmodel import Session
+from starlette.requests import Request
+from app.audit import log_change, reconstruct_state, snapshot
+from app.jsonpatch import JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE
+from app.models import Event, Study, Subject, Procedure, User
+from app.routers.events import EventDetail, aggregate_events, parse_expand, patch_event_data
+
+def test_parse_expand_accepts_repeated_and_comma_separated():
+    """Test that expand values are split, de-duplicated and sorted."""
+    assert parse_expand(["subject,study", "study"]) == ["study", "subject"]
+    assert parse_expand([]) == []
+
+def test_parse_expand_rejects_unknown_relationships():
+    """Test that unknown expand values raise 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        parse_expand(["study,audit"])
+    assert exc_info.value.status_code == 400
+
+def test_event_detail_embeds_related_summaries():
+    """Test that EventDetail serializes loaded relationships as summaries."""
+    study = Study(title="Cancer Research", principal_investigator="Dr. Smith")
+    subject = Subject(lastname="Wong", firstname="David", birthdate=datetime(1985, 5, 15), email="d@hku.hk")
+    procedure = Procedure(study_id=study.id, name="BP", description="BP check", form_data_schema={"fields": []})
+    event = Event(
+        study_id=study.id, subject_id=subject.id, procedure_id=procedure.id,
+        start_datetime=datetime(2026, 1, 5, 9, 0), study=study, subject=subject, procedure=procedure
+    )
+
+    detail = EventDetail.model_validate(event, from_attributes=True).model_dump(mode="json")
+    assert detail["study"]["title"] == "Cancer Research"
+    assert detail["subject"] == {"id": str(subject.id), "ref_code": subject.ref_code, "lastname": "Wong", "firstname": "David"}
+    assert detail["procedure"]["form_data_schema"] == {"fields": []}
+
+def test_aggregate_rejects_bad_windows():
+    """Test that inverted, oversized and unknown-timezone windows raise 400 before querying."""
+    for start, end, tz in (
+        (datetime(2026, 2, 1), datetime(2026, 1, 1), "UTC"),
+        (datetime(2026, 1, 1), datetime(2027, 6, 1), "UTC"),
+        (datetime(2026, 1, 1), datetime(2026, 2, 1), "Mars/Olympus_Mons"),
+    ):
+        with pytest.raises(HTTPException) as exc_info:
+            aggregate_events(start=start, end=end, tz=tz, session=None, current_user=None)
+        assert exc_info.value.status_code == 400
+
+def test_aggregate_counts_by_local_day(session: Session, make_event):
+    """Test that events are counted per local day with a status breakdown."""
+    first = make_event(status="completed")  # 2026-01-05 09:00 UTC
+    for hour, status in ((10, "pending"), (20, "no_show")):  # 20:00 UTC is 04:00 next day in Hong Kong
+        session.add(Event(
+            study_id=first.study_id, subject_id=first.subject_id, procedure_id=first.procedure_id,
+            start_datetime=datetime(2026, 1, 5, hour, 0), status=status,
+        ))
+    session.commit()
+
+    buckets = aggregate_events(
+        start=datetime(2026, 1, 1), end=datetime(2026, 2, 1), bucket="day", group_by="procedure",
+        study_id=first.study_id, tz="Asia/Hong_Kong", session=session, current_user=None,
+    )
+    assert [(b.bucket_start, b.group_id, b.total, b.by_status) for b in buckets] == [
+        (datetime(2026, 1, 5), first.procedure_id, 2, {"completed": 1, "pending": 1}),
+        (datetime(2026, 1, 6), first.procedure_id, 1, {"no_show": 1}),
+    ]
+
+    totals = aggregate_events(
+        start=datetime(2026, 1, 1), end=datetime(2026, 2, 1), bucket="month", group_by=None,
+        study_id=first.study_id, tz="UTC", session=session, current_user=None,
+    )
+    assert [(b.bucket_start, b.group_id, b.total) for b in totals] == [(datetime(2026, 1, 1), None, 3)]
+
+def patch_request(media_type: str) -> Request:
+    return Request({"type": "http", "method": "PATCH", "path": "/", "headers": [(b"content-type", media_type.encode())]})
+
+def test_patch_audit_replays_nulls_and_removals(session: Session, make_event, tester: User):
+    """Test that PATCH audit deltas keep JSON nulls apart from removed keys when replayed."""
+    event = make_event(procedure_data={"bp": 120, "note": "x"})
+    log_change(session=session, table_name="event", record_id=event.id, action="INSERT", changed_by=tester.email, new_state=snapshot(event))
+    session.commit()
+
+    # A null merge-patch member removes the key; a JSON Patch value of null stores one
+    patch_event_data(event.id, patch_request(MERGE_PATCH_MEDIA_TYPE), Response(), patch={"procedure_data": {"bp": None, "note": None}}, session=session, current_user=tester)
+    patch_event_data(event.id, patch_request(JSON_PATCH_MEDIA_TYPE), Response(), patch=[{"op": "add", "path": "/procedure_data/bp", "value": None}], session=session, current_user=tester)
+
+    state = reconstruct_state(session, "event", event.id, datetime.utcnow())
+    assert state["procedure_data"] == {"bp": None}
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy.dialects import postgresql
+from app.models import Event, Study
+from app.filters import parse_filter, field_index_ddl
+from app.routers.procedures import create_procedure
+from app.schemas import ProcedureCreate
+
+ALLOWED = ["procedure_data", "metadata_blob"]
+
+def compile_sql(expression) -> str:
+    return str(expression.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+def test_numeric_comparison_uses_guarded_cast():
+    """Test that numeric comparisons cast only JSON numbers."""
+    sql = compile_sql(parse_filter(Event, "procedure_data.bp_systolic>140", ALLOWED))
+    assert "jsonb_typeof(event.procedure_data -> 'bp_systolic') = 'number'" in sql
+    assert "CAST(event.procedure_data ->> 'bp_systolic' AS NUMERIC) END > 140" in sql
+
+def test_text_comparison_on_nested_path():
+    """Test that non-numeric range comparisons use text extraction."""
+    sql = compile_sql(parse_filter(Event, "procedure_data.visit.date>=2026-01-01", ALLOWED))
+    assert "(event.procedure_data #>> '{visit,date}') >= '2026-01-01'" in sql
+
+def test_equality_and_containment_use_gin_operator():
+    """Test that equality and containment translate to @>."""
+    eq = parse_filter(Event, "procedure_data.arm=left", ALLOWED)
+    assert "@>" in str(eq.compile(dialect=postgresql.dialect()))
+    assert eq.right.value == {"arm": "left"}
+
+    contains = parse_filter(Event, 'metadata_blob@>{"site": "QMH"}', ALLOWED)
+    assert contains.right.value == {"site": "QMH"}
+
+@pytest.mark.parametrize("expression", [
+    "hashed_password.x=1",
+    "procedure_data>1",
+    "procedure_data@>1",
+    "procedure_data.a~1",
+])
+def test_invalid_filters_rejected(expression):
+    """Test that malformed or disallowed filters raise 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        parse_filter(Event, expression, ALLOWED)
+    assert exc_info.value.status_code == 400
+
+def test_field_index_ddl_matches_filter_expression():
+    """Test that expression indexes use the same expression as numeric filters."""
+    ddl = field_index_ddl({"name": "bp_systolic", "type": "number", "indexed": True})
+    filter_sql = compile_sql(parse_filter(Event, "procedure_data.bp_systolic>140", ALLOWED))
+    index_expr = filter_sql.replace("event.procedure_data", "procedure_data").rsplit(" > ", 1)[0]
+    assert ddl.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_pd_")
+    assert "_num ON event" in ddl
+    assert f"(({index_expr}))" in ddl
+
+def test_field_index_ddl_skips_unindexed_fields():
+    """Test that only fields flagged as indexed with safe names produce DDL."""
+    assert field_index_ddl({"name": "arm", "type": "select"}) is None
+    assert field_index_ddl({"name": "bad name;", "indexed": True}) is None
+
+def test_field_index_names_do_not_collide():
+    """Test that names differing only in case or past a shared prefix get distinct indexes."""
+    def index_name(name, field_type="number"):
+        ddl = field_index_ddl({"name": name, "type": field_type, "indexed": True})
+        return ddl.split(" IF NOT EXISTS ", 1)[1].split(" ", 1)[0]
+
+    prefix = "blood_pressure_systolic_reading_"
+    names = [index_name(n) for n in ("BP", "bp", prefix + "left", prefix + "right")]
+    assert len(set(names)) == len(names)
+    assert index_name("bp") != index_name("bp", "text")
+    assert all(len(name) <= 63 for name in names)
+
+@pytest.mark.parametrize("admin_level, scheduled", [(0, False), (2, True)])
+def test_field_indexes_only_scheduled_for_admins(session, tester, admin_level, scheduled):
+    """Test that saving a procedure with indexed fields only builds indexes for admins."""
+    study = Study(title="Index Study", principal_investigator="Dr. Lee")
+    session.add(study)
+    session.commit()
+    tester.admin_level = admin_level
+    background_tasks = BackgroundTasks()
+    procedure_in = ProcedureCreate(
+        study_id=study.id, name="Vitals", description="Vital signs",
+        form_data_schema={"fields": [{"name": "bp", "type": "number", "indexed": True}]},
+    )
+    create_procedure(procedure_in, background_tasks, session=session, current_user=tester)
+    assert bool(background_tasks.tasks) is scheduled
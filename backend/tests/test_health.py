@@ -0,0 +1,20 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlmodel import Session
+from app.routers.health import liveness, readiness
+
+def test_liveness():
+    """Test that liveness does not depend on the database."""
+    assert liveness() == {"status": "ok"}
+
+def test_readiness(session: Session):
+    """Test that readiness passes with a working connection."""
+    assert readiness(session=session) == {"status": "ok"}
+
+def test_readiness_fails_without_database():
+    """Test that an unreachable database turns readiness into a 503."""
+    unreachable = create_engine("postgresql://nobody@127.0.0.1:1/cras", connect_args={"connect_timeout": 1})
+    with Session(unreachable) as session, pytest.raises(HTTPException) as exc_info:
+        readiness(session=session)
+    assert exc_info.value.status_code == 503
@@ -0,0 +1,59 @@
+"""
+Cold-start import checks: `import app.main` runs in a fresh interpreter
+under `python -X importtime`, as a container worker would.
+"""
+import os
+import subprocess
+import sys
+from typing import Dict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous ceiling for `import app.main` (about 1s locally); catches a heavy
+# dependency slipping back into the import path, not small regressions
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+# Imported on first use only
+LAZY_MODULES = ("google.auth", "google.oauth2", "requests", "pyotp")
+
+def import_times(code: str, **env: str) -> Dict[str, float]:
+    """
+    Runs `code` in a fresh interpreter with `-X importtime`.
+
+    :param code: Python source that imports the app.
+    :param env: Extra environment variables.
+    :return: Cumulative import time in seconds, keyed by module name.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+def test_app_import_is_lean():
+    """Test that importing the app skips optional integrations and stays within budget."""
+    times = import_times("import app.main")
+    assert not [m for m in times if m.startswith(LAZY_MODULES)]
+    assert times["app.main"] < IMPORT_TIME_BUDGET_SECONDS
+
+def test_engine_is_created_on_first_use():
+    """Test that no engine is created at import; the lifespan hook creates it."""
+    import_times("import app.main, app.database as d; assert d._engine is None")
+
+def test_disabled_integrations_are_not_imported():
+    """Test that feature flags keep the Google and MFA routers out of the app."""
+    code = (
+        "import app.main\n"
+        "paths = {route.path for route in app.main.app.routes}\n"
+        "assert not [p for p in paths if p.startswith(('/auth/google', '/auth/mfa'))], paths\n"
+    )
+    times = import_times(code, ENABLE_GOOGLE_AUTH="false", ENABLE_MFA="false")
+    assert "app.routers.auth_google" not in times
+    assert "app.routers.auth_mfa" not in times
@@ -0,0 +1,65 @@
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.instrumentation import (
+    Histogram, InstrumentationMiddleware, install_query_listeners, render_metrics,
+)
+
+def make_client(prefix: str, slow_request_ms: int = 500) -> TestClient:
+    engine = create_engine("sqlite://")
+    install_query_listeners()
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware, slow_request_ms=slow_request_ms)
+
+    @app.get(prefix + "/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    return TestClient(app)
+
+def test_metrics_grouped_by_route_template():
+    """Test that latency and query counts are recorded per route template."""
+    client = make_client("/grouped")
+    client.get("/grouped/items/1")
+    client.get("/grouped/items/2")
+    metrics = render_metrics()
+    assert 'cras_http_request_duration_seconds_count{method="GET",route="/grouped/items/{item_id}",status="200"} 2' in metrics
+    assert 'cras_http_request_db_queries_sum{method="GET",route="/grouped/items/{item_id}"} 6' in metrics
+    assert 'cras_db_query_seconds_total{method="GET",route="/grouped/items/{item_id}"}' in metrics
+
+def test_slow_requests_logged_with_queries(caplog):
+    """Test that slow requests are logged together with their SQL statements."""
+    client = make_client("/slow", slow_request_ms=0)
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        client.get("/slow/items/3")
+    assert "Slow request GET /slow/items/3 -> 200" in caplog.text
+    assert "3 queries" in caplog.text
+    assert "SELECT 1" in caplog.text
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets render cumulatively with +Inf, count and sum."""
+    histogram = Histogram("test_seconds", "Test.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/x")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{route="/x"} 5.55' in lines
+
+def test_failed_statements_do_not_leak_start_times():
+    """Test that a statement raising an error drops its start time from the connection."""
+    engine = create_engine("sqlite://")
+    install_query_listeners()
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_start_time"] == []
@@ -0,0 +1,148 @@
+import csv
+import json
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import Session, select
+from app import jobs
+from app.database import get_settings
+from app.jobs import claim_next_job, enqueue_job, result_path, run_job
+from app.models import INCLUDE_DELETED, AuditLog, Event, Job, Procedure, User
+from app.routers.jobs import get_job, get_job_result
+
+def run_next(session: Session) -> Job:
+    """Claims and runs the next queued job as a worker would."""
+    job = claim_next_job(session, "test-worker")
+    assert job is not None and job.status == "running"
+    run_job(session, job)
+    return job
+
+def test_claim_returns_none_when_queue_is_empty(session: Session):
+    """Test that a worker finds nothing to do without pending jobs."""
+    assert claim_next_job(session, "test-worker") is None
+
+def test_study_deletion_runs_in_audited_batches(session: Session, monkeypatch, make_event):
+    """Test that a study's events and procedures are soft-deleted batch by batch with progress and audit rows."""
+    monkeypatch.setattr(jobs, "DELETE_BATCH_SIZE", 1)
+    event = make_event()
+    session.add(Event(
+        study_id=event.study_id, subject_id=event.subject_id, procedure_id=event.procedure_id,
+        start_datetime=event.start_datetime + timedelta(days=1),
+    ))
+    other = make_event()
+    deleted_at = datetime.utcnow() - timedelta(minutes=5)  # Study deleted before the job ran
+    enqueue_job(
+        session, "delete_study",
+        {"study_id": str(event.study_id), "deleted_at": deleted_at.isoformat()},
+        "tester@example.com",
+    )
+    session.commit()
+
+    started = datetime.utcnow()
+    job = run_next(session)
+    assert (job.status, job.total, job.processed) == ("completed", 3, 3)
+    assert job.result == {"event": 2, "procedure": 1}
+    assert job.claimed_by == "test-worker" and job.finished_at is not None
+    assert session.exec(select(Event.id)).all() == [other.id]
+    assert session.exec(select(Procedure.id)).all() == [other.procedure_id]
+    stamps = session.exec(
+        select(Event.deleted_at, Event.updated_at)
+        .where(Event.study_id == event.study_id)
+        .execution_options(**{INCLUDE_DELETED: True})
+    ).all()
+    assert len(stamps) == 2
+    assert all(deleted == deleted_at and updated >= started for deleted, updated in stamps)
+
+    batches = session.exec(
+        select(AuditLog.table_name, AuditLog.new_state).where(AuditLog.action == "CASCADE_DELETE")
+    ).all()
+    assert sorted(table for table, _ in batches) == ["event", "event", "procedure"]
+    assert all(len(state["ids"]) == 1 and state["job_id"] == str(job.id) for _, state in batches)
+
+def test_export_study_writes_csv(session: Session, monkeypatch, tmp_path, make_event):
+    """Test that an export job streams the study's events to a CSV under JOB_RESULTS_DIR."""
+    monkeypatch.setattr(get_settings(), "JOB_RESULTS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "EXPORT_CHUNK_SIZE", 1)
+    event = make_event(metadata_blob={"resource": "MRI"})
+    make_event()  # Another study
+    enqueue_job(session, "export_study", {"study_id": str(event.study_id)}, "tester@example.com")
+    session.commit()
+
+    job = run_next(session)
+    assert (job.status, job.total, job.processed) == ("completed", 1, 1)
+    assert job.result_location == f"{job.id}.csv"
+    with open(result_path(job.result_location), newline="") as exported:
+        rows = list(csv.DictReader(exported))
+    assert [row["id"] for row in rows] == [str(event.id)]
+    assert json.loads(rows[0]["metadata_blob"]) == {"resource": "MRI"}
+
+def test_failed_job_records_error(session: Session, tmp_path, monkeypatch):
+    """Test that a handler error marks the job failed without removing it from the table."""
+    monkeypatch.setattr(get_settings(), "JOB_RESULTS_DIR", str(tmp_path))
+    enqueue_job(session, "export_study", {"study_id": "00000000-0000-0000-0000-000000000000"}, "tester@example.com")
+    session.commit()
+
+    job = run_next(session)
+    assert job.status == "failed"
+    assert "not found" in job.error
+    assert claim_next_job(session, "test-worker") is None
+
+def test_cancel_requested_stops_running_job(session: Session, tmp_path, monkeypatch, make_event):
+    """Test that a running job stops at its next checkpoint once cancellation is requested."""
+    monkeypatch.setattr(get_settings(), "JOB_RESULTS_DIR", str(tmp_path))
+    event = make_event()
+    enqueue_job(session, "export_study", {"study_id": str(event.study_id)}, "tester@example.com")
+    session.commit()
+
+    job = claim_next_job(session, "test-worker")
+    job.cancel_requested = True
+    session.add(job)
+    session.commit()
+    run_job(session, job)
+    assert job.status == "cancelled"
+    assert job.result_location is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_stale_running_job_is_reclaimed(session: Session):
+    """Test that a running job whose worker stopped heartbeating is claimed again."""
+    job = enqueue_job(session, "export_study", {}, "tester@example.com")
+    job.status = "running"
+    job.claimed_by = "dead-worker"
+    job.heartbeat_at = datetime.utcnow() - timedelta(seconds=get_settings().JOB_STALE_SECONDS + 1)
+    session.commit()
+
+    assert claim_next_job(session, "test-worker").id == job.id
+    assert job.claimed_by == "test-worker"
+
+def test_reclaimed_job_is_abandoned_at_next_checkpoint(session: Session, tmp_path, monkeypatch, make_event):
+    """Test that a worker whose job was reclaimed commits nothing more and leaves the outcome to the new owner."""
+    monkeypatch.setattr(get_settings(), "JOB_RESULTS_DIR", str(tmp_path))
+    event = make_event()
+    enqueue_job(session, "export_study", {"study_id": str(event.study_id)}, "tester@example.com")
+    session.commit()
+
+    job = claim_next_job(session, "stalled-worker")
+    # Another worker took the job over while this one was stalled
+    session.exec(update(Job).where(Job.id == job.id).values(claimed_by="other-worker"))
+    session.commit()
+    run_job(session, job)
+
+    assert (job.status, job.claimed_by, job.total) == ("running", "other-worker", 0)
+    assert job.finished_at is None and job.result_location is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_job_reads_limited_to_submitter_and_admins(session: Session, tester: User):
+    """Test that only the submitter or an administrator can view a job or download its result."""
+    job = enqueue_job(session, "export_study", {}, tester.email)
+    session.commit()
+
+    assert get_job(job.id, session=session, current_user=tester).id == job.id
+    admin = User(lastname="Admin", firstname="Ann", email="admin@example.com", admin_level=2)
+    assert get_job(job.id, session=session, current_user=admin).id == job.id
+
+    other = User(lastname="Other", firstname="Bo", email="other@example.com", admin_level=1)
+    for endpoint in (get_job, get_job_result):
+        with pytest.raises(HTTPException) as exc_info:
+            endpoint(job.id, session=session, current_user=other)
+        assert exc_info.value.status_code == 403
@@ -0,0 +1,103 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from app.models import Event
+from app.jsonpatch import (
+    JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE,
+    apply_delta, compile_document_patch, parse_pointer, path_delta, to_pointer,
+)
+
+ALLOWED = ["procedure_data", "metadata_blob"]
+
+def compile_sql(expression) -> str:
+    return str(expression.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+def test_pointer_round_trip():
+    """Test that JSON pointers are split and escaped per RFC 6901."""
+    assert parse_pointer("/procedure_data/visit~1date/a~0b") == ["procedure_data", "visit/date", "a~b"]
+    assert to_pointer(["procedure_data", "visit/date", "a~b"]) == "/procedure_data/visit~1date/a~0b"
+
+def test_merge_patch_uses_concat_and_key_removal():
+    """Test that merge patches compile to || with jsonb_build_object and - for nulls."""
+    values, conditions, paths = compile_document_patch(
+        Event, ALLOWED, {"procedure_data": {"bp": 120, "note": None, "visit": {"arm": "left"}}},
+        MERGE_PATCH_MEDIA_TYPE,
+    )
+    sql = compile_sql(values["procedure_data"])
+    assert "|| jsonb_build_object('bp', CAST('120' AS JSONB), 'visit'" in sql
+    assert "event.procedure_data -> 'visit'" in sql
+    assert sql.endswith("- 'note'")
+    assert conditions == []
+    assert paths == [["procedure_data", "bp"], ["procedure_data", "note"], ["procedure_data", "visit"]]
+
+def test_json_patch_operations():
+    """Test that JSON Patch ops map to jsonb_set, jsonb_insert, #- and WHERE tests."""
+    values, conditions, paths = compile_document_patch(Event, ALLOWED, [
+        {"op": "test", "path": "/procedure_data/bp", "value": 120},
+        {"op": "replace", "path": "/procedure_data/bp", "value": 125},
+        {"op": "remove", "path": "/procedure_data/note"},
+        {"op": "add", "path": "/metadata_blob/tags/-", "value": "reviewed"},
+    ], JSON_PATCH_MEDIA_TYPE)
+    assert compile_sql(values["procedure_data"]) == (
+        "jsonb_set(event.procedure_data, ARRAY['bp'], CAST('125' AS JSONB), true) #- ARRAY['note']"
+    )
+    assert "jsonb_insert(event.metadata_blob, ARRAY['tags', '-1'], CAST('\"reviewed\"' AS JSONB), true)" in compile_sql(values["metadata_blob"])
+    assert compile_sql(conditions[0]) == "(event.procedure_data #> ARRAY['bp']) = CAST('120' AS JSONB)"
+    assert paths == [["procedure_data", "bp"], ["procedure_data", "note"], ["metadata_blob", "tags"]]
+
+@pytest.mark.parametrize("body, media_type", [
+    ({"status": {"a": 1}}, MERGE_PATCH_MEDIA_TYPE),
+    ({"procedure_data": [1]}, MERGE_PATCH_MEDIA_TYPE),
+    ({}, MERGE_PATCH_MEDIA_TYPE),
+    ([{"op": "move", "from": "/procedure_data/a", "path": "/procedure_data/b"}], JSON_PATCH_MEDIA_TYPE),
+    ([{"op": "replace", "path": "/notes", "value": "x"}], JSON_PATCH_MEDIA_TYPE),
+    ([{"op": "add", "path": "/procedure_data/a"}], JSON_PATCH_MEDIA_TYPE),
+    ({"op": "add"}, JSON_PATCH_MEDIA_TYPE),
+])
+def test_invalid_patches_rejected(body, media_type):
+    """Test that malformed patches, or patches outside the JSONB columns, raise 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        compile_document_patch(Event, ALLOWED, body, media_type)
+    assert exc_info.value.status_code == 400
+
+def test_apply_delta_replays_patch_delta():
+    """Test that audited PATCH deltas can be replayed onto a snapshot, keeping nulls and dropping removed paths."""
+    state = {"version": 1, "procedure_data": {"bp": 120, "note": "x", "arm": "left"}, "metadata_blob": {"tags": ["a"]}}
+    delta = {
+        "/version": 2, "/procedure_data/bp": 125, "/procedure_data/arm": None, "/metadata_blob/tags": ["a", "b"],
+        "removed": ["/procedure_data/note"],
+    }
+    assert apply_delta(state, delta) == {
+        "version": 2, "procedure_data": {"bp": 125, "arm": None}, "metadata_blob": {"tags": ["a", "b"]},
+    }
+    assert state["procedure_data"]["note"] == "x"
+
+def test_path_delta_lists_absent_paths_as_removed():
+    """Test that absent paths are recorded under "removed" while JSON nulls stay values."""
+    assert path_delta(["/a", "/b", "/c"], [1, None, None], [False, False, True]) == {"/a": 1, "/b": None, "removed": ["/c"]}
+    assert path_delta(["/a"], [1], [False]) == {"/a": 1}
+
+def test_patch_applied_in_database(session, make_event):
+    """Test that compiled merge and JSON patches produce the expected JSONB on Postgres."""
+    from sqlalchemy import update
+    event = make_event(procedure_data={"bp": 120, "note": "x", "visit": {"arm": "left"}}, metadata_blob={"tags": ["a"]})
+
+    def apply(body, media_type):
+        values, conditions, _ = compile_document_patch(Event, ALLOWED, body, media_type)
+        statement = update(Event).where(Event.id == event.id, *conditions).values(**values).returning(Event.procedure_data, Event.metadata_blob)
+        return session.execute(statement).first()
+
+    row = apply({"procedure_data": {"bp": 125, "note": None, "visit": {"side": "r"}}}, MERGE_PATCH_MEDIA_TYPE)
+    assert row.procedure_data == {"bp": 125, "visit": {"arm": "left", "side": "r"}}
+
+    row = apply([
+        {"op": "test", "path": "/procedure_data/bp", "value": 125},
+        {"op": "replace", "path": "/procedure_data/visit/arm", "value": "right"},
+        {"op": "add", "path": "/metadata_blob/tags/-", "value": "b"},
+    ], JSON_PATCH_MEDIA_TYPE)
+    assert row.procedure_data["visit"] == {"arm": "right", "side": "r"}
+    assert row.metadata_blob == {"tags": ["a", "b"]}
+
+    assert apply([{"op": "test", "path": "/procedure_data/bp", "value": 1}], JSON_PATCH_MEDIA_TYPE) is None
@@ -0,0 +1,24 @@
+import pytest
+from sqlmodel import Session
+from app.models import User
+
+@pytest.fixture
+def staff(session: Session) -> User:
+    user = User(lastname="Wong", firstname="Ka Ming", email="km.wong@hku.hk")
+    session.add(user)
+    session.commit()
+    return user
+
+@pytest.mark.parametrize("path", ["/lookup/{code}", "/users/by-code/{code}"])
+def test_user_lookup_requires_admin(client_as, staff, path):
+    """Test that resolving a user ref code is refused below administrative level 2."""
+    response = client_as(1).get(path.format(code=staff.ref_code))
+    assert response.status_code == 403
+
+@pytest.mark.parametrize("path", ["/lookup/{code}", "/users/by-code/{code}"])
+def test_user_lookup_allowed_for_admin(client_as, staff, path):
+    """Test that administrators resolve user ref codes, ignoring the code's case."""
+    response = client_as(2).get(path.format(code=staff.ref_code.lower()))
+    assert response.status_code == 200
+    body = response.json()
+    assert body.get("data", body)["email"] == "km.wong@hku.hk"
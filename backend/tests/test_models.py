@@ -1,19 +1,10 @@
 import pytest
 import uuid
 from datetime import datetime, timedelta
-from sqlmodel import Session, create_engine, SQLModel, select
+from sqlmodel import Session, select
 from app.models import User, Study, Subject, Procedure, Event, AuditLog, StudyUserAccess
 
-# Mock DB for testing
-sqlite_url = "sqlite://"
-engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
-
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+# `session` is the rolled-back Postgres session from conftest.py
 
 def test_user_study_relationship(session: Session):
     """Test many-to-many relationship between User and Study."""
@@ -96,3 +87,14 @@ def test_audit_log_playback(session: Session):
     assert get_state_at(datetime(2025, 1, 1, 11, 30)) == {"status": "completed", "data": "A"}
     assert get_state_at(datetime(2025, 1, 1, 13, 0)) == {"status": "completed", "data": "B"}
     assert get_state_at(datetime(2025, 1, 1, 9, 0)) is None
+
+def test_event_jsonb_filters(session: Session, make_event):
+    """Test that JSONB containment and guarded numeric filters run on Postgres."""
+    from app.filters import apply_filters
+    high = make_event(procedure_data={"bp_systolic": 150, "arm": "left"}, metadata_blob={"site": "QMH"})
+    make_event(procedure_data={"bp_systolic": "n/a", "arm": "right"}, metadata_blob={"site": "PWH"})
+    
+    allowed = ["procedure_data", "metadata_blob"]
+    for filters in (["procedure_data.bp_systolic>140"], ["procedure_data.arm=left"], ['metadata_blob@>{"site": "QMH"}']):
+        results = session.exec(apply_filters(select(Event), Event, filters, allowed)).all()
+        assert [e.id for e in results] == [high.id]
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import select as selectors
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import Session
+from app.notifications import (
+    EVENT_CHANNEL, MAX_PAYLOAD_BYTES, RESET, EventBroadcaster, Subscriber, _offer, format_sse, notify_event_changes,
+)
+
+def test_format_sse():
+    """Test that messages are framed as SSE events named after their action."""
+    assert format_sse({"action": "update", "id": "1"}) == 'event: update\ndata: {"action": "update", "id": "1"}\n\n'
+    assert format_sse({}, event="ready") == "event: ready\ndata: {}\n\n"
+
+def test_full_queue_is_replaced_by_reset():
+    """Test that a subscriber that falls behind gets a single reset instead of stale messages."""
+    queue = asyncio.Queue(maxsize=2)
+    for i in range(3):
+        _offer(queue, {"action": "create", "id": str(i)})
+    assert queue.qsize() == 1
+    assert queue.get_nowait() is RESET
+
+def test_publish_filters_by_study():
+    """Test that messages reach unfiltered subscribers and those of the event's study only."""
+    async def scenario():
+        broadcaster = EventBroadcaster(engine=None)
+        loop = asyncio.get_running_loop()
+        everything, study_a, study_b = (
+            Subscriber(loop=loop, queue=asyncio.Queue(), study_id=study_id) for study_id in (None, "a", "b")
+        )
+        for subscriber in (everything, study_a, study_b):
+            broadcaster._subscribers[id(subscriber)] = subscriber
+        broadcaster.publish({"action": "create", "study_id": "a"})
+        broadcaster.publish(RESET)
+        await asyncio.sleep(0)
+        return [subscriber.queue.qsize() for subscriber in (everything, study_a, study_b)]
+
+    assert asyncio.run(scenario()) == [2, 2, 1]
+
+@pytest.fixture
+def listener(engine):
+    """Returns a function that collects payloads delivered on `EVENT_CHANNEL` to a second connection."""
+    connection = engine.raw_connection()
+    dbapi_connection = connection.driver_connection
+    connection.detach()
+    dbapi_connection.autocommit = True
+    dbapi_connection.cursor().execute(f"LISTEN {EVENT_CHANNEL}")
+
+    def received(study_ids, timeout=2.0):
+        # Other xdist workers share the channel; keep this test's studies only
+        payloads, deadline = [], time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if selectors.select([dbapi_connection], [], [], 0.2) == ([], [], []) and payloads:
+                break  # A commit's notifications arrive together
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                payload = dbapi_connection.notifies.pop(0).payload
+                if json.loads(payload)["study_id"] in study_ids:
+                    payloads.append(payload)
+        return payloads
+
+    yield received
+    connection.close()
+
+def changed_event(study_id, **fields):
+    row = dict(
+        id=uuid.uuid4(), ref_code="ev-ABC234", study_id=study_id, subject_id=uuid.uuid4(), version=2,
+        start_datetime=datetime(2026, 1, 5, 9, 0), updated_at=datetime(2026, 1, 4, 12, 30, 15, 250000),
+    )
+    return SimpleNamespace(**{**row, **fields})
+
+def test_notify_event_changes_batches_per_study(engine, listener):
+    """Test that one message per study is delivered on commit, carrying each event's IDs and times."""
+    study_a, study_b = str(uuid.uuid4()), str(uuid.uuid4())
+    events = [changed_event(study_a), changed_event(study_b), changed_event(study_a, version=5)]
+    with Session(engine) as session:
+        notify_event_changes(session, "update", events)
+        notify_event_changes(session, "delete", [])
+        session.commit()
+
+    messages = sorted((json.loads(payload) for payload in listener({study_a, study_b})), key=lambda m: len(m["events"]))
+    assert [(m["action"], m["study_id"], len(m["events"])) for m in messages] == [
+        ("update", study_b, 1), ("update", study_a, 2),
+    ]
+    assert messages[1]["events"][1] == {
+        "id": str(events[2].id),
+        "ref_code": "ev-ABC234",
+        "subject_id": str(events[2].subject_id),
+        "version": 5,
+        "start_datetime": "2026-01-05T09:00:00",
+        "updated_at": "2026-01-04T12:30:15.250000",
+    }
+
+def test_notify_event_changes_splits_large_batches(engine, listener):
+    """Test that a batch too large for one NOTIFY is split into several messages that keep every event."""
+    study_id = str(uuid.uuid4())
+    events = [changed_event(study_id) for _ in range(100)]
+    with Session(engine) as session:
+        notify_event_changes(session, "create", events)
+        session.commit()
+
+    payloads = listener({study_id})
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= MAX_PAYLOAD_BYTES for payload in payloads)
+    delivered = [entry["id"] for payload in payloads for entry in json.loads(payload)["events"]]
+    assert delivered == [str(event.id) for event in events]
+
+def test_notify_event_changes_dropped_on_rollback(engine, listener):
+    """Test that notifications queued in a rolled-back transaction are never delivered."""
+    study_id = str(uuid.uuid4())
+    with Session(engine) as session:
+        notify_event_changes(session, "create", [changed_event(study_id)])
+        session.rollback()
+
+    assert listener({study_id}, timeout=0.5) == []
@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime
+from sqlmodel import Session, create_engine
+from app.models import Subject
+from app import refcodes
+from app.refcodes import allocate_ref_codes, insert_with_ref_codes, RefCodeAllocationError
+from app.utils import generate_short_codes
+
+# Subject has no JSONB columns, so its table can be created on SQLite
+sqlite_url = "sqlite://"
+engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
+
+@pytest.fixture(name="session")
+def session_fixture():
+    Subject.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    Subject.__table__.drop(engine)
+
+def add_subject(session: Session, ref_code: str):
+    session.add(Subject(lastname="Wong", firstname="David", birthdate=datetime(1985, 5, 15), ref_code=ref_code))
+    session.commit()
+
+def test_generate_short_codes_unique_and_excluding():
+    """Test that batch generation returns distinct codes outside the exclusion set."""
+    codes = generate_short_codes(500, prefix="ev-")
+    assert len(codes) == len(set(codes)) == 500
+    assert all(code.startswith("ev-") for code in codes)
+
+    excluded = set(codes[:250])
+    assert excluded.isdisjoint(generate_short_codes(250, prefix="ev-", exclude=excluded))
+
+def test_allocate_ref_codes_returns_unused_codes(session: Session):
+    """Test that allocated codes have the entity prefix and are distinct."""
+    codes = allocate_ref_codes(session, Subject, 100)
+    assert len(set(codes)) == 100
+    assert all(code.startswith("su-") for code in codes)
+
+def test_allocate_ref_codes_retries_collisions(session: Session, monkeypatch):
+    """Test that codes already in the table are regenerated within the batch."""
+    add_subject(session, "su-AAAAAA")
+    batches = iter([["su-AAAAAA", "su-BBBBBB"], ["su-CCCCCC"]])
+    monkeypatch.setattr(refcodes, "generate_short_codes", lambda count, prefix, exclude: next(batches))
+
+    assert allocate_ref_codes(session, Subject, 2) == ["su-BBBBBB", "su-CCCCCC"]
+
+def test_allocate_ref_codes_gives_up(session: Session, monkeypatch):
+    """Test that persistent collisions raise instead of looping forever."""
+    add_subject(session, "su-AAAAAA")
+    monkeypatch.setattr(refcodes, "generate_short_codes", lambda count, prefix, exclude: ["su-AAAAAA"])
+
+    with pytest.raises(RefCodeAllocationError):
+        allocate_ref_codes(session, Subject, 1)
+
+def test_insert_with_ref_codes_retries_concurrent_duplicate(session: Session, monkeypatch):
+    """Test that a code taken after allocation (by a concurrent insert) is replaced and the insert retried."""
+    add_subject(session, "su-AAAAAA")
+    batches = iter([["su-AAAAAA"], ["su-BBBBBB"]])  # The first was free when it was allocated
+    monkeypatch.setattr(refcodes, "allocate_ref_codes", lambda session, model, count: next(batches))
+
+    subject = Subject(lastname="Chan", firstname="Mei", birthdate=datetime(1990, 1, 1))
+    insert_with_ref_codes(session, [subject])
+    session.commit()
+    assert subject.ref_code == "su-BBBBBB"
+    assert session.get(Subject, subject.id) is subject
+
+def test_allocation_error_is_service_unavailable():
+    """Test that giving up on allocation surfaces as a retryable 503."""
+    assert RefCodeAllocationError("No codes").status_code == 503
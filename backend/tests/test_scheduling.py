@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlmodel import Session
+from app.models import Event
+from app.scheduling import ensure_no_conflicts, find_conflicts, schedule_key
+
+def add_event(session: Session, like: Event, hour: int, minutes: int = 30, **fields) -> Event:
+    """Adds an event for the same study, subject and procedure as `like` on the same day."""
+    start = like.start_datetime.replace(hour=hour)
+    values = dict(
+        study_id=like.study_id, subject_id=like.subject_id, procedure_id=like.procedure_id,
+        start_datetime=start, end_datetime=start + timedelta(minutes=minutes),
+    )
+    values.update(fields)
+    event = Event(**values)
+    session.add(event)
+    session.flush()
+    return event
+
+def test_schedule_key_ignores_unrelated_changes():
+    """Test that only time, subject, activity and resource changes count as rescheduling."""
+    event = Event(start_datetime=datetime(2026, 1, 5, 9, 0), metadata_blob={"resource": "MRI"})
+    key = schedule_key(event)
+    event.notes = "Fasting"
+    event.status = "completed"
+    event.metadata_blob = {"resource": "MRI", "site": "QMH"}
+    assert schedule_key(event) == key
+    event.status = "cancelled"
+    assert schedule_key(event) != key
+
+def test_subject_overlap_rejected(session: Session, make_event):
+    """Test that overlapping events of one subject raise 409, while adjacent or cancelled ones do not."""
+    first = make_event(end_datetime=datetime(2026, 1, 5, 10, 0))  # 09:00-10:00
+    adjacent = add_event(session, first, hour=10)
+    cancelled = add_event(session, first, hour=9, status="cancelled")
+    ensure_no_conflicts(session, [adjacent.id, cancelled.id])
+
+    clash = add_event(session, first, hour=9, minutes=15)
+    with pytest.raises(HTTPException) as exc_info:
+        ensure_no_conflicts(session, [clash.id])
+    assert exc_info.value.status_code == 409
+    assert exc_info.value.detail["conflicts"] == [
+        {"event": clash.ref_code, "conflicts_with": first.ref_code, "kind": "subject"}
+    ]
+
+def test_open_ended_event_blocks_default_duration(session: Session, make_event):
+    """Test that an event without an end time occupies one hour."""
+    first = make_event()  # 09:00, no end
+    ensure_no_conflicts(session, [add_event(session, first, hour=10).id])
+    with pytest.raises(HTTPException):
+        ensure_no_conflicts(session, [add_event(session, first, hour=9, minutes=5).id])
+
+def test_find_conflicts_reports_each_pair_once(session: Session, make_event):
+    """Test that the window listing finds subject and resource overlaps once per pair."""
+    first = make_event(metadata_blob={"resource": "MRI"})
+    other = make_event(metadata_blob={"resource": "MRI"})  # different subject, same scanner
+    double_booked = add_event(session, first, hour=9, minutes=15)
+    add_event(session, other, hour=14, metadata_blob={"resource": "MRI"})  # no overlap
+    session.commit()
+
+    conflicts = find_conflicts(session, datetime(2026, 1, 5), datetime(2026, 1, 6), first.study_id)
+    pairs = {(c.event_id, c.other_id, c.kind) for c in conflicts if c.kind == "subject"}
+    assert pairs == {tuple(sorted([first.id, double_booked.id])) + ("subject",)}
+    resource = [c for c in conflicts if c.kind == "resource"]
+    assert [(c.event_id, c.other_id, c.resource) for c in resource] == [(first.id, other.id, "MRI")]
+    assert (resource[0].overlap_start, resource[0].overlap_end) == (datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 10, 0))
@@ -0,0 +1,16 @@
+from sqlmodel import Session, select
+from app.models import INCLUDE_DELETED, Event, Study, User
+from app.routers.events import delete_event
+
+def test_deleted_event_is_hidden_by_default(session: Session, make_event, tester: User):
+    """Test that a soft-deleted event is kept but left out of selects, gets and relationships."""
+    event = make_event()
+    event_id, study_id = event.id, event.study_id
+    delete_event(event_id, session=session, current_user=tester)
+    session.expunge_all()
+
+    assert session.get(Event, event_id) is None
+    assert session.exec(select(Event).where(Event.study_id == study_id)).all() == []
+    assert session.get(Study, study_id).events == []
+    kept = session.exec(select(Event).where(Event.id == event_id).execution_options(**{INCLUDE_DELETED: True})).one()
+    assert kept.deleted_at is not None and kept.updated_by == tester.email
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from sqlmodel import Session, select
+from app.models import Event, StudyStat, StudySubjectLink, Subject
+from app.stats import (
+    apply_stat_deltas, event_stat_keys, rebuild_study_stats, study_stats, subject_stat_keys, week_start,
+)
+
+def test_week_start_is_monday():
+    """Test that events are bucketed by the Monday of their week."""
+    assert week_start(datetime(2026, 1, 5, 9, 0)) == date(2026, 1, 5)
+    assert week_start(datetime(2026, 1, 11, 23, 59)) == date(2026, 1, 5)
+    assert week_start(datetime(2026, 1, 12, 0, 0)) == date(2026, 1, 12)
+
+def test_stat_deltas_cancel_out(session: Session, make_event):
+    """Test that unchanged dimensions are not written and changed ones move between keys."""
+    event = make_event(status="pending")
+    apply_stat_deltas(session, added=event_stat_keys(event))
+
+    before = event_stat_keys(event)
+    event.status = "completed"
+    apply_stat_deltas(session, added=event_stat_keys(event), removed=before)
+    session.commit()
+
+    rows = session.exec(
+        select(StudyStat.dimension, StudyStat.key, StudyStat.count).where(StudyStat.study_id == event.study_id)
+    ).all()
+    assert sorted(rows) == sorted([
+        ("procedure", str(event.procedure_id), 1),
+        ("status", "completed", 1),
+        ("status", "pending", 0),
+        ("week", "2026-01-05", 1),
+    ])
+
+def test_study_stats(session: Session, make_event):
+    """Test that the dashboard figures are built from the maintained counters."""
+    first = make_event(status="completed")
+    keys = event_stat_keys(first)
+    for status, day in (("completed", 6), ("no_show", 12), ("pending", 13)):
+        event = Event(
+            study_id=first.study_id, subject_id=first.subject_id, procedure_id=first.procedure_id,
+            start_datetime=datetime(2026, 1, day, 10, 0), status=status,
+        )
+        session.add(event)
+        keys += event_stat_keys(event)
+    other = Subject(lastname="Wong", firstname="Mei", birthdate=datetime(2010, 6, 1), sex="female")
+    for subject in (session.get(Subject, first.subject_id), other):
+        keys += subject_stat_keys(first.study_id, subject)
+    apply_stat_deltas(session, added=keys)
+    session.commit()
+
+    stats = study_stats(session, first.study_id, today=date(2026, 10, 19))
+    assert stats.enrolled_subjects == 2
+    assert stats.total_events == 4
+    assert stats.events_by_status == {"completed": 2, "no_show": 1, "pending": 1}
+    assert [(p.name, p.count) for p in stats.events_by_procedure] == [("Vitals", 4)]
+    assert [(w.week_start, w.count) for w in stats.events_by_week] == [(date(2026, 1, 5), 2), (date(2026, 1, 12), 2)]
+    assert stats.completion_rate == round(2 / 3, 4)
+    assert stats.no_show_rate == round(1 / 3, 4)
+    assert stats.sex_distribution == {"female": 1, "unknown": 1}
+    assert stats.age_distribution == {"<18": 1, "18-29": 0, "30-44": 0, "45-64": 1, "65+": 0}
+
+def test_rebuild_matches_maintained_counters(session: Session, make_event):
+    """Test that rebuilding a study's counters gives the incrementally maintained ones."""
+    first = make_event(status="completed")
+    deleted = Event(
+        study_id=first.study_id, subject_id=first.subject_id, procedure_id=first.procedure_id,
+        start_datetime=datetime(2026, 1, 20, 10, 0), deleted_at=datetime(2026, 1, 21),
+    )
+    session.add_all([deleted, StudySubjectLink(study_id=first.study_id, subject_id=first.subject_id)])
+    keys = event_stat_keys(first) + subject_stat_keys(first.study_id, session.get(Subject, first.subject_id))
+    apply_stat_deltas(session, added=keys)
+    session.commit()
+    maintained = study_stats(session, first.study_id, today=date(2026, 10, 19))
+
+    # Drifted counters are replaced, not added to
+    apply_stat_deltas(session, added=event_stat_keys(deleted))
+    rebuild_study_stats(session, first.study_id)
+    session.commit()
+    assert study_stats(session, first.study_id, today=date(2026, 10, 19)) == maintained
@@ -0,0 +1,14 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.auth import get_current_user
+from app.main import app
+from app.models import User
+
+def test_delete_study_requires_admin():
+    """Test that deleting a study is refused below administrative level 2."""
+    app.dependency_overrides[get_current_user] = lambda: User(lastname="Lee", firstname="Ann", email="ann@hku.hk", admin_level=1)
+    try:
+        response = TestClient(app).delete(f"/studies/{uuid.uuid4()}")
+        assert response.status_code == 403
+    finally:
+        app.dependency_overrides.clear()
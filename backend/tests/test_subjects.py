@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session
+from app.models import Subject
+
+def add_subjects(session: Session, *names, **fields):
+    subjects = [
+        Subject(lastname=lastname, firstname=firstname, birthdate=datetime(1980, 1, 1), **fields)
+        for lastname, firstname in names
+    ]
+    session.add_all(subjects)
+    session.commit()
+    return subjects
+
+def search(client, q, **params):
+    response = client.get("/subjects/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+def test_search_ranks_whole_word_before_prefix_and_substring(session: Session, client_as):
+    """Test that an exact word outranks a word prefix, which outranks a match inside a word."""
+    add_subjects(session, ("Tse", "Wing"), email="mchan@hku.hk")
+    add_subjects(session, ("Chandler", "Ka Ho"), ("Chan", "Tai Man"), ("Wong", "Siu Ming"))
+    results = search(client_as(), "chan")
+    assert [result["lastname"] for result in results] == ["Chan", "Chandler", "Tse"]
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    # Contact details stay out of search results
+    assert "email" not in results[2]
+
+def test_search_breaks_score_ties_by_name(session: Session, client_as):
+    """Test that equally scored matches are ordered by last then first name."""
+    add_subjects(session, ("Lau", "Wai Chan"), ("Chan", "Bo"), ("Chan", "Ada"))
+    results = search(client_as(), "chan")
+    assert [(r["lastname"], r["firstname"]) for r in results] == [("Chan", "Ada"), ("Chan", "Bo"), ("Lau", "Wai Chan")]
+
+def test_search_respects_limit(session: Session, client_as):
+    """Test that `limit` caps the result count and is itself bounded."""
+    add_subjects(session, *[("Chan", f"Patient {i}") for i in range(5)])
+    client = client_as()
+    assert len(search(client, "chan", limit=3)) == 3
+    assert len(search(client, "chan")) == 5
+    assert client.get("/subjects/search", params={"q": "chan", "limit": 101}).status_code == 422
+
+def test_search_excludes_soft_deleted_subjects(session: Session, client_as):
+    """Test that soft-deleted subjects are not returned."""
+    kept, deleted = add_subjects(session, ("Chan", "Kept"), ("Chan", "Deleted"))
+    deleted.deleted_at = datetime.utcnow()
+    session.add(deleted)
+    session.commit()
+    assert [result["id"] for result in search(client_as(), "chan")] == [str(kept.id)]
+
+@pytest.mark.parametrize("q", ["", "c"])
+def test_search_rejects_short_queries(client_as, q):
+    """Test that queries under two characters are rejected."""
+    assert client_as().get("/subjects/search", params={"q": q}).status_code == 422
+
+def test_search_ignores_blank_query(session: Session, client_as):
+    """Test that a whitespace-only query matches nothing rather than everything."""
+    add_subjects(session, ("Chan", "Tai Man"))
+    assert search(client_as(), "   ") == []
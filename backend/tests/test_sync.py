@@ -0,0 +1,117 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlmodel import Session
+from app.models import Event, StudySubjectLink, Subject
+from app.routers.sync import parse_entities, sync_changes
+
+def sync(session: Session, since=None, cursor=None, limit=100, entities=()):
+    return sync_changes(since=since, cursor=cursor, entities=list(entities), limit=limit, session=session, current_user=None)
+
+def test_parse_entities():
+    """Test that entity names are split and validated, defaulting to all."""
+    assert parse_entities([]) == ["study", "subject", "procedure", "event"]
+    assert parse_entities(["event,study"]) == ["study", "event"]
+    with pytest.raises(HTTPException) as exc_info:
+        parse_entities(["user"])
+    assert exc_info.value.status_code == 400
+
+def test_sync_returns_changes_and_deletions_since_watermark(session: Session, make_event):
+    """Test that only records changed or soft-deleted at or after `since` are returned."""
+    old = make_event()
+    since = datetime.utcnow()
+    fresh = make_event()
+    old.deleted_at = old.updated_at = datetime.utcnow()
+    session.add(old)
+    session.commit()
+
+    result = sync(session, since=since, entities=["subject", "event"])
+    assert [e["id"] for e in result.changes["event"].changed] == [str(fresh.id)]
+    assert result.changes["event"].deleted == [old.id]
+    assert [s["id"] for s in result.changes["subject"].changed] == [str(fresh.subject_id)]
+    assert result.watermark >= since
+    assert not result.has_more
+
+def test_sync_includes_newly_linked_subjects(session: Session, make_event):
+    """Test that linking an unchanged subject to a study marks it as changed."""
+    event = make_event()
+    since = datetime.utcnow()
+    session.add(StudySubjectLink(study_id=event.study_id, subject_id=event.subject_id))
+    session.commit()
+
+    result = sync(session, since=since, entities=["subject"])
+    assert [s["study_id"] for s in result.changes["subject"].changed] == [str(event.study_id)]
+    assert list(result.changes) == ["subject"]
+
+def test_sync_truncation_resumes_after_last_row(session: Session, make_event):
+    """Test that a truncated sync resumes after the last row even when timestamps are shared."""
+    first = make_event()
+    since = first.updated_at
+    for hours in (1, 2, 3):
+        session.add(Event(
+            study_id=first.study_id, subject_id=first.subject_id, procedure_id=first.procedure_id,
+            start_datetime=first.start_datetime + timedelta(hours=hours), updated_at=first.updated_at,
+        ))
+    session.commit()
+
+    seen = []
+    page = sync(session, since=since, limit=2, entities=["event"])
+    while page.has_more:
+        seen += [e["id"] for e in page.changes["event"].changed]
+        assert page.watermark == first.updated_at
+        page = sync(session, since=page.watermark, cursor=page.cursor, limit=2, entities=["event"])
+    seen += [e["id"] for e in page.changes["event"].changed]
+    assert len(seen) == len(set(seen)) == 4
+    assert page.cursor is None
+
+def sync_all(session: Session, since, entities, limit=1):
+    """Follows `has_more` to the end; returns the IDs seen per entity and every watermark."""
+    seen = {name: [] for name in entities}
+    watermarks = []
+    page = sync(session, since=since, limit=limit, entities=entities)
+    while True:
+        watermarks.append(page.watermark)
+        for name, delta in page.changes.items():
+            seen[name] += [record["id"] for record in delta.changed] + [str(i) for i in delta.deleted]
+        if not page.has_more:
+            return seen, watermarks
+        page = sync(session, since=page.watermark, cursor=page.cursor, limit=limit, entities=entities)
+
+def test_sync_truncated_at_linked_subject_keeps_watermark(session: Session, make_event):
+    """Test that truncating right after a link-matched subject (older `updated_at`) never moves the watermark before `since`."""
+    event = make_event()
+    since = datetime.utcnow()
+    session.add(StudySubjectLink(study_id=event.study_id, subject_id=event.subject_id))
+    fresh = [Subject(lastname="Ho", firstname=name, birthdate=datetime(1990, 1, 1)) for name in ("Ka", "Lok")]
+    session.add_all(fresh)
+    session.commit()
+
+    first = sync(session, since=since, limit=1, entities=["subject"])
+    # The linked subject sorts first: its own row has not changed since before `since`
+    assert [s["id"] for s in first.changes["subject"].changed] == [str(event.subject_id)]
+    assert first.has_more and first.watermark >= since
+
+    seen, watermarks = sync_all(session, since, ["subject"])
+    assert sorted(seen["subject"]) == sorted(str(s) for s in (event.subject_id, fresh[0].id, fresh[1].id))
+    assert all(watermark >= since for watermark in watermarks)
+
+def test_sync_truncation_resumes_each_entity_separately(session: Session, make_event):
+    """Test that entities truncated at different positions each resume from their own, without repeats."""
+    since = datetime.utcnow()
+    events = [make_event() for _ in range(3)]
+    entities = ["subject", "procedure", "event"]
+
+    seen, _ = sync_all(session, since, entities, limit=2)
+    expected = {
+        "subject": [e.subject_id for e in events],
+        "procedure": [e.procedure_id for e in events],
+        "event": [e.id for e in events],
+    }
+    for name in entities:
+        assert sorted(seen[name]) == sorted(str(i) for i in expected[name]), name
+
+def test_sync_rejects_malformed_cursor(session: Session):
+    """Test that a cursor that was not issued by sync is refused."""
+    with pytest.raises(HTTPException) as exc_info:
+        sync(session, cursor="not-a-cursor")
+    assert exc_info.value.status_code == 400
@@ -5,7 +5,9 @@ from app.utils import (
     uuid7,
     generate_study_code,
     generate_event_code,
-    generate_subject_code
+    generate_subject_code,
+    normalize_ref_code,
+    ref_code_entity
 )
 
 def test_generate_short_code_default():
@@ -56,3 +58,16 @@ def test_uuid7_ordering():
     time.sleep(0.001)
     u2 = uuid7()
     assert u1 < u2
+
+def test_normalize_ref_code():
+    """Test that typed codes are normalized to the stored prefix/body casing."""
+    assert normalize_ref_code(" st-a7b9x2 ") == "st-A7B9X2"
+    assert normalize_ref_code("SU-k3m9pq") == "su-K3M9PQ"
+    assert normalize_ref_code("a9x-2m4") == "A9X-2M4"
+
+def test_ref_code_entity():
+    """Test that ref code prefixes map to their entity tables."""
+    assert ref_code_entity("st-A7B9X2") == "study"
+    assert ref_code_entity("EV-A7B9X2") == "event"
+    assert ref_code_entity("us-A7B9X2") == "user"
+    assert ref_code_entity("xx-A7B9X2") is None
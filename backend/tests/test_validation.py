@@ -0,0 +1,87 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from app.models import Procedure
+from app.validation import (
+    compile_form_schema,
+    get_procedure_validator,
+    invalidate_procedure_validator,
+    validate_procedure_data
+)
+
+SCHEMA = {
+    "fields": [
+        {"name": "bp_systolic", "type": "number", "label": "Systolic", "required": True},
+        {"name": "visit_date", "type": "date", "label": "Visit Date"},
+        {"name": "arm", "type": "select", "label": "Arm", "options": ["left", "right"]},
+        {"name": "comment", "type": "text", "label": "Comment"}
+    ]
+}
+
+def make_procedure(schema=SCHEMA):
+    return Procedure(
+        id=uuid.uuid4(),
+        study_id=uuid.uuid4(),
+        name="Blood Pressure",
+        description="BP check",
+        form_data_schema=schema,
+        updated_at=datetime(2026, 1, 1)
+    )
+
+def test_compile_empty_schema_returns_none():
+    """Test that procedures without fields skip validation."""
+    assert compile_form_schema({}) is None
+    assert compile_form_schema({"fields": []}) is None
+
+def test_valid_procedure_data_passes():
+    """Test that data matching the schema is accepted."""
+    procedure = make_procedure()
+    validate_procedure_data(procedure, {"bp_systolic": 120, "visit_date": "2026-01-05", "arm": "left"})
+
+def test_invalid_procedure_data_reports_locations():
+    """Test that missing and mistyped fields are rejected with locations."""
+    procedure = make_procedure()
+    with pytest.raises(HTTPException) as exc_info:
+        validate_procedure_data(procedure, {"arm": "both", "visit_date": "soon"})
+
+    assert exc_info.value.status_code == 422
+    locs = {tuple(error["loc"]) for error in exc_info.value.detail}
+    assert locs == {
+        ("body", "procedure_data", "bp_systolic"),
+        ("body", "procedure_data", "arm"),
+        ("body", "procedure_data", "visit_date"),
+    }
+
+def test_blank_optional_select_and_date_accepted():
+    """Test that the "" DynamicForm sends for a blank select or a cleared date passes as no value."""
+    procedure = make_procedure()
+    validate_procedure_data(procedure, {"bp_systolic": 120, "arm": "", "visit_date": ""})
+
+def test_blank_required_field_rejected():
+    """Test that "" does not satisfy a required select."""
+    procedure = make_procedure({"fields": [{"name": "arm", "type": "select", "options": ["left"], "required": True}]})
+    with pytest.raises(HTTPException):
+        validate_procedure_data(procedure, {"arm": ""})
+
+def test_legacy_keys_from_removed_fields_ignored():
+    """Test that data for fields later removed from the schema does not block saving the event."""
+    procedure = make_procedure()
+    validate_procedure_data(procedure, {"bp_systolic": 120, "heart_rate": 72})
+
+def test_validator_is_cached_until_schema_changes():
+    """Test that validators are compiled once per procedure version."""
+    procedure = make_procedure()
+    first = get_procedure_validator(procedure)
+    assert get_procedure_validator(procedure) is first
+
+    # A newer updated_at (e.g. edited by another worker) forces recompilation
+    procedure.updated_at = procedure.updated_at + timedelta(seconds=1)
+    assert get_procedure_validator(procedure) is not first
+
+def test_invalidate_procedure_validator():
+    """Test that explicit invalidation drops the cached validator."""
+    procedure = make_procedure()
+    first = get_procedure_validator(procedure)
+    invalidate_procedure_validator(procedure.id)
+    assert get_procedure_validator(procedure) is not first
@@ -3,7 +3,7 @@ import { GoogleOAuthProvider } from '@react-oauth/google';
 import Layout from './components/Layout';
 import WeeklyCalendar from './components/WeeklyCalendar';
 import EventModal from './components/EventModal';
-import { authService, eventService, studyService, subjectService, procedureService, settingsService, userService } from './services/api';
+import { authService, eventService, studyService, subjectService, procedureService, settingsService, userService, syncService } from './services/api';
 
 import EntityManager from './components/EntityManager';
 import StudySubjectLinker from './components/StudySubjectLinker';
@@ -63,6 +63,60 @@ function App() {
     initAuth();
   }, [fetchData]);
 
+  // Apply live event changes instead of re-polling the whole list
+  useEffect(() => {
+    if (!isAuthenticated) return;
+    let since: string | null = null; // Oldest updated_at announced but not yet fetched
+    let timer: ReturnType<typeof setTimeout> | undefined;
+
+    // One /sync request for everything announced since the last one
+    const applyChanges = async () => {
+      let watermark = since!;
+      let cursor: string | undefined;
+      since = null;
+      timer = undefined;
+      try {
+        for (;;) {
+          const page = await syncService.changes(watermark, ['event'], cursor);
+          const { changed, deleted } = page.changes.event;
+          const removed = new Set(deleted);
+          // Responses can arrive out of order; keep the newest version
+          setEvents(current => {
+            const byId = new Map(current.map(e => [e.id, e]));
+            for (const updated of changed) {
+              if (!(byId.get(updated.id)?.version > updated.version)) byId.set(updated.id, updated);
+            }
+            return [...byId.values()].filter(e => !removed.has(e.id));
+          });
+          if (!page.has_more) break;
+          watermark = page.watermark;
+          cursor = page.cursor;
+        }
+      } catch (error) {
+        console.error("Failed to load changed events:", error);
+      }
+    };
+
+    const unsubscribe = eventService.subscribe(async (message) => {
+      if (message.action === 'reset') {
+        setEvents(await eventService.list());
+      } else if (message.action === 'delete') {
+        const removed = new Set(message.events.map((e: any) => e.id));
+        setEvents(current => current.filter(e => !removed.has(e.id)));
+      } else if (message.action === 'create' || message.action === 'update') {
+        for (const changed of message.events) {
+          if (since === null || changed.updated_at < since) since = changed.updated_at;
+        }
+        // Collect bursts (e.g. bulk creates) into a single request
+        if (!timer) timer = setTimeout(applyChanges, 250);
+      }
+    });
+    return () => {
+      clearTimeout(timer);
+      unsubscribe();
+    };
+  }, [isAuthenticated]);
+
   const handleLoginSuccess = (user: any) => {
     setCurrentUser(user);
     setIsAuthenticated(true);
@@ -18,6 +18,7 @@ interface EntityManagerProps {
     fields: Field[];
     service: {
         list: () => Promise<any[]>;
+        get?: (id: string) => Promise<any>; // Fetches the record's ETag for the update's If-Match
         create: (data: any) => Promise<any>;
         update: (id: string, data: any) => Promise<any>;
         delete: (id: string) => Promise<any>;
@@ -49,7 +50,17 @@ const EntityManager: React.FC<EntityManagerProps> = ({ title, fields, service, o
         fetchItems();
     }, [service]);
 
-    const handleOpenModal = (item: any | null = null) => {
+    const handleOpenModal = async (item: any | null = null) => {
+        if (item && service.get) {
+            try {
+                // Edit the current version, not the possibly stale list copy
+                item = { ...item, ...(await service.get(item.id)) };
+            } catch (error) {
+                console.error(`Failed to load ${title.slice(0, -1)}:`, error);
+                alert(`Error loading ${title.slice(0, -1)}`);
+                return;
+            }
+        }
         setEditingItem(item);
         if (item) {
             // Format dates for input[type="date"]
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { X, Save, Clock, Book, User, ClipboardList, Trash2, Play, CheckCircle } from 'lucide-react';
 import { format, addHours } from 'date-fns';
 import { studyService, procedureService, eventService } from '../services/api';
@@ -43,41 +43,72 @@ const EventModal: React.FC<EventModalProps> = ({
     const [initialLoading, setInitialLoading] = useState(false);
     const [fetchingRelated, setFetchingRelated] = useState(false);
     const [isExecuting, setIsExecuting] = useState(false);
+    // Study/procedure/subject lists are only fetched once the user works the selects
+    const [optionsLoaded, setOptionsLoaded] = useState(false);
+    const optionsRequested = useRef(false);
 
     const isEditMode = !!event;
 
+    const loadOptions = async () => {
+        if (optionsRequested.current) return;
+        optionsRequested.current = true;
+        setFetchingRelated(true);
+        try {
+            const [studiesData, proceduresData] = await Promise.all([
+                studyService.list(),
+                procedureService.list()
+            ]);
+            setStudies(studiesData);
+            setAllProcedures(proceduresData);
+            setOptionsLoaded(true);
+        } catch (error) {
+            optionsRequested.current = false;
+            console.error("Failed to fetch selection lists:", error);
+        } finally {
+            setFetchingRelated(false);
+        }
+    };
+
     // Initial Fetch & Setup
     useEffect(() => {
         if (isOpen) {
+            optionsRequested.current = false;
+            setOptionsLoaded(false);
             const fetchData = async () => {
                 setInitialLoading(true);
                 try {
-                    const [studiesData, proceduresData] = await Promise.all([
-                        studyService.list(),
-                        procedureService.list()
-                    ]);
-                    setStudies(studiesData);
-                    setAllProcedures(proceduresData);
-
                     if (event) {
-                        // Populate from event
-                        setStudyId(event.study_id);
-                        setSubjectId(event.subject_id);
-                        setProcedureId(event.procedure_id);
+                        // Populate from the current version (also caches its ETag for the update's If-Match).
+                        // Its embedded summaries fill the read-only selects, so no list requests are needed.
+                        const current = await eventService.get(event.id);
+                        setStudies(current.study ? [current.study] : []);
+                        setSubjects(current.subject ? [current.subject] : []);
+                        const eventProcedures = current.procedure ? [{ ...current.procedure, study_id: current.study_id }] : [];
+                        setAllProcedures(eventProcedures);
+                        setProcedures(eventProcedures);
+                        setStudyId(current.study_id);
+                        setSubjectId(current.subject_id);
+                        setProcedureId(current.procedure_id);
 
                         // Convert dates back from UTC to local display
-                        const localStart = fromUTC(event.start_datetime, timezone);
-                        const localEnd = fromUTC(event.end_datetime, timezone);
+                        const localStart = fromUTC(current.start_datetime, timezone);
+                        const localEnd = fromUTC(current.end_datetime, timezone);
                         setStartTime(format(localStart, "yyyy-MM-dd'T'HH:mm"));
                         setEndTime(format(localEnd, "yyyy-MM-dd'T'HH:mm"));
 
-                        setStatus(event.status || 'pending');
-                        setNotes(event.notes || '');
-                        setProcedureData(event.procedure_data || {});
+                        setStatus(current.status || 'pending');
+                        setNotes(current.notes || '');
+                        setProcedureData(current.procedure_data || {});
                     } else {
                         // Reset for New Mode
+                        setStudies([]);
+                        setSubjects([]);
+                        setAllProcedures([]);
+                        setProcedures([]);
                         const savedStudy = localStorage.getItem('sticky_study');
-                        if (savedStudy) setStudyId(savedStudy);
+                        setStudyId(savedStudy || '');
+                        // A remembered study must be listed to show as selected
+                        if (savedStudy) loadOptions();
 
                         setSubjectId('');
                         setProcedureId('');
@@ -102,6 +133,8 @@ const EventModal: React.FC<EventModalProps> = ({
 
     // Fetch Subjects when Study changes
     useEffect(() => {
+        // Until the lists are loaded the selects show the event's own summaries
+        if (!optionsLoaded) return;
         if (studyId && isOpen) {
             const fetchSubjects = async () => {
                 setFetchingRelated(true);
@@ -134,7 +167,7 @@ const EventModal: React.FC<EventModalProps> = ({
                 setProcedureId('');
             }
         }
-    }, [studyId, allProcedures, isEditMode, isOpen]);
+    }, [studyId, allProcedures, isEditMode, isOpen, optionsLoaded]);
 
     const handleSave = async (e?: React.FormEvent) => {
         if (e) e.preventDefault();
@@ -156,20 +189,32 @@ const EventModal: React.FC<EventModalProps> = ({
                 procedure_data: procedureData || {}
             };
 
+            const save = (allowOverlap: boolean) => isEditMode
+                ? eventService.update(event.id, payload, allowOverlap)
+                : eventService.create(payload, allowOverlap);
+            try {
+                await save(false);
+            } catch (error: any) {
+                const conflicts = error?.response?.status === 409 ? error.response.data?.detail?.conflicts : null;
+                if (!conflicts) throw error;
+                const refs = conflicts.map((c: any) => `${c.conflicts_with} (${c.kind})`).join(', ');
+                if (!window.confirm(`This time overlaps ${refs}. Book anyway?`)) return;
+                await save(true);
+            }
+
             if (isEditMode) {
-                await eventService.update(event.id, payload);
                 onEventUpdated?.();
             } else {
-                await eventService.create(payload);
                 // Update sticky
                 localStorage.setItem('sticky_study', studyId);
                 localStorage.setItem('sticky_procedure', procedureId);
                 onEventCreated?.();
             }
             onClose();
-        } catch (error) {
+        } catch (error: any) {
             console.error("Failed to save event:", error);
-            alert("Error saving event");
+            // 409 here means another user changed the event since it was opened
+            alert(error?.response?.status === 409 ? error.response.data.detail : "Error saving event");
         } finally {
             setLoading(false);
         }
@@ -195,7 +240,6 @@ const EventModal: React.FC<EventModalProps> = ({
         setLoading(true);
         try {
             await eventService.update(event.id, {
-                ...event,
                 procedure_data: data,
                 status: 'completed'
             });
@@ -272,6 +316,8 @@ const EventModal: React.FC<EventModalProps> = ({
                                     <select
                                         value={studyId}
                                         onChange={(e) => setStudyId(e.target.value)}
+                                        onFocus={loadOptions}
+                                        onMouseDown={loadOptions}
                                         className="w-full p-3 bg-gray-50 border border-gray-200 rounded-lg focus:ring-2 focus:ring-hku-green focus:border-hku-green transition-all outline-none text-sm"
                                         disabled={loading || initialLoading || isEditMode}
                                     >
@@ -292,6 +338,8 @@ const EventModal: React.FC<EventModalProps> = ({
                                     <select
                                         value={subjectId}
                                         onChange={(e) => setSubjectId(e.target.value)}
+                                        onFocus={loadOptions}
+                                        onMouseDown={loadOptions}
                                         className="w-full p-3 bg-gray-50 border border-gray-200 rounded-lg focus:ring-2 focus:ring-hku-green focus:border-hku-green transition-all outline-none text-sm"
                                         disabled={loading || initialLoading || isEditMode}
                                     >
@@ -317,6 +365,8 @@ const EventModal: React.FC<EventModalProps> = ({
                                     <select
                                         value={procedureId}
                                         onChange={(e) => setProcedureId(e.target.value)}
+                                        onFocus={loadOptions}
+                                        onMouseDown={loadOptions}
                                         className="w-full p-3 bg-gray-50 border border-gray-200 rounded-lg focus:ring-2 focus:ring-hku-green focus:border-hku-green transition-all outline-none text-sm"
                                         disabled={loading || initialLoading || isEditMode}
                                     >
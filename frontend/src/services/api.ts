@@ -14,14 +14,35 @@ const api = axios.create({
 
 // In a full implementation, this would be managed by an AuthProvider
 
+// Record ETags from GET/PATCH responses, keyed by record path (e.g. /events/<id>). PATCH sends the
+// tag back as If-Match, so editing a copy someone else has since changed fails with 409 instead of
+// overwriting their change. Full-record PATCH requires it (428): fetch the record with get() first.
+const recordEtags = new Map<string, string>();
+const recordPath = (url?: string) =>
+    url?.match(/^\/(studies|subjects|procedures|events)\/[0-9a-f-]{36}(?=(\/data)?$)/)?.[0];
+
 api.interceptors.request.use((config) => {
     const token = localStorage.getItem('token');
     if (token) {
         config.headers.Authorization = `Bearer ${token}`;
     }
+    const path = recordPath(config.url);
+    const etag = path && recordEtags.get(path);
+    if (config.method === 'patch' && etag) {
+        config.headers['If-Match'] = etag;
+    }
     return config;
 });
 
+api.interceptors.response.use((response) => {
+    const path = recordPath(response.config.url);
+    const etag = response.headers['etag'];
+    if (path && etag && (response.config.method === 'get' || response.config.method === 'patch')) {
+        recordEtags.set(path, etag);
+    }
+    return response;
+});
+
 export const authService = {
     login: async (email: string, password: string) => {
         const formData = new FormData();
@@ -72,6 +93,23 @@ export const studyService = {
         const response = await api.get('/studies/');
         return response.data;
     },
+    // Keyset-paged timeline: pass `nextCursor` back as `cursor` until it is null
+    events: async (id: string, params: { start?: string; end?: string; cursor?: string; limit?: number; order?: 'asc' | 'desc' } = {}) => {
+        const response = await api.get(`/studies/${id}/events`, { params });
+        return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+    },
+    stats: async (id: string) => {
+        const response = await api.get(`/studies/${id}/stats`);
+        return response.data;
+    },
+    getByCode: async (refCode: string) => {
+        const response = await api.get(`/studies/by-code/${encodeURIComponent(refCode)}`);
+        return response.data;
+    },
+    get: async (id: string) => {
+        const response = await api.get(`/studies/${id}`);
+        return response.data;
+    },
     create: async (data: any) => {
         const response = await api.post('/studies/', data);
         return response.data;
@@ -80,6 +118,7 @@ export const studyService = {
         const response = await api.patch(`/studies/${id}`, data);
         return response.data;
     },
+    // Returns the background job deleting the study's records; poll jobService.get for progress
     delete: async (id: string) => {
         const response = await api.delete(`/studies/${id}`);
         return response.data;
@@ -103,6 +142,23 @@ export const subjectService = {
         const response = await api.get('/subjects/');
         return response.data;
     },
+    // Keyset-paged visit timeline: pass `nextCursor` back as `cursor` until it is null
+    events: async (id: string, params: { start?: string; end?: string; cursor?: string; limit?: number; order?: 'asc' | 'desc' } = {}) => {
+        const response = await api.get(`/subjects/${id}/events`, { params });
+        return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+    },
+    getByCode: async (refCode: string) => {
+        const response = await api.get(`/subjects/by-code/${encodeURIComponent(refCode)}`);
+        return response.data;
+    },
+    search: async (q: string, limit = 20) => {
+        const response = await api.get('/subjects/search', { params: { q, limit } });
+        return response.data;
+    },
+    get: async (id: string) => {
+        const response = await api.get(`/subjects/${id}`);
+        return response.data;
+    },
     create: async (data: any) => {
         const response = await api.post('/subjects/', data);
         return response.data;
@@ -122,6 +178,14 @@ export const procedureService = {
         const response = await api.get('/procedures/');
         return response.data;
     },
+    getByCode: async (refCode: string) => {
+        const response = await api.get(`/procedures/by-code/${encodeURIComponent(refCode)}`);
+        return response.data;
+    },
+    get: async (id: string) => {
+        const response = await api.get(`/procedures/${id}`);
+        return response.data;
+    },
     create: async (data: any) => {
         const response = await api.post('/procedures/', data);
         return response.data;
@@ -138,10 +202,69 @@ export const procedureService = {
 
 export const eventService = {
     list: async () => (await api.get('/events/')).data,
-    create: async (data: any) => (await api.post('/events/', data)).data,
+    // allowOverlap books the slot even if it overlaps the subject's or resource's other events (else 409)
+    create: async (data: any, allowOverlap = false) => (await api.post('/events/', data, { params: { allow_overlap: allowOverlap } })).data,
     get: async (id: string) => (await api.get(`/events/${id}`)).data,
-    update: async (id: string, data: any) => (await api.patch(`/events/${id}`, data)).data,
+    // Per-bucket counts for month/quarter overviews; start/end in UTC, buckets in `tz`
+    aggregate: async (params: { start: string; end: string; bucket?: 'hour' | 'day' | 'week' | 'month'; group_by?: 'study' | 'procedure'; study_id?: string; tz?: string }) =>
+        (await api.get('/events/aggregate', { params })).data,
+    getByCode: async (refCode: string) => (await api.get(`/events/by-code/${encodeURIComponent(refCode)}`)).data,
+    update: async (id: string, data: any, allowOverlap = false) => (await api.patch(`/events/${id}`, data, { params: { allow_overlap: allowOverlap } })).data,
+    // Merge patch, e.g. { procedure_data: { bp_systolic: 120 } }; null removes a key
+    patchData: async (id: string, patch: any) => (await api.patch(`/events/${id}/data`, patch, {
+        headers: { 'Content-Type': 'application/merge-patch+json' },
+    })).data,
     delete: async (id: string) => (await api.delete(`/events/${id}`)).data,
+    // Live create/update/delete/reset notifications (Server-Sent Events); returns an unsubscribe function.
+    // Each create/update/delete message lists the changed events in `events`.
+    // Uses fetch rather than EventSource so the bearer token goes in a header. Reconnects with
+    // exponential backoff; gives up on 401/403 (the logout flow takes over).
+    subscribe: (onMessage: (message: any) => void, studyId?: string) => {
+        const controller = new AbortController();
+        const url = `${API_BASE_URL}/events/stream${studyId ? `?study_id=${encodeURIComponent(studyId)}` : ''}`;
+        const connect = async () => {
+            let failures = 0;
+            while (!controller.signal.aborted) {
+                let connected = false;
+                try {
+                    const response = await fetch(url, {
+                        headers: { Authorization: `Bearer ${localStorage.getItem('token') ?? ''}` },
+                        signal: controller.signal,
+                    });
+                    if (response.status === 401 || response.status === 403) return;
+                    if (!response.ok || !response.body) throw new Error(`Stream failed: ${response.status}`);
+                    connected = true;
+                    failures = 0;
+                    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    for (;;) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += value;
+                        let end;
+                        while ((end = buffer.indexOf('\n\n')) >= 0) {
+                            const data = buffer.slice(0, end).split('\n').find(line => line.startsWith('data: '));
+                            buffer = buffer.slice(end + 2);
+                            if (data) onMessage(JSON.parse(data.slice(6)));
+                        }
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    console.error('Event stream disconnected:', error);
+                }
+                // Anything may have changed while a live stream was down
+                if (connected) onMessage({ action: 'reset' });
+                // 1s, 2s, 4s ... capped at 60s, with jitter so tabs don't reconnect in step
+                const delay = Math.min(1000 * 2 ** failures++, 60000) * (0.5 + Math.random() / 2);
+                await new Promise(resolve => setTimeout(resolve, delay));
+            }
+        };
+        connect();
+        return () => controller.abort();
+    },
+    // Overlapping pairs of events starting in [start, end) (UTC)
+    conflicts: async (params: { start: string; end: string; study_id?: string }) =>
+        (await api.get('/events/conflicts', { params })).data,
 };
 
 export const settingsService = {
@@ -157,4 +280,25 @@ export const userService = {
     delete: async (id: string) => (await api.delete(`/users/${id}`)).data,
 };
 
+// Changes since a watermark: { watermark, has_more, cursor, changes: { study|subject|procedure|event: { changed, deleted } } }.
+// Omit `since` for a full load; call again with the returned watermark (immediately, with the cursor, while has_more).
+export const syncService = {
+    changes: async (since?: string, entities?: string[], cursor?: string) =>
+        (await api.get('/sync/', { params: { since, entities: entities?.join(','), cursor } })).data,
+};
+
+// Resolves any ref code (st-/su-/ev-/pr-/us-) to { entity, id, ref_code, data }
+export const lookupService = {
+    byCode: async (code: string) => (await api.get(`/lookup/${encodeURIComponent(code)}`)).data,
+};
+
+// Background jobs: { id, kind, status: pending|running|completed|failed, total, processed, result, error }
+export const jobService = {
+    // e.g. submit('export_study', { study_id }); poll get() until the status is completed, failed or cancelled
+    submit: async (kind: string, params: Record<string, any> = {}) => (await api.post('/jobs/', { kind, params })).data,
+    get: async (id: string) => (await api.get(`/jobs/${id}`)).data,
+    cancel: async (id: string) => (await api.post(`/jobs/${id}/cancel`)).data,
+    result: async (id: string) => (await api.get(`/jobs/${id}/result`, { responseType: 'blob' })).data,
+};
+
 export default api;